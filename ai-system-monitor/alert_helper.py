@@ -16,6 +16,9 @@ import os
 import sys
 import argparse
 
+import notify_agent
+from notify_queue import NotificationQueue
+
 
 # Application name
 APP_NAME = os.getenv("APP_NAME", "vscode-monitor")
@@ -52,10 +55,35 @@ def send_notification(
     link: str = ""
 ) -> bool:
     """
-    Send notification to Unraid notification system.
+    Queue a notification for the Unraid notification system.
     
-    Uses nsenter to run the notify command in the host's namespace.
-    This requires the container to run with pid=host and privileged=true.
+    Goes through the shared notification queue: a repeat of the same
+    event/subject within the dedup window is only counted, and sends are
+    rate limited and batched (see notify_queue.py).
+    
+    Returns:
+        True if the notification was sent, coalesced or queued, False if sending failed
+    """
+    result = NotificationQueue(notify).submit(event, subject, description, importance, message, link)
+    if result != "sent":
+        print(f"[NOTIFY] {result.capitalize()}: {importance.upper()} - {subject}")
+    return result != "failed"
+
+
+def notify(
+    event: str,
+    subject: str,
+    description: str,
+    importance: str = "normal",
+    message: str = "",
+    link: str = ""
+) -> bool:
+    """
+    Send notification to Unraid notification system right away.
+    
+    Goes through the host-side notify agent (notify_agent.py) when its
+    socket is mounted; otherwise uses nsenter to run the notify command in
+    the host's namespace, which requires pid=host and privileged=true.
     
     Args:
         event: Event category (e.g., "vscode-monitor")
@@ -71,6 +99,14 @@ def send_notification(
     # Transform analysis paths to public URLs
     transformed_link = transform_link(link)
     
+    # Prefer the host-side notify agent: one socket write, no nsenter/bash
+    sent = notify_agent.try_send({"event": event, "subject": subject, "description": description,
+                                  "importance": importance, "message": message, "link": transformed_link})
+    if sent is not None:
+        if sent:
+            print(f"[NOTIFY] Sent: {importance.upper()} - {subject}")
+        return sent
+    
     # Build the notify command
     notify_path = "/usr/local/emhttp/plugins/dynamix/scripts/notify"
     notify_cmd = f'{notify_path} -e "{event}" -s "{subject}" -d "{description}" -i "{importance}"'
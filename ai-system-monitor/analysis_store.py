@@ -0,0 +1,358 @@
+#!/usr/bin/env python3
+"""
+Bounded analysis store for the system monitor.
+
+Each monitor run appends one line to ANALYSIS_DIR/index.jsonl (timestamp,
+target, status, diagnosis, duration, transcript path/size and the byte offset
+of the STATUS line in the transcript), so status history queries only read
+the index instead of every transcript. prune() enforces age and total-size
+limits on ANALYSIS_DIR and compresses transcripts once they are no longer
+fresh (zstd when the zstandard module is installed, gzip otherwise).
+
+Usage:
+    python3 /app/analysis_store.py last [--status FAILURE] [--count N]
+    python3 /app/analysis_store.py stats [--days 7]
+    python3 /app/analysis_store.py show <timestamp>     # Print a (compressed) transcript
+    python3 /app/analysis_store.py prune [--dry-run]
+"""
+import argparse
+import fcntl
+import gzip
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+ANALYSIS_DIR = os.getenv("ANALYSIS_DIR", "/state/analysis")
+INDEX_FILE = os.path.join(ANALYSIS_DIR, "index.jsonl")
+# Files older than this are deleted
+ANALYSIS_MAX_AGE_DAYS = float(os.getenv("ANALYSIS_MAX_AGE_DAYS", "30"))
+# Oldest files are deleted until ANALYSIS_DIR is under this size
+ANALYSIS_MAX_MB = float(os.getenv("ANALYSIS_MAX_MB", "500"))
+# Transcripts older than this are compressed
+ANALYSIS_COMPRESS_AFTER_HOURS = float(os.getenv("ANALYSIS_COMPRESS_AFTER_HOURS", "24"))
+# auto (zstd if available, else gzip), zstd, gzip or none
+ANALYSIS_COMPRESSION = os.getenv("ANALYSIS_COMPRESSION", "auto")
+# Index entries are kept longer than the files they point to
+ANALYSIS_INDEX_MAX_AGE_DAYS = float(os.getenv("ANALYSIS_INDEX_MAX_AGE_DAYS", "365"))
+
+# Files managed by retention; anything else in ANALYSIS_DIR is left alone
+MANAGED_PREFIXES = ("output_", "timing_", "daily_report_")
+TRANSCRIPT_PREFIX = "output_"
+COMPRESSED_SUFFIXES = (".zst", ".gz")
+TIMESTAMP_FORMAT = "%Y%m%d_%H%M%S"
+
+
+def _codec() -> str:
+    if ANALYSIS_COMPRESSION == "auto":
+        return "zstd" if zstandard is not None else "gzip"
+    if ANALYSIS_COMPRESSION == "zstd" and zstandard is None:
+        print("[WARN] zstandard module not installed, using gzip")
+        return "gzip"
+    return ANALYSIS_COMPRESSION
+
+
+def record_run(timestamp: str, status: str, diagnosis: str = "", duration: float = None,
+               returncode: int = None, output_file: str = "", status_offset: int = None,
+               target: str = "", index_file: str = INDEX_FILE) -> dict:
+    """Append one run to the index and return the entry."""
+    entry = {
+        "timestamp": timestamp,
+        "target": target,
+        "status": status,
+        "diagnosis": diagnosis[:500],
+        "duration": round(duration, 1) if duration is not None else None,
+        "returncode": returncode,
+        "output_file": output_file,
+        "bytes": os.path.getsize(output_file) if output_file and os.path.exists(output_file) else 0,
+        "status_offset": status_offset,
+    }
+    line = (json.dumps(entry) + "\n").encode("utf-8")
+    os.makedirs(os.path.dirname(index_file) or ".", exist_ok=True)
+    # One O_APPEND write per entry; the shared lock keeps prune() from rewriting
+    # the index underneath us, and if it replaced the file while we waited, reopen
+    while True:
+        fd = os.open(index_file, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_SH)
+            if os.fstat(fd).st_ino == os.stat(index_file).st_ino:
+                os.write(fd, line)
+                return entry
+        except FileNotFoundError:
+            pass
+        finally:
+            os.close(fd)
+
+
+def _read_reversed(path: str, chunk_size: int = 65536):
+    """Yield the lines of a file newest (last) first, reading it backwards in chunks."""
+    try:
+        f = open(path, "rb")
+    except FileNotFoundError:
+        return
+    with f:
+        f.seek(0, os.SEEK_END)
+        position = f.tell()
+        remainder = b""
+        while position > 0:
+            read_size = min(chunk_size, position)
+            position -= read_size
+            f.seek(position)
+            lines = (f.read(read_size) + remainder).split(b"\n")
+            remainder = lines.pop(0)
+            for line in reversed(lines):
+                if line.strip():
+                    yield line
+        if remainder.strip():
+            yield remainder
+
+
+def iter_entries(index_file: str = INDEX_FILE, newest_first: bool = True):
+    """Yield index entries, skipping lines that don't parse (e.g. a torn final write)."""
+    if newest_first:
+        lines = _read_reversed(index_file)
+    else:
+        try:
+            with open(index_file, "rb") as f:
+                lines = f.readlines()
+        except FileNotFoundError:
+            return
+    for line in lines:
+        try:
+            yield json.loads(line)
+        except ValueError:
+            continue
+
+
+def last(status: str = None, count: int = 1, target: str = None, index_file: str = INDEX_FILE) -> list:
+    """Return the newest `count` entries, optionally only those with the given status/target."""
+    entries = []
+    for entry in iter_entries(index_file):
+        if status and entry.get("status") != status:
+            continue
+        if target and entry.get("target") != target:
+            continue
+        entries.append(entry)
+        if len(entries) >= count:
+            break
+    return entries
+
+
+def stats(days: float = 7, index_file: str = INDEX_FILE) -> dict:
+    """Summarize runs over the last `days`: counts per status, failure rate and mean duration."""
+    since = (datetime.now() - timedelta(days=days)).strftime(TIMESTAMP_FORMAT)
+    counts = {}
+    durations = []
+    # Entries are appended in time order, so stop at the first one outside the window
+    for entry in iter_entries(index_file):
+        if entry.get("timestamp", "") < since:
+            break
+        counts[entry.get("status", "UNKNOWN")] = counts.get(entry.get("status", "UNKNOWN"), 0) + 1
+        if entry.get("duration") is not None:
+            durations.append(entry["duration"])
+    runs = sum(counts.values())
+    agent_runs = runs - counts.get("UNCHANGED", 0)
+    failures = counts.get("FAILURE", 0) + counts.get("AUTH_REQUIRED", 0)
+    return {
+        "days": days,
+        "runs": runs,
+        "by_status": counts,
+        "failure_rate": round(failures / agent_runs, 3) if agent_runs else None,
+        "avg_duration": round(sum(durations) / len(durations), 1) if durations else None,
+    }
+
+
+def resolve_transcript(path: str) -> str:
+    """Return the path a transcript lives at now (it may have been compressed), or '' if gone."""
+    for candidate in (path,) + tuple(path + suffix for suffix in COMPRESSED_SUFFIXES):
+        if os.path.exists(candidate):
+            return candidate
+    return ""
+
+
+def open_transcript(path: str):
+    """Open a transcript for reading as text, decompressing if needed."""
+    path = resolve_transcript(path)
+    if not path:
+        raise FileNotFoundError(path)
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", errors="replace")
+    if path.endswith(".zst"):
+        if zstandard is None:
+            raise RuntimeError(f"zstandard module needed to read {path}")
+        import io
+        return io.TextIOWrapper(zstandard.ZstdDecompressor().stream_reader(open(path, "rb"), closefd=True),
+                                errors="replace")
+    return open(path, errors="replace")
+
+
+def compress_file(path: str, codec: str) -> str:
+    """Compress path next to itself and remove the original; returns the new path."""
+    target = f"{path}.zst" if codec == "zstd" else f"{path}.gz"
+    tmp_path = f"{target}.tmp"
+    with open(path, "rb") as src, open(tmp_path, "wb") as dst:
+        if codec == "zstd":
+            zstandard.ZstdCompressor(level=10).copy_stream(src, dst)
+        else:
+            with gzip.GzipFile(fileobj=dst, mode="wb", mtime=0) as gz:
+                while chunk := src.read(1024 * 1024):
+                    gz.write(chunk)
+    st = os.stat(path)
+    # Keep the original mtime so age-based retention still applies
+    os.utime(tmp_path, ns=(st.st_atime_ns, st.st_mtime_ns))
+    os.replace(tmp_path, target)
+    os.unlink(path)
+    return target
+
+
+def _managed_files(analysis_dir: str) -> list:
+    """Return [(path, mtime, size)] for managed files, oldest first."""
+    files = []
+    with os.scandir(analysis_dir) as entries:
+        for entry in entries:
+            if not entry.name.startswith(MANAGED_PREFIXES) or entry.name.endswith(".tmp"):
+                continue
+            try:
+                st = entry.stat(follow_symlinks=False)
+            except OSError:
+                continue
+            if entry.is_file(follow_symlinks=False):
+                files.append((entry.path, st.st_mtime, st.st_size))
+    return sorted(files, key=lambda f: f[1])
+
+
+def _compact_index(index_file: str, max_age_days: float, dry_run: bool) -> int:
+    """Drop index entries older than max_age_days; returns how many were dropped."""
+    cutoff = (datetime.now() - timedelta(days=max_age_days)).strftime(TIMESTAMP_FORMAT)
+    try:
+        fd = os.open(index_file, os.O_RDWR)
+    except FileNotFoundError:
+        return 0
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        with open(fd, "rb", closefd=False) as f:
+            lines = f.readlines()
+        keep = []
+        for line in lines:
+            try:
+                if json.loads(line).get("timestamp", cutoff) < cutoff:
+                    continue
+            except ValueError:
+                pass
+            keep.append(line)
+        dropped = len(lines) - len(keep)
+        if dropped and not dry_run:
+            tmp_path = f"{index_file}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.writelines(keep)
+            os.replace(tmp_path, index_file)
+        return dropped
+    finally:
+        os.close(fd)
+
+
+def prune(analysis_dir: str = ANALYSIS_DIR, max_age_days: float = ANALYSIS_MAX_AGE_DAYS,
+          max_mb: float = ANALYSIS_MAX_MB, compress_after_hours: float = ANALYSIS_COMPRESS_AFTER_HOURS,
+          dry_run: bool = False) -> dict:
+    """
+    Apply retention to analysis_dir.
+
+    Deletes managed files older than max_age_days, then the oldest ones until
+    the total is under max_mb, and compresses the remaining transcripts older
+    than compress_after_hours. Returns counts of what was (or, with dry_run,
+    would be) done.
+    """
+    result = {"deleted": 0, "compressed": 0, "freed_bytes": 0, "index_dropped": 0}
+    if not os.path.isdir(analysis_dir):
+        return result
+    now = time.time()
+    files = _managed_files(analysis_dir)
+    total = sum(size for _, _, size in files)
+    budget = max_mb * 1024 * 1024
+
+    kept = []
+    for path, mtime, size in files:
+        if now - mtime > max_age_days * 86400 or total > budget:
+            if not dry_run:
+                try:
+                    os.unlink(path)
+                except OSError as e:
+                    print(f"[WARN] Failed to delete {path}: {e}")
+                    kept.append((path, mtime, size))
+                    continue
+            total -= size
+            result["deleted"] += 1
+            result["freed_bytes"] += size
+        else:
+            kept.append((path, mtime, size))
+
+    codec = _codec()
+    if codec != "none":
+        for path, mtime, size in kept:
+            name = os.path.basename(path)
+            if (not name.startswith(TRANSCRIPT_PREFIX) or name.endswith(COMPRESSED_SUFFIXES)
+                    or now - mtime < compress_after_hours * 3600):
+                continue
+            if not dry_run:
+                try:
+                    compressed = compress_file(path, codec)
+                except Exception as e:
+                    print(f"[WARN] Failed to compress {path}: {e}")
+                    continue
+                result["freed_bytes"] += size - os.path.getsize(compressed)
+            result["compressed"] += 1
+
+    result["index_dropped"] = _compact_index(os.path.join(analysis_dir, "index.jsonl"),
+                                             ANALYSIS_INDEX_MAX_AGE_DAYS, dry_run)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query and prune the monitor's analysis store")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    last_cmd = sub.add_parser("last", help="Show the newest runs")
+    last_cmd.add_argument("--status", help="Only runs with this status, e.g. FAILURE")
+    last_cmd.add_argument("--target", help="Only runs of this monitor target")
+    last_cmd.add_argument("--count", "-n", type=int, default=1, help="Number of runs (default: 1)")
+
+    stats_cmd = sub.add_parser("stats", help="Run counts and failure rate")
+    stats_cmd.add_argument("--days", type=float, default=7, help="Window in days (default: 7)")
+
+    show_cmd = sub.add_parser("show", help="Print the transcript of a run")
+    show_cmd.add_argument("timestamp", help="Run timestamp (YYYYmmdd_HHMMSS), as listed by 'last'")
+
+    prune_cmd = sub.add_parser("prune", help="Apply retention and compression now")
+    prune_cmd.add_argument("--dry-run", action="store_true", help="Only report what would be done")
+    args = parser.parse_args()
+
+    if args.command == "last":
+        print(json.dumps(last(args.status, args.count, args.target), indent=2))
+    elif args.command == "stats":
+        print(json.dumps(stats(args.days), indent=2))
+    elif args.command == "show":
+        entries = [e for e in iter_entries() if e.get("timestamp") == args.timestamp and e.get("output_file")]
+        if not entries:
+            print(f"[ERROR] No run with timestamp {args.timestamp} in {INDEX_FILE}")
+            return 1
+        for entry in entries:
+            try:
+                with open_transcript(entry["output_file"]) as f:
+                    for line in f:
+                        print(line, end="")
+            except (OSError, RuntimeError) as e:
+                print(f"[ERROR] Cannot read transcript {entry['output_file']}: {e}")
+                return 1
+    elif args.command == "prune":
+        print(json.dumps(prune(dry_run=args.dry_run), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Pre-collected system context for the Copilot prompt.
+
+Gathers the basic state the agent would otherwise spend its first tool calls
+on (container states, array/disk status, memory/load, recent log errors) in
+parallel, and renders it as a compact, size-budgeted Markdown digest that
+system_monitor.py appends to the prompt.
+
+Usage:
+    from context_digest import collect_context, format_digest
+    context = collect_context()
+    digest = format_digest(context, budget=6000)
+
+Or from command line (prints the digest):
+    python3 /app/context_digest.py
+"""
+import hashlib
+import json
+import os
+import re
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from system_info import collect_snapshot
+
+# Max characters of digest appended to the prompt
+CONTEXT_BUDGET = int(os.getenv("CONTEXT_BUDGET", "6000"))
+# Per-collector timeout in seconds
+CONTEXT_TIMEOUT = float(os.getenv("CONTEXT_TIMEOUT", "20"))
+# Containers whose logs are scanned for errors (comma separated)
+CONTEXT_LOG_CONTAINERS = [c for c in os.getenv("CONTEXT_LOG_CONTAINERS", "automated-takeout").split(",") if c]
+# Host log scanned for errors through host_cmd
+CONTEXT_HOST_LOG = os.getenv("CONTEXT_HOST_LOG", "/var/log/syslog")
+LOG_TAIL_LINES = 400
+LOG_EXCERPT_LINES = 15
+
+_ERROR_PATTERN = re.compile(r"\b(error|errors|fail|failed|failure|fatal|panic|exception|critical|traceback)\b", re.I)
+# ISO ("2025-01-01 10:00:00", "2025-01-01T10:00:00.123Z") and syslog ("Jan  1 10:00:00") prefixes
+_TIMESTAMP_PATTERN = re.compile(r"^\W*(?:\d{4}-\d{2}-\d{2}[T ]|[A-Z][a-z]{2}\s+\d{1,2}\s+)?\d{2}:\d{2}:\d{2}\S*\s+")
+
+
+def _run(cmd: list, timeout: float = CONTEXT_TIMEOUT) -> str:
+    result = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout)
+    if result.returncode != 0 and not result.stdout:
+        raise RuntimeError(result.stderr.strip() or f"exit {result.returncode}")
+    # docker logs writes the container's stderr to ours
+    return result.stdout + result.stderr
+
+
+def collect_containers() -> list:
+    """Return [(name, status)] for all containers."""
+    output = _run(["docker", "ps", "-a", "--format", "{{.Names}}\t{{.Status}}"])
+    containers = []
+    for line in output.splitlines():
+        name, _, status = line.partition("\t")
+        if name:
+            containers.append((name, status))
+    return sorted(containers)
+
+
+def error_excerpt(text: str, limit: int = LOG_EXCERPT_LINES) -> list:
+    """Return the last `limit` distinct error-looking lines from a log."""
+    seen = set()
+    excerpt = []
+    for line in reversed(text.splitlines()):
+        if not _ERROR_PATTERN.search(line):
+            continue
+        # Ignore leading timestamps when deduplicating repeated messages
+        key = _TIMESTAMP_PATTERN.sub("", line.strip())
+        if key in seen:
+            continue
+        seen.add(key)
+        excerpt.append(line.strip())
+        if len(excerpt) >= limit:
+            break
+    excerpt.reverse()
+    return excerpt
+
+
+def collect_container_log(name: str) -> list:
+    return error_excerpt(_run(["docker", "logs", "--tail", str(LOG_TAIL_LINES), name]))
+
+
+def collect_host_log(path: str = CONTEXT_HOST_LOG) -> list:
+    return error_excerpt(_run(["/usr/local/bin/host_cmd", "tail", "-n", str(LOG_TAIL_LINES), path]))
+
+
+def collect_context(timeout: float = CONTEXT_TIMEOUT) -> dict:
+    """
+    Run every collector in parallel.
+
+    Returns a dict with 'collected_at', 'containers', 'system' (a
+    system_info Snapshot), 'logs' ({source: [error lines]}) and 'errors'
+    ({collector: message}) for collectors that failed or timed out.
+    """
+    jobs = {
+        "containers": (collect_containers,),
+        "system": (collect_snapshot,),
+        f"log:{CONTEXT_HOST_LOG}": (collect_host_log, CONTEXT_HOST_LOG),
+    }
+    for name in CONTEXT_LOG_CONTAINERS:
+        jobs[f"log:{name}"] = (collect_container_log, name)
+
+    context = {
+        "collected_at": datetime.now().isoformat(timespec="seconds"),
+        "containers": None,
+        "system": None,
+        "logs": {},
+        "errors": {},
+    }
+    pool = ThreadPoolExecutor(max_workers=len(jobs))
+    futures = {key: pool.submit(fn, *args) for key, (fn, *args) in jobs.items()}
+    for key, future in futures.items():
+        try:
+            result = future.result(timeout=timeout)
+        except Exception as e:
+            context["errors"][key] = str(e) or type(e).__name__
+            continue
+        if key.startswith("log:"):
+            context["logs"][key[4:]] = result
+        else:
+            context[key] = result
+    # Don't wait for a hung collector; its subprocess has its own timeout
+    pool.shutdown(wait=False)
+    return context
+
+
+def _normalize_status(status: str) -> str:
+    """Drop durations so "Up 3 days (healthy)" and "Up 5 minutes (healthy)" compare equal."""
+    if status.startswith("Up"):
+        return "Up" + "".join(f" ({s})" for s in re.findall(r"\((healthy|unhealthy|health: starting|Paused)\)", status))
+    # "Exited (1) 2 hours ago" -> "Exited (1)", "Restarting (1) 5 seconds ago" -> "Restarting (1)"
+    return re.sub(r"\s+(About\s+)?(an?|\d+)\s+\w+\s+ago$", "", status)
+
+
+def fingerprint(context: dict) -> str:
+    """
+    Hash the parts of the context that indicate a change in system health.
+
+    Container statuses (without uptimes), array state counters, disk
+    statuses and the error log excerpts (without timestamps) are included;
+    load, memory and temperatures are not, since they drift on every run.
+    """
+    normalized = {
+        "containers": [(name, _normalize_status(status)) for name, status in context.get("containers") or []],
+        "errors": sorted(context.get("errors", {})),
+    }
+    snapshot = context.get("system")
+    if snapshot is not None:
+        fields = snapshot.mdstat.fields if snapshot.mdstat else {}
+        normalized["array"] = {k: fields.get(k) for k in ("mdState", "mdNumDisabled", "mdNumInvalid", "mdNumMissing")}
+        normalized["disks"] = [(d.section, d.status) for d in snapshot.disks or []]
+    normalized["logs"] = {
+        source: hashlib.sha256("\n".join(_TIMESTAMP_PATTERN.sub("", line) for line in excerpt).encode()).hexdigest()
+        for source, excerpt in sorted(context.get("logs", {}).items())
+    }
+    return hashlib.sha256(json.dumps(normalized, sort_keys=True).encode()).hexdigest()
+
+
+def _clip(text: str, limit: int) -> str:
+    if len(text) <= limit:
+        return text
+    return text[:max(0, limit - 20)].rstrip() + "\n... (truncated)\n"
+
+
+def format_digest(context: dict, budget: int = CONTEXT_BUDGET) -> str:
+    """Render collected context as Markdown, trimmed to roughly `budget` characters."""
+    header = (
+        f"## Pre-collected System Context ({context['collected_at']})\n"
+        "Collected just before this run. Use it instead of re-running the same commands; "
+        "only re-check what you need to investigate further.\n"
+    )
+    sections = []
+
+    containers = context.get("containers")
+    if containers is not None:
+        problems = [(n, s) for n, s in containers if not s.startswith("Up") or "unhealthy" in s or "Restarting" in s]
+        lines = [f"### Containers ({len(containers)} total, {len(problems)} not healthy/running)"]
+        lines += [f"- {name}: {status}" for name, status in problems]
+        running = [name for name, status in containers if (name, status) not in problems]
+        if running:
+            lines.append(f"- Up: {', '.join(running)}")
+        sections.append("\n".join(lines) + "\n")
+
+    snapshot = context.get("system")
+    if snapshot is not None:
+        lines = ["### Host"]
+        if snapshot.mdstat:
+            fields = snapshot.mdstat.fields
+            keys = ["mdState", "mdNumDisabled", "mdNumInvalid", "mdNumMissing", "mdResync", "mdResyncPos", "mdResyncSize"]
+            lines.append("- Array: " + ", ".join(f"{k}={fields[k]}" for k in keys if k in fields))
+        if snapshot.loadavg:
+            load = snapshot.loadavg
+            lines.append(f"- Load: {load.load1:.2f} / {load.load5:.2f} / {load.load15:.2f} (cpus: {os.cpu_count()})")
+        if snapshot.meminfo and snapshot.meminfo.total:
+            mem = snapshot.meminfo.values
+            used_pct = 100.0 * (1 - mem.get("MemAvailable", 0) / mem["MemTotal"])
+            lines.append(f"- Memory: {used_pct:.0f}% used of {mem['MemTotal'] // 1024} MB")
+        if snapshot.disks is not None:
+            problems = [d for d in snapshot.disks if d.status not in ("DISK_OK", "DISK_NP", "DISK_NP_DSBL")]
+            lines.append(f"- Disks: {len(snapshot.disks)} listed, {len(problems)} not DISK_OK")
+            lines += [f"  - {d.section} ({d.name}): {d.status}, {d.temp}°C" for d in problems]
+        for source, message in snapshot.errors.items():
+            lines.append(f"- {source}: {message}")
+        sections.append("\n".join(lines) + "\n")
+
+    for source, excerpt in context.get("logs", {}).items():
+        if excerpt:
+            sections.append(f"### Recent errors: {source}\n```\n" + "\n".join(excerpt) + "\n```\n")
+
+    if context.get("errors"):
+        sections.append("### Collection failures\n" + "".join(
+            f"- {key}: {message}\n" for key, message in context["errors"].items()))
+
+    # Give each section an equal share of what's left, passing unused space on
+    remaining = budget - len(header)
+    rendered = []
+    for i, section in enumerate(sections):
+        share = remaining // (len(sections) - i)
+        clipped = _clip(section, share)
+        rendered.append(clipped)
+        remaining -= len(clipped)
+    return header + "\n".join(rendered)
+
+
+if __name__ == "__main__":
+    print(format_digest(collect_context()))
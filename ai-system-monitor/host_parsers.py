@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Streaming parsers for host /proc and Unraid emhttp files.
+
+Both parsers read line by line instead of loading the whole file, look keys up
+in a set/dict (O(1) per line) and, where possible, stop reading as soon as
+everything the caller asked for has been found.
+
+Usage:
+    from host_parsers import read_meminfo, iter_ini_sections
+    values, lines = read_meminfo("/host/proc/meminfo", ["MemTotal", "MemAvailable"])
+    for section, fields in iter_ini_sections("/host/emhttp/disks.ini"):
+        ...
+"""
+
+
+def read_meminfo(path: str, keys) -> tuple:
+    """
+    Read selected keys from a /proc/meminfo style file.
+
+    Returns (values, lines): values maps each requested key to its value in kB
+    (None if the key was not present) and lines holds the matching original
+    lines in file order. Reading stops once every requested key was seen.
+    """
+    values = dict.fromkeys(keys)
+    lines = []
+    remaining = len(values)
+    if not remaining:
+        return values, lines
+
+    with open(path, 'r') as f:
+        for line in f:
+            key, sep, rest = line.partition(':')
+            if not sep or key not in values or values[key] is not None:
+                continue
+            values[key] = int(rest.split()[0])
+            lines.append(line.rstrip('\n'))
+            remaining -= 1
+            if not remaining:
+                break
+    return values, lines
+
+
+def iter_ini_sections(path: str):
+    """
+    Stream an emhttp .ini file (e.g. disks.ini) section by section.
+
+    Yields (section_name, fields) with quotes stripped from values. Each
+    section is yielded as soon as the next header is reached, so at most one
+    section's fields are held at a time.
+    """
+    section = None
+    fields = {}
+    with open(path, 'r') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            if line[0] == '[' and line[-1] == ']':
+                if section is not None:
+                    yield section, fields
+                section = line[1:-1]
+                fields = {}
+            elif section is not None:
+                key, sep, value = line.partition('=')
+                if sep:
+                    fields[key.strip()] = value.strip().strip('"')
+    if section is not None:
+        yield section, fields
@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+"""
+Metric history for the system monitor.
+
+Samples load, memory, array resync progress and per-disk temperatures at a
+fixed interval and stores them in a fixed-size, memory-mapped ring buffer on
+/state, so the monitor can reason about trends without re-sampling.
+
+Usage:
+    python3 /app/metric_history.py sample [--interval 60] [--count N]
+    python3 /app/metric_history.py query <metric> [--window 3600]
+    python3 /app/metric_history.py list
+
+Metrics:
+    load1, load5, load15       Load averages
+    mem_available_pct          MemAvailable / MemTotal
+    swap_used_pct              Swap in use
+    resync_pct                 Parity check/resync progress (0 when idle)
+    temp.<disk>                Disk temperature in °C (spun-down disks are skipped)
+"""
+import argparse
+import json
+import mmap
+import os
+import struct
+import sys
+import time
+
+from system_info import collect_snapshot
+
+METRICS_RING = os.getenv("METRICS_RING", "/state/metrics.ring")
+# 20 bytes per record: ~4 MB holds about 3.5 days of 40 metrics sampled every 60s
+RING_CAPACITY = int(os.getenv("METRICS_RING_CAPACITY", "200000"))
+SAMPLE_INTERVAL = float(os.getenv("METRICS_INTERVAL", "60"))
+
+_MAGIC = b"SIMR"
+_VERSION = 1
+# magic, version, capacity, head (total records ever written), name count
+_HEADER = struct.Struct("<4sIIQI")
+_NAME_SLOTS = 128
+_NAME_SIZE = 48
+# timestamp, metric index, value
+_RECORD = struct.Struct("<dId")
+_DATA_OFFSET = 64 + _NAME_SLOTS * _NAME_SIZE
+
+
+class MetricRing:
+    """
+    Memory-mapped ring buffer of (timestamp, metric, value) records.
+
+    The file size is fixed at creation, appends are O(1) and overwrite the
+    oldest record once the buffer is full. Metric names are interned into a
+    fixed table in the header.
+
+    Only the sampler creates the file; with create=False (readers) it is
+    opened read-only and a missing file raises FileNotFoundError.
+    """
+
+    def __init__(self, path: str = METRICS_RING, capacity: int = RING_CAPACITY, create: bool = True):
+        self.path = path
+        if not create:
+            self._open_readonly(path)
+            return
+        size = _DATA_OFFSET + capacity * _RECORD.size
+        exists = os.path.exists(path)
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if not exists or os.fstat(fd).st_size < _HEADER.size:
+                os.ftruncate(fd, size)
+                self._mm = mmap.mmap(fd, size)
+                _HEADER.pack_into(self._mm, 0, _MAGIC, _VERSION, capacity, 0, 0)
+            else:
+                self._mm = mmap.mmap(fd, os.fstat(fd).st_size)
+        finally:
+            os.close(fd)
+
+        self._check_header()
+
+    def _open_readonly(self, path: str):
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            size = os.fstat(fd).st_size
+            if size < _DATA_OFFSET:
+                raise ValueError(f"{path} is incomplete (is the sampler still creating it?)")
+            self._mm = mmap.mmap(fd, size, access=mmap.ACCESS_READ)
+        finally:
+            os.close(fd)
+        self._check_header()
+
+    def _check_header(self):
+        magic, version, self.capacity, _, _ = _HEADER.unpack_from(self._mm, 0)
+        if magic != _MAGIC or version != _VERSION:
+            self._mm.close()
+            raise ValueError(f"{self.path} is not a metric ring file")
+        self._names = self._read_names()
+
+    def close(self):
+        self._mm.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @property
+    def head(self) -> int:
+        return _HEADER.unpack_from(self._mm, 0)[3]
+
+    def _read_names(self) -> dict:
+        count = _HEADER.unpack_from(self._mm, 0)[4]
+        names = {}
+        for i in range(count):
+            offset = 64 + i * _NAME_SIZE
+            raw = self._mm[offset:offset + _NAME_SIZE]
+            names[raw.rstrip(b"\0").decode("utf-8")] = i
+        return names
+
+    def metric_id(self, name: str, create: bool = True):
+        """Return the index for a metric name, interning it if needed."""
+        if name in self._names:
+            return self._names[name]
+        if not create:
+            return None
+        # Another process may have added names since we loaded the table
+        self._names = self._read_names()
+        if name in self._names:
+            return self._names[name]
+        index = len(self._names)
+        if index >= _NAME_SLOTS:
+            return None
+        encoded = name.encode("utf-8")[:_NAME_SIZE]
+        offset = 64 + index * _NAME_SIZE
+        self._mm[offset:offset + _NAME_SIZE] = encoded.ljust(_NAME_SIZE, b"\0")
+        magic, version, capacity, head, _ = _HEADER.unpack_from(self._mm, 0)
+        _HEADER.pack_into(self._mm, 0, magic, version, capacity, head, index + 1)
+        self._names[name] = index
+        return index
+
+    def append(self, name: str, value: float, timestamp: float = None) -> bool:
+        """Append one sample; returns False if the name table is full."""
+        index = self.metric_id(name)
+        if index is None:
+            return False
+        magic, version, capacity, head, count = _HEADER.unpack_from(self._mm, 0)
+        _RECORD.pack_into(self._mm, _DATA_OFFSET + (head % capacity) * _RECORD.size,
+                          time.time() if timestamp is None else timestamp, index, float(value))
+        # Publish the record only after it is fully written
+        _HEADER.pack_into(self._mm, 0, magic, version, capacity, head + 1, count)
+        return True
+
+    def names(self) -> list:
+        self._names = self._read_names()
+        return sorted(self._names)
+
+    def iter_recent(self, since: float):
+        """Yield (timestamp, metric index, value) newest first, back to since."""
+        head = self.head
+        for seq in range(head - 1, max(head - self.capacity, 0) - 1, -1):
+            record = _RECORD.unpack_from(self._mm, _DATA_OFFSET + (seq % self.capacity) * _RECORD.size)
+            if record[0] < since:
+                return
+            yield record
+
+    def query(self, name: str, window: float, now: float = None) -> dict:
+        """Return count/min/max/avg/rate (per hour) for a metric over the last window seconds."""
+        now = time.time() if now is None else now
+        index = self.metric_id(name, create=False)
+        stats = {"metric": name, "window": window, "count": 0,
+                 "min": None, "max": None, "avg": None, "last": None, "rate_per_hour": None}
+        if index is None:
+            return stats
+
+        total = 0.0
+        first = last = None
+        for timestamp, metric, value in self.iter_recent(now - window):
+            if metric != index:
+                continue
+            if last is None:
+                last = (timestamp, value)
+                stats["min"] = stats["max"] = value
+            stats["min"] = min(stats["min"], value)
+            stats["max"] = max(stats["max"], value)
+            total += value
+            stats["count"] += 1
+            first = (timestamp, value)
+
+        if stats["count"]:
+            stats["avg"] = total / stats["count"]
+            stats["last"] = last[1]
+            if last[0] > first[0]:
+                stats["rate_per_hour"] = (last[1] - first[1]) / (last[0] - first[0]) * 3600
+        return stats
+
+
+def sample_metrics() -> dict:
+    """Read one set of metric values from a fresh host snapshot."""
+    snapshot = collect_snapshot(refresh=True)
+    values = {}
+
+    if snapshot.loadavg:
+        values["load1"] = snapshot.loadavg.load1
+        values["load5"] = snapshot.loadavg.load5
+        values["load15"] = snapshot.loadavg.load15
+
+    if snapshot.meminfo and snapshot.meminfo.total:
+        mem = snapshot.meminfo.values
+        values["mem_available_pct"] = 100.0 * mem.get("MemAvailable", 0) / mem["MemTotal"]
+        if mem.get("SwapTotal"):
+            values["swap_used_pct"] = 100.0 * (mem["SwapTotal"] - mem.get("SwapFree", 0)) / mem["SwapTotal"]
+
+    if snapshot.mdstat:
+        fields = snapshot.mdstat.fields
+        try:
+            resync_size = int(fields.get("mdResyncSize", "0") or 0)
+            resync_pos = int(fields.get("mdResyncPos", "0") or 0)
+            active = fields.get("mdResync", "0") not in ("", "0")
+            values["resync_pct"] = 100.0 * resync_pos / resync_size if active and resync_size else 0.0
+        except ValueError:
+            pass
+
+    for disk in snapshot.disks or []:
+        try:
+            values[f"temp.{disk.name}"] = float(disk.temp)
+        except ValueError:
+            # '*' means the disk is spun down
+            continue
+
+    return values
+
+
+def run_sampler(ring: MetricRing, interval: float, count: int = 0):
+    """Sample every interval seconds until interrupted (or count samples were taken)."""
+    taken = 0
+    next_at = time.monotonic()
+    while True:
+        timestamp = time.time()
+        values = sample_metrics()
+        for name, value in values.items():
+            if not ring.append(name, value, timestamp):
+                print(f"[WARN] Metric table full, dropping {name}")
+        taken += 1
+        if count and taken >= count:
+            return
+        next_at += interval
+        time.sleep(max(0.0, next_at - time.monotonic()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sample and query host metric history")
+    parser.add_argument("--ring", default=METRICS_RING, help=f"Ring buffer file (default: {METRICS_RING})")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    sample = sub.add_parser("sample", help="Record samples at a fixed interval")
+    sample.add_argument("--interval", type=float, default=SAMPLE_INTERVAL, help="Seconds between samples")
+    sample.add_argument("--count", type=int, default=0, help="Stop after N samples (default: run forever)")
+
+    query = sub.add_parser("query", help="Summarize a metric over a time window")
+    query.add_argument("metrics", nargs="+", help="Metric name(s), e.g. load1 temp.disk1")
+    query.add_argument("--window", type=float, default=3600, help="Window in seconds (default: 3600)")
+
+    sub.add_parser("list", help="List recorded metric names")
+    args = parser.parse_args()
+
+    try:
+        # query and list only read; never create an empty ring in the sampler's place
+        ring = MetricRing(args.ring, create=args.command == "sample")
+    except FileNotFoundError:
+        print(f"[ERROR] No metric history at {args.ring}; the sampler (metric_history.py sample) has not run yet")
+        return 1
+    except (OSError, ValueError) as e:
+        print(f"[ERROR] Cannot open metric ring {args.ring}: {e}")
+        return 1
+
+    with ring:
+        if args.command == "sample":
+            try:
+                run_sampler(ring, args.interval, args.count)
+            except KeyboardInterrupt:
+                pass
+        elif args.command == "query":
+            print(json.dumps([ring.query(name, args.window) for name in args.metrics], indent=2))
+        elif args.command == "list":
+            print("\n".join(ring.names()))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Host-side notify agent and its client.
+
+The agent runs on the Unraid host and listens on a Unix socket whose
+directory is bind-mounted into the monitor container. Each request is one
+JSON object per line:
+
+    {"event": "...", "subject": "...", "description": "...",
+     "importance": "normal|warning|alert", "message": "...", "link": "..."}
+
+and is answered with {"ok": true} or {"ok": false, "error": "..."}. The agent
+runs the Unraid notify script with an argv list (no shell, no quoting), so a
+notification from the container costs one socket write instead of an
+nsenter + bash per alert.
+
+Usage:
+    python3 notify_agent.py serve [--socket PATH]          # On the host
+    python3 notify_agent.py serve --stand-in [--socket PATH]  # Local stand-in: log requests, don't notify
+    python3 notify_agent.py send -e event -s subject -d description [-i importance] [-m message] [-l link]
+
+From Python (inside the container):
+    from notify_agent import try_send
+    sent = try_send({"event": "vscode-monitor", "subject": "Subject", "description": "Description"})
+    # None: no agent running, use the nsenter fallback
+"""
+import argparse
+import grp
+import json
+import os
+import signal
+import socket
+import socketserver
+import subprocess
+import sys
+from datetime import datetime
+
+# A directory, not the socket file, is bind-mounted so agent restarts don't break the mount
+NOTIFY_SOCKET = os.getenv("NOTIFY_SOCKET", "/var/run/notify-agent/notify.sock")
+UNRAID_NOTIFY = os.getenv("UNRAID_NOTIFY", "/usr/local/emhttp/plugins/dynamix/scripts/notify")
+# Group allowed to connect (besides root); empty keeps the socket root-only
+NOTIFY_SOCKET_GROUP = os.getenv("NOTIFY_SOCKET_GROUP", "")
+
+IMPORTANCE_LEVELS = ("normal", "warning", "alert")
+FIELDS = {"event": "-e", "subject": "-s", "description": "-d", "importance": "-i", "message": "-m", "link": "-l"}
+MAX_FIELD = 8192
+MAX_REQUEST = 64 * 1024
+
+
+def build_argv(request: dict, notify: str = UNRAID_NOTIFY) -> list:
+    """Validate a request and return the notify argv; raises ValueError on bad input."""
+    if not isinstance(request, dict):
+        raise ValueError("request must be a JSON object")
+    unknown = set(request) - set(FIELDS)
+    if unknown:
+        raise ValueError(f"unknown fields: {', '.join(sorted(unknown))}")
+    for field in ("event", "subject", "description"):
+        if not request.get(field):
+            raise ValueError(f"missing field: {field}")
+    request.setdefault("importance", "normal")
+    if request["importance"] not in IMPORTANCE_LEVELS:
+        raise ValueError(f"importance must be one of {', '.join(IMPORTANCE_LEVELS)}")
+
+    argv = [notify]
+    for field, flag in FIELDS.items():
+        value = request.get(field)
+        if value in (None, ""):
+            continue
+        if not isinstance(value, str):
+            raise ValueError(f"{field} must be a string")
+        argv += [flag, value[:MAX_FIELD]]
+    return argv
+
+
+class NotifyHandler(socketserver.StreamRequestHandler):
+    """Handles newline-delimited JSON requests on one connection."""
+
+    def handle(self):
+        while True:
+            line = self.rfile.readline(MAX_REQUEST + 1)
+            if not line:
+                return
+            if len(line) > MAX_REQUEST:
+                self.reply({"ok": False, "error": "request too large"})
+                return
+            if not line.strip():
+                continue
+            try:
+                argv = build_argv(json.loads(line), self.server.notify)
+            except ValueError as e:
+                self.reply({"ok": False, "error": str(e)})
+                continue
+            self.reply(self.server.deliver(argv))
+
+    def reply(self, response: dict):
+        self.wfile.write((json.dumps(response) + "\n").encode("utf-8"))
+        self.wfile.flush()
+
+
+class NotifyServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path: str, notify: str = UNRAID_NOTIFY, stand_in: bool = False):
+        self.notify = notify
+        self.stand_in = stand_in
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        if os.path.exists(path):
+            # Refuse to take over a socket another agent is still serving
+            probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                probe.connect(path)
+                raise RuntimeError(f"another notify agent is listening on {path}")
+            except (ConnectionRefusedError, FileNotFoundError):
+                os.unlink(path)
+            finally:
+                probe.close()
+        super().__init__(path, NotifyHandler)
+        mode = 0o600
+        if NOTIFY_SOCKET_GROUP:
+            os.chown(path, -1, grp.getgrnam(NOTIFY_SOCKET_GROUP).gr_gid)
+            mode = 0o660
+        os.chmod(path, mode)
+
+    def deliver(self, argv: list) -> dict:
+        subject = argv[argv.index("-s") + 1]
+        if self.stand_in:
+            print(f"[{datetime.now()}] [STAND-IN] {json.dumps(argv[1:])}", flush=True)
+            return {"ok": True}
+        try:
+            result = subprocess.run(argv, capture_output=True, text=True, timeout=30)
+        except Exception as e:
+            print(f"[{datetime.now()}] [ERROR] notify failed for {subject!r}: {e}", flush=True)
+            return {"ok": False, "error": str(e)}
+        if result.returncode != 0:
+            error = result.stderr.strip() or f"exit {result.returncode}"
+            print(f"[{datetime.now()}] [ERROR] notify failed for {subject!r}: {error}", flush=True)
+            return {"ok": False, "error": error}
+        print(f"[{datetime.now()}] [INFO] Sent: {argv[argv.index('-i') + 1].upper()} - {subject}", flush=True)
+        return {"ok": True}
+
+    def server_close(self):
+        super().server_close()
+        try:
+            os.unlink(self.server_address)
+        except OSError:
+            pass
+
+
+def send(request: dict, socket_path: str = NOTIFY_SOCKET, timeout: float = 35) -> dict:
+    """
+    Send one notification request to the agent and return its response.
+
+    Raises OSError if the agent can't be reached, so callers can fall back
+    to another delivery path.
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(socket_path)
+        sock.sendall((json.dumps(request) + "\n").encode("utf-8"))
+        with sock.makefile("rb") as f:
+            line = f.readline()
+    if not line:
+        raise ConnectionError("notify agent closed the connection")
+    return json.loads(line)
+
+
+def try_send(request: dict, socket_path: str = NOTIFY_SOCKET):
+    """
+    Deliver through the agent if it is running.
+
+    Returns True/False for sent/failed, or None when there is no reachable
+    agent and the caller should use its fallback path.
+    """
+    if not os.path.exists(socket_path):
+        return None
+    try:
+        response = send({k: v for k, v in request.items() if v not in (None, "")}, socket_path)
+    except (OSError, ValueError) as e:
+        print(f"[WARN] Notify agent unreachable ({e}); using fallback")
+        return None
+    if not response.get("ok"):
+        print(f"[WARN] Notify agent failed: {response.get('error')}")
+        return False
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Host-side Unraid notify agent")
+    parser.add_argument("--socket", default=NOTIFY_SOCKET, help=f"Socket path (default: {NOTIFY_SOCKET})")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    serve = sub.add_parser("serve", help="Listen for notification requests")
+    serve.add_argument("--stand-in", action="store_true",
+                       help="Log requests instead of running notify (for testing off the host)")
+    serve.add_argument("--notify", default=UNRAID_NOTIFY, help="Notify script to run")
+
+    client = sub.add_parser("send", help="Send one notification through the agent")
+    client.add_argument("-e", "--event", required=True, help="Event category")
+    client.add_argument("-s", "--subject", required=True, help="Subject line")
+    client.add_argument("-d", "--description", required=True, help="Description")
+    client.add_argument("-i", "--importance", default="normal", choices=IMPORTANCE_LEVELS, help="Importance level")
+    client.add_argument("-m", "--message", default="", help="Optional message body")
+    client.add_argument("-l", "--link", default="", help="Optional link URL")
+    args = parser.parse_args()
+
+    if args.command == "send":
+        request = {field: getattr(args, field) for field in FIELDS}
+        try:
+            response = send(request, args.socket)
+        except (OSError, ValueError) as e:
+            print(f"[ERROR] Notify agent unavailable at {args.socket}: {e}")
+            return 1
+        if not response.get("ok"):
+            print(f"[ERROR] {response.get('error')}")
+            return 1
+        return 0
+
+    try:
+        server = NotifyServer(args.socket, args.notify, args.stand_in)
+    except (OSError, RuntimeError) as e:
+        print(f"[ERROR] Cannot listen on {args.socket}: {e}")
+        return 1
+    # Treat SIGTERM like Ctrl-C so the socket is removed on the way out
+    def _interrupt(signum, frame):
+        raise KeyboardInterrupt
+    signal.signal(signal.SIGTERM, _interrupt)
+
+    mode = "stand-in" if args.stand_in else args.notify
+    print(f"[{datetime.now()}] [INFO] Notify agent listening on {args.socket} ({mode})", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
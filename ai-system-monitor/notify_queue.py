@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Deduplicating, rate-limited queue in front of the Unraid notify wrappers.
+
+alert_helper.py and system_monitor.py run as separate, short-lived processes,
+so the queue state lives in a small JSON file on /state guarded by flock:
+
+- Coalescing: an alert with the same (event, subject) as one sent within
+  NOTIFY_DEDUP_WINDOW seconds is not re-sent, only counted. The count is
+  reported with the next alert for that key once the window has passed.
+- Rate limit: sends take a token from a bucket holding up to NOTIFY_BURST
+  tokens and refilling at NOTIFY_RATE_PER_HOUR. Alerts that find the bucket
+  empty stay pending (importance "alert" is never held back).
+- Batching: everything pending when a token is available goes out as one
+  notify invocation.
+
+Usage:
+    from notify_queue import NotificationQueue
+    queue = NotificationQueue(sender)       # sender(event, subject, description, importance, message, link) -> bool
+    queue.submit("vscode-monitor", "Subject", "Description", "warning")
+    queue.flush()                           # Send anything held back by the rate limit
+
+Or from command line:
+    python3 /app/notify_queue.py status
+"""
+import fcntl
+import json
+import os
+import sys
+import threading
+import time
+
+NOTIFY_STATE = os.getenv("NOTIFY_STATE", "/state/notify_state.json")
+# Same (event, subject) within this many seconds is counted, not re-sent
+NOTIFY_DEDUP_WINDOW = float(os.getenv("NOTIFY_DEDUP_WINDOW", "1800"))
+# Token bucket: sustained notify invocations per hour, and burst size
+NOTIFY_RATE_PER_HOUR = float(os.getenv("NOTIFY_RATE_PER_HOUR", "6"))
+NOTIFY_BURST = float(os.getenv("NOTIFY_BURST", "3"))
+# Cap on held-back alerts; the oldest are dropped (and counted) beyond this
+MAX_PENDING = 50
+
+IMPORTANCE_ORDER = {"normal": 0, "warning": 1, "alert": 2}
+
+_thread_lock = threading.Lock()
+
+
+def _key(event: str, subject: str) -> str:
+    return f"{event}\x1f{subject}"
+
+
+class NotificationQueue:
+    """
+    Coalescing, rate-limited front end for a notification sender.
+
+    sender(event, subject, description, importance, message, link) does the
+    actual notify call and returns True on success. Every public method
+    loads the shared state, updates it and writes it back under an
+    exclusive flock, so concurrent processes and threads see one queue.
+    """
+
+    def __init__(self, sender, state_file: str = NOTIFY_STATE, window: float = NOTIFY_DEDUP_WINDOW,
+                 rate_per_hour: float = NOTIFY_RATE_PER_HOUR, burst: float = NOTIFY_BURST):
+        self.sender = sender
+        self.state_file = state_file
+        self.window = window
+        self.rate = rate_per_hour / 3600.0
+        self.burst = burst
+
+    def _locked(self, update):
+        """Run update(state, now) -> result with the state file locked; saves the state afterwards."""
+        with _thread_lock:
+            os.makedirs(os.path.dirname(self.state_file) or ".", exist_ok=True)
+            fd = os.open(self.state_file, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+                with open(fd, "r+", closefd=False) as f:
+                    try:
+                        state = json.load(f)
+                    except ValueError:
+                        state = {}
+                    state.setdefault("tokens", self.burst)
+                    state.setdefault("updated", time.time())
+                    state.setdefault("recent", {})
+                    state.setdefault("pending", [])
+                    state.setdefault("dropped", 0)
+                    result = update(state, time.time())
+                    f.seek(0)
+                    f.truncate()
+                    json.dump(state, f, indent=1)
+                return result
+            finally:
+                os.close(fd)
+
+    def _refill(self, state: dict, now: float):
+        elapsed = max(0.0, now - state["updated"])
+        state["tokens"] = min(self.burst, state["tokens"] + elapsed * self.rate)
+        state["updated"] = now
+
+    def _expire(self, state: dict, now: float):
+        # Forget keys whose window passed; repeat counts are kept a day for the next send
+        state["recent"] = {key: r for key, r in state["recent"].items()
+                           if now - r["sent"] < self.window or (r.get("suppressed") and now - r["last"] < 86400)}
+
+    def submit(self, event: str, subject: str, description: str, importance: str = "normal",
+               message: str = "", link: str = "") -> str:
+        """
+        Queue one notification and send what the rate limit allows.
+
+        Returns "sent", "coalesced" (a duplicate within the window, counted
+        only), "queued" (held back by the rate limit) or "failed".
+        """
+        def update(state, now):
+            key = _key(event, subject)
+            recent = state["recent"].get(key)
+            if recent and now - recent["sent"] < self.window:
+                recent["suppressed"] = recent.get("suppressed", 0) + 1
+                recent["last"] = now
+                return "coalesced"
+
+            for pending in state["pending"]:
+                if _key(pending["event"], pending["subject"]) == key:
+                    # Newest content wins; keep how often it was raised
+                    pending.update(description=description, message=message, link=link,
+                                   importance=max(pending["importance"], importance,
+                                                  key=lambda i: IMPORTANCE_ORDER.get(i, 0)),
+                                   count=pending.get("count", 1) + 1, last=now)
+                    break
+            else:
+                state["pending"].append({"event": event, "subject": subject, "description": description,
+                                         "importance": importance, "message": message, "link": link,
+                                         "count": 1, "first": now, "last": now})
+                if len(state["pending"]) > MAX_PENDING:
+                    state["pending"].pop(0)
+                    state["dropped"] += 1
+            return self._flush(state, now)
+
+        try:
+            return self._locked(update)
+        except OSError as e:
+            # No usable state file; fall back to sending directly
+            print(f"[WARN] Notification queue unavailable ({e}); sending directly")
+            return "sent" if self.sender(event, subject, description, importance, message, link) else "failed"
+
+    def flush(self) -> str:
+        """Send pending notifications if the rate limit allows; returns the outcome."""
+        return self._locked(self._flush)
+
+    def _flush(self, state: dict, now: float) -> str:
+        self._refill(state, now)
+        self._expire(state, now)
+        pending = state["pending"]
+        if not pending:
+            return "sent"
+        urgent = any(p["importance"] == "alert" for p in pending)
+        if state["tokens"] < 1 and not urgent:
+            return "queued"
+
+        notification = self._batch(pending, state)
+        if not self.sender(**notification):
+            return "failed"
+
+        state["tokens"] = max(0.0, state["tokens"] - 1)
+        for p in pending:
+            state["recent"][_key(p["event"], p["subject"])] = {"sent": now, "last": p["last"], "suppressed": 0}
+        state["pending"] = []
+        state["dropped"] = 0
+        return "sent"
+
+    def _batch(self, pending: list, state: dict) -> dict:
+        """Combine pending notifications into the arguments of one sender call."""
+        def repeats(p):
+            # Raised again while pending, or coalesced since it was last sent
+            count = p.get("count", 1) - 1 + state["recent"].get(_key(p["event"], p["subject"]), {}).get("suppressed", 0)
+            return f" (x{count + 1})" if count else ""
+
+        if len(pending) == 1 and not state["dropped"]:
+            p = pending[0]
+            return {"event": p["event"], "subject": p["subject"], "description": p["description"] + repeats(p),
+                    "importance": p["importance"], "message": p["message"], "link": p["link"]}
+
+        top = max(pending, key=lambda p: IMPORTANCE_ORDER.get(p["importance"], 0))
+        subjects = "; ".join(p["subject"] + repeats(p) for p in pending)
+        sections = [f"[{p['importance'].upper()}] {p['subject']}{repeats(p)}: {p['description']}"
+                    + (f"\n{p['message']}" if p["message"] else "") for p in pending]
+        if state["dropped"]:
+            sections.append(f"{state['dropped']} older notifications were dropped")
+        links = {p["link"] for p in pending if p["link"]}
+        return {
+            "event": top["event"],
+            "subject": f"{len(pending)} notifications: {top['subject']}",
+            "description": subjects[:200],
+            "importance": top["importance"],
+            "message": "\n\n".join(sections),
+            "link": links.pop() if len(links) == 1 else top["link"],
+        }
+
+    def status(self) -> dict:
+        def update(state, now):
+            self._refill(state, now)
+            self._expire(state, now)
+            return {
+                "tokens": round(state["tokens"], 2),
+                "pending": [p["subject"] for p in state["pending"]],
+                "suppressed": {key.replace("\x1f", ": "): r["suppressed"]
+                               for key, r in state["recent"].items() if r.get("suppressed")},
+            }
+        return self._locked(update)
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] != ["status"]:
+        print(__doc__.split("Or from command line:")[1].strip())
+        sys.exit(1)
+    print(json.dumps(NotificationQueue(sender=None).status(), indent=2))
@@ -78,11 +78,18 @@ case "${1:-run}" in
         build_image
         run_monitor
         ;;
+    profile)
+        # Startup cost breakdown, including docker-compose's own overhead
+        mkdir -p "$STATE_DIR/analysis"
+        cd "$SCRIPT_DIR"
+        time docker-compose run --rm copilot-system-monitor python3 /app/system_monitor.py --profile
+        ;;
     *)
-        echo "Usage: $0 [build|run|rebuild]"
+        echo "Usage: $0 [build|run|rebuild|profile]"
         echo "  build   - Build the Docker image only"
         echo "  run     - Run the monitor (builds if needed)"
         echo "  rebuild - Force rebuild and run"
+        echo "  profile - Time the monitor's startup path without running the agent"
         exit 1
         ;;
 esac
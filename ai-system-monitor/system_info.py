@@ -12,95 +12,267 @@ Commands:
     meminfo     - Show memory info from /host/proc/meminfo
     disks       - Show disk status from /host/emhttp/disks.ini
     all         - Show all system info
+    json        - Print a structured snapshot of all of the above as JSON
+
+Programmatic use:
+    from system_info import collect_snapshot
+    snapshot = collect_snapshot()
+    snapshot.loadavg.load1, snapshot.meminfo.available, snapshot.disks[0].status
 """
 import sys
 import os
+import json
+import time
+from dataclasses import dataclass, field, asdict
+from typing import Optional
+
+from host_parsers import read_meminfo, iter_ini_sections
 
 HOST_PROC = "/host/proc"
 HOST_EMHTTP = "/host/emhttp"
 
+# Snapshots are memoized in-process and on disk so repeated invocations within
+# one monitoring run read each host file once
+SNAPSHOT_TTL = float(os.getenv("SYSTEM_INFO_TTL", "10"))
+SNAPSHOT_CACHE = os.getenv("SYSTEM_INFO_CACHE", "/tmp/system_info_snapshot.json")
 
-def read_file(path):
-    """Read file contents, return None if not found."""
-    try:
-        with open(path, 'r') as f:
-            return f.read()
-    except FileNotFoundError:
+MEMINFO_KEYS = ['MemTotal', 'MemFree', 'MemAvailable', 'SwapTotal', 'SwapFree', 'Cached', 'Buffers']
+
+
+@dataclass
+class MdstatInfo:
+    """Array status; fields holds key=value lines (Unraid's md driver format)."""
+    raw: str = ""
+    fields: dict = field(default_factory=dict)
+
+
+@dataclass
+class LoadAvg:
+    load1: float = 0.0
+    load5: float = 0.0
+    load15: float = 0.0
+    running: int = 0
+    total: int = 0
+
+
+@dataclass
+class MemInfo:
+    """Selected /proc/meminfo values in kB; lines holds the matching original lines in file order."""
+    values: dict = field(default_factory=dict)
+    lines: list = field(default_factory=list)
+
+    @property
+    def total(self) -> int:
+        return self.values.get('MemTotal', 0)
+
+    @property
+    def available(self) -> int:
+        return self.values.get('MemAvailable', 0)
+
+
+@dataclass
+class DiskInfo:
+    section: str
+    name: str = ""
+    status: str = "unknown"
+    temp: str = "*"
+    size: int = 0
+    fields: dict = field(default_factory=dict)
+
+
+@dataclass
+class Snapshot:
+    timestamp: float = 0.0
+    mdstat: Optional[MdstatInfo] = None
+    loadavg: Optional[LoadAvg] = None
+    meminfo: Optional[MemInfo] = None
+    disks: Optional[list] = None
+    # Source name -> read/parse error message for sources that failed
+    errors: dict = field(default_factory=dict)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Snapshot":
+        return cls(
+            timestamp=data.get('timestamp', 0.0),
+            mdstat=MdstatInfo(**data['mdstat']) if data.get('mdstat') else None,
+            loadavg=LoadAvg(**data['loadavg']) if data.get('loadavg') else None,
+            meminfo=MemInfo(**data['meminfo']) if data.get('meminfo') else None,
+            disks=[DiskInfo(**d) for d in data['disks']] if data.get('disks') is not None else None,
+            errors=data.get('errors', {}),
+        )
+
+
+def _describe_error(path: str, e: Exception) -> str:
+    if isinstance(e, FileNotFoundError):
         return f"File not found: {path}"
-    except PermissionError:
+    if isinstance(e, PermissionError):
         return f"Permission denied: {path}"
-    except Exception as e:
-        return f"Error reading {path}: {e}"
+    return f"Error reading {path}: {e}"
+
+
+def _read_text(path: str) -> str:
+    with open(path, 'r') as f:
+        return f.read()
+
+
+def load_mdstat(path: str) -> MdstatInfo:
+    content = _read_text(path)
+    fields = {}
+    for line in content.splitlines():
+        key, sep, value = line.partition('=')
+        if sep and key and ' ' not in key:
+            fields[key.strip()] = value.strip()
+    return MdstatInfo(raw=content, fields=fields)
+
+
+def load_loadavg(path: str) -> LoadAvg:
+    content = _read_text(path)
+    parts = content.split()
+    if len(parts) < 3:
+        raise ValueError(f"Unexpected loadavg format: {content.strip()}")
+    running, total = 0, 0
+    if len(parts) >= 4 and '/' in parts[3]:
+        running, total = (int(x) for x in parts[3].split('/', 1))
+    return LoadAvg(float(parts[0]), float(parts[1]), float(parts[2]), running, total)
+
+
+def load_meminfo(path: str) -> MemInfo:
+    values, lines = read_meminfo(path, MEMINFO_KEYS)
+    return MemInfo(values={k: v for k, v in values.items() if v is not None}, lines=lines)
+
+
+def load_disks(path: str) -> list:
+    disks = []
+    for section, fields in iter_ini_sections(path):
+        # Sections with no keys are not disks
+        if not fields:
+            continue
+        disks.append(DiskInfo(
+            section=section,
+            name=fields.get('name', section),
+            status=fields.get('status', 'unknown'),
+            temp=fields.get('temp', '*'),
+            size=int(fields.get('size') or 0),
+            fields=fields,
+        ))
+    return disks
+
+
+_SOURCES = {
+    'mdstat': (lambda: f"{HOST_PROC}/mdstat", load_mdstat),
+    'loadavg': (lambda: f"{HOST_PROC}/loadavg", load_loadavg),
+    'meminfo': (lambda: f"{HOST_PROC}/meminfo", load_meminfo),
+    'disks': (lambda: f"{HOST_EMHTTP}/disks.ini", load_disks),
+}
+
+_snapshot = None
+
+
+def _load_cached_snapshot(ttl: float) -> Optional[Snapshot]:
+    if not SNAPSHOT_CACHE:
+        return None
+    try:
+        with open(SNAPSHOT_CACHE) as f:
+            snapshot = Snapshot.from_dict(json.load(f))
+    except (OSError, ValueError, TypeError, KeyError):
+        return None
+    if time.time() - snapshot.timestamp < ttl:
+        return snapshot
+    return None
+
+
+def _save_cached_snapshot(snapshot: Snapshot):
+    if not SNAPSHOT_CACHE:
+        return
+    tmp_path = f"{SNAPSHOT_CACHE}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, 'w') as f:
+            json.dump(asdict(snapshot), f)
+        os.replace(tmp_path, SNAPSHOT_CACHE)
+    except OSError:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+
+
+def collect_snapshot(ttl: float = None, refresh: bool = False) -> Snapshot:
+    """
+    Read and parse every host source once.
+
+    The result is memoized for ttl seconds (default SYSTEM_INFO_TTL) both in
+    this process and in SYSTEM_INFO_CACHE, so later calls and later
+    invocations of this script within the window do not touch the host files.
+    """
+    global _snapshot
+    ttl = SNAPSHOT_TTL if ttl is None else ttl
+    if not refresh and ttl > 0:
+        if _snapshot is not None and time.time() - _snapshot.timestamp < ttl:
+            return _snapshot
+        cached = _load_cached_snapshot(ttl)
+        if cached is not None:
+            _snapshot = cached
+            return cached
+
+    snapshot = Snapshot(timestamp=time.time())
+    for name, (path_fn, loader) in _SOURCES.items():
+        path = path_fn()
+        try:
+            setattr(snapshot, name, loader(path))
+        except (ValueError, IndexError) as e:
+            snapshot.errors[name] = f"Error parsing {path}: {e}"
+        except Exception as e:
+            snapshot.errors[name] = _describe_error(path, e)
+
+    _snapshot = snapshot
+    if ttl > 0:
+        _save_cached_snapshot(snapshot)
+    return snapshot
 
 
 def show_mdstat():
     """Show RAID/array status."""
     print("=== Array Status (mdstat) ===")
-    print(read_file(f"{HOST_PROC}/mdstat"))
+    snapshot = collect_snapshot()
+    print(snapshot.mdstat.raw if snapshot.mdstat else snapshot.errors.get('mdstat'))
 
 
 def show_loadavg():
     """Show load average."""
     print("=== Load Average ===")
-    content = read_file(f"{HOST_PROC}/loadavg")
-    if content and not content.startswith("Error"):
-        parts = content.strip().split()
-        if len(parts) >= 3:
-            print(f"1min: {parts[0]}, 5min: {parts[1]}, 15min: {parts[2]}")
-        else:
-            print(content)
+    snapshot = collect_snapshot()
+    load = snapshot.loadavg
+    if load:
+        print(f"1min: {load.load1:.2f}, 5min: {load.load5:.2f}, 15min: {load.load15:.2f}")
     else:
-        print(content)
+        print(snapshot.errors.get('loadavg'))
 
 
 def show_meminfo():
     """Show memory info."""
     print("=== Memory Info ===")
-    content = read_file(f"{HOST_PROC}/meminfo")
-    if content and not content.startswith("Error"):
-        # Extract key memory stats
-        lines = content.split('\n')
-        for line in lines:
-            if any(key in line for key in ['MemTotal', 'MemFree', 'MemAvailable', 'SwapTotal', 'SwapFree', 'Cached', 'Buffers']):
-                print(line)
+    snapshot = collect_snapshot()
+    if snapshot.meminfo:
+        for line in snapshot.meminfo.lines:
+            print(line)
     else:
-        print(content)
+        print(snapshot.errors.get('meminfo'))
 
 
 def show_disks():
     """Show disk status from Unraid emhttp."""
     print("=== Disk Status ===")
-    content = read_file(f"{HOST_EMHTTP}/disks.ini")
-    if content and not content.startswith("Error"):
-        # Parse INI-style disk info
-        current_disk = None
-        disk_info = {}
-        
-        for line in content.split('\n'):
-            line = line.strip()
-            if line.startswith('[') and line.endswith(']'):
-                if current_disk and disk_info:
-                    # Print previous disk
-                    status = disk_info.get('status', 'unknown')
-                    temp = disk_info.get('temp', '*')
-                    size = disk_info.get('size', '0')
-                    name = disk_info.get('name', current_disk)
-                    print(f"  {current_disk}: {name} - {status}, {temp}°C, {int(size)//1024//1024//1024}GB")
-                current_disk = line[1:-1]
-                disk_info = {}
-            elif '=' in line:
-                key, value = line.split('=', 1)
-                disk_info[key.strip()] = value.strip().strip('"')
-        
-        # Print last disk
-        if current_disk and disk_info:
-            status = disk_info.get('status', 'unknown')
-            temp = disk_info.get('temp', '*')
-            size = disk_info.get('size', '0')
-            name = disk_info.get('name', current_disk)
-            print(f"  {current_disk}: {name} - {status}, {temp}°C, {int(size)//1024//1024//1024}GB")
+    snapshot = collect_snapshot()
+    if snapshot.disks is not None:
+        for disk in snapshot.disks:
+            print(f"  {disk.section}: {disk.name} - {disk.status}, {disk.temp}°C, {disk.size//1024//1024//1024}GB")
     else:
-        print(content)
+        print(snapshot.errors.get('disks'))
+
+
+def show_json():
+    """Print the structured snapshot as JSON."""
+    print(json.dumps(asdict(collect_snapshot()), indent=2))
 
 
 def show_all():
@@ -127,6 +299,7 @@ def main():
         'meminfo': show_meminfo,
         'disks': show_disks,
         'all': show_all,
+        'json': show_json,
     }
     
     if cmd in commands:
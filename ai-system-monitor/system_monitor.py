@@ -8,14 +8,34 @@ Uses the NEW GitHub Copilot CLI (@github/copilot) which is a full agentic CLI:
 - Programmatic mode: copilot -p "prompt" --allow-all-tools
 - Can edit files, run shell commands, interact with GitHub
 - Uses Claude Sonnet 4.5 by default
+
+Usage:
+    python3 /app/system_monitor.py                      # Single run of PROMPT_FILE
+    python3 /app/system_monitor.py --targets FILE [--concurrency N]
+    python3 /app/system_monitor.py --profile            # Startup cost breakdown, no agent run
+
+With --targets (or MONITOR_TARGETS), every target in the JSON file runs as
+its own Copilot session, concurrently and with its own timeout, and one
+summary notification reports all of their statuses.
+
+Every run writes per-phase timings to ANALYSIS_DIR/timing_<timestamp>.json.
 """
+import time
+_IMPORT_STARTED = time.monotonic()
+
 import os
 import sys
 import subprocess
 import json
+import fcntl
+import shutil
+import threading
+import argparse
 from datetime import datetime
 from pathlib import Path
 
+_IMPORT_DONE = time.monotonic()
+
 # Paths
 PROJECT_DIR = os.getenv("PROJECT_DIR", "/app")
 PROMPT_FILE = os.getenv("PROMPT_FILE", "/app/copilot_prompt.md")
@@ -38,8 +58,37 @@ UNRAID_NOTIFY = os.getenv("UNRAID_NOTIFY", "/usr/local/emhttp/plugins/dynamix/sc
 # Copilot model - Claude Sonnet 4.5 by default
 COPILOT_MODEL = os.getenv("COPILOT_MODEL", "claude-sonnet-4.5")
 
+# Max seconds a single Copilot CLI run may take before it is killed
+COPILOT_TIMEOUT = float(os.getenv("COPILOT_TIMEOUT", "600"))
+
 # Copilot version - if set, ensure we're running at least this version
 COPILOT_VERSION = os.getenv("COPILOT_VERSION", "")
+# Cached `copilot --version` results, keyed on binary path/mtime/size
+COPILOT_VERSION_CACHE = os.getenv("COPILOT_VERSION_CACHE", "/state/copilot_version.json")
+# Upgrades are installed here (versions/<v>, with a `current` symlink) and put first on PATH
+COPILOT_PREFETCH_DIR = os.getenv("COPILOT_PREFETCH_DIR", "/state/copilot-cli")
+# Max seconds to wait for another process's install when no CLI is installed at all
+COPILOT_INSTALL_WAIT = float(os.getenv("COPILOT_INSTALL_WAIT", "600"))
+
+# Append a pre-collected system context digest to the prompt (set to 0 to disable)
+CONTEXT_DIGEST = os.getenv("CONTEXT_DIGEST", "1") != "0"
+
+# Skip the agent when the system fingerprint matches the last healthy run (set to 0 to disable)
+FINGERPRINT_SKIP = os.getenv("FINGERPRINT_SKIP", "1") != "0"
+# Force a full run when the last one is older than this many hours, even if unchanged
+FINGERPRINT_MAX_AGE_HOURS = float(os.getenv("FINGERPRINT_MAX_AGE_HOURS", "24"))
+FINGERPRINT_FILE = os.path.join(ANALYSIS_DIR, "last_fingerprint.json")
+
+# Statuses that trigger an alert, and how long an early alert waits for the DIAGNOSIS to finish
+ALERT_STATUSES = ("FAILURE", "AUTH_REQUIRED")
+EARLY_ALERT_SETTLE = float(os.getenv("EARLY_ALERT_SETTLE", "10"))
+
+# Optional JSON list of monitor targets to run in one go (see monitor_targets.json.template)
+MONITOR_TARGETS = os.getenv("MONITOR_TARGETS", "")
+# Number of targets the scheduler runs at the same time
+MONITOR_CONCURRENCY = int(os.getenv("MONITOR_CONCURRENCY", "2"))
+# Severity order used when aggregating target statuses
+STATUS_SEVERITY = {"SUCCESS": 0, "UNKNOWN": 1, "AUTH_REQUIRED": 2, "FAILURE": 3}
 
 
 def load_github_token() -> bool:
@@ -121,77 +170,250 @@ def parse_version(version_str: str) -> tuple:
     return (0, 0, 0)
 
 
-def ensure_copilot_version() -> bool:
-    """Check and upgrade Copilot CLI if COPILOT_VERSION is set and current version is lower."""
-    if not COPILOT_VERSION:
-        return True  # No version requirement
+def copilot_bin_dir() -> str:
+    return os.path.join(COPILOT_PREFETCH_DIR, "current", "node_modules", ".bin")
+
+
+def activate_prefetched_copilot():
+    """Put a prefetched Copilot CLI (if any) first on PATH for this process and its children."""
+    bin_dir = copilot_bin_dir()
+    if os.path.isdir(bin_dir) and bin_dir not in os.environ.get("PATH", "").split(os.pathsep):
+        os.environ["PATH"] = bin_dir + os.pathsep + os.environ.get("PATH", "")
+
+
+def copilot_version(binary: str) -> str:
+    """
+    Return the version string of a Copilot CLI binary.
     
-    required_version = parse_version(COPILOT_VERSION)
-    if required_version == (0, 0, 0):
-        print(f"[WARN] Invalid COPILOT_VERSION format: {COPILOT_VERSION}")
-        return True  # Continue anyway
+    Results are cached in COPILOT_VERSION_CACHE keyed on the binary's real
+    path, mtime and size, so `copilot --version` (Node startup, up to 30s)
+    only runs after the binary changed.
+    """
+    real_path = os.path.realpath(binary)
+    st = os.stat(real_path)
+    key = {"mtime_ns": st.st_mtime_ns, "size": st.st_size}
+    try:
+        with open(COPILOT_VERSION_CACHE) as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        cache = {}
+    entry = cache.get(real_path)
+    if entry and {k: entry.get(k) for k in key} == key:
+        return entry["version"]
+    
+    result = subprocess.run([binary, "--version"], capture_output=True, text=True, timeout=30)
+    version = '.'.join(map(str, parse_version(result.stdout.strip() + result.stderr.strip())))
+    if result.returncode == 0 and version != "0.0.0":
+        cache = {path: e for path, e in cache.items() if os.path.exists(path)}
+        cache[real_path] = dict(key, version=version)
+        tmp_path = f"{COPILOT_VERSION_CACHE}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(COPILOT_VERSION_CACHE), exist_ok=True)
+            with open(tmp_path, "w") as f:
+                json.dump(cache, f, indent=2)
+            os.replace(tmp_path, COPILOT_VERSION_CACHE)
+        except OSError as e:
+            print(f"[WARN] Failed to cache Copilot version: {e}")
+    return version
+
+
+def install_copilot(version: str) -> bool:
+    """
+    Install Copilot CLI `version` into COPILOT_PREFETCH_DIR and switch to it.
+    
+    npm installs into a private staging directory; only a complete install
+    is renamed into versions/<version> and the `current` symlink is then
+    swapped atomically, so a concurrent run sees either the old or the new
+    CLI, never a half-written one. A lock file keeps a single installer
+    running at a time.
+    """
+    versions_dir = os.path.join(COPILOT_PREFETCH_DIR, "versions")
+    os.makedirs(versions_dir, exist_ok=True)
+    lock = open(os.path.join(COPILOT_PREFETCH_DIR, ".lock"), "w")
+    try:
+        fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        print(f"[VERSION] Copilot CLI install already in progress")
+        lock.close()
+        return False
     
-    # Get current version
     try:
+        # Staging dirs left by an interrupted install
+        for name in os.listdir(versions_dir):
+            if name.startswith(".staging-"):
+                shutil.rmtree(os.path.join(versions_dir, name), ignore_errors=True)
+        
+        staging = os.path.join(versions_dir, f".staging-{version}-{os.getpid()}")
+        print(f"[VERSION] Installing Copilot CLI {version} into {staging}...")
         result = subprocess.run(
-            ["copilot", "--version"],
-            capture_output=True, text=True, timeout=30
+            ["npm", "install", "--prefix", staging, "--no-audit", "--no-fund", f"@github/copilot@{version}"],
+            capture_output=True, text=True, timeout=600
         )
-        current_version_str = result.stdout.strip() + result.stderr.strip()
-        current_version = parse_version(current_version_str)
+        if result.returncode != 0 or not os.path.exists(os.path.join(staging, "node_modules", ".bin", "copilot")):
+            print(f"[ERROR] Failed to install Copilot CLI {version}: {result.stderr.strip()}")
+            shutil.rmtree(staging, ignore_errors=True)
+            return False
         
-        print(f"[VERSION] Current: {'.'.join(map(str, current_version))}, Required: {COPILOT_VERSION}")
+        target = os.path.join(versions_dir, version)
+        if os.path.exists(target):
+            old = f"{target}.old-{os.getpid()}"
+            os.rename(target, old)
+            shutil.rmtree(old, ignore_errors=True)
+        os.rename(staging, target)
         
-        if current_version >= required_version:
-            print(f"[VERSION] Copilot CLI is up to date")
-            return True
+        current = os.path.join(COPILOT_PREFETCH_DIR, "current")
+        previous = os.path.realpath(current) if os.path.islink(current) else None
+        tmp_link = f"{current}.{os.getpid()}.tmp"
+        os.symlink(os.path.join("versions", version), tmp_link)
+        os.replace(tmp_link, current)
+        print(f"[VERSION] Copilot CLI {version} installed and activated")
         
-        # Need to upgrade
-        print(f"[VERSION] Upgrading Copilot CLI to {COPILOT_VERSION}...")
-        upgrade_result = subprocess.run(
-            ["npm", "install", "-g", f"@github/copilot@{COPILOT_VERSION}"],
-            capture_output=True, text=True, timeout=300
+        # Keep the previous install; a running agent may still be using it
+        keep = {os.path.realpath(target), previous}
+        for name in os.listdir(versions_dir):
+            path = os.path.join(versions_dir, name)
+            if not name.startswith(".") and os.path.realpath(path) not in keep:
+                shutil.rmtree(path, ignore_errors=True)
+        return True
+    except Exception as e:
+        print(f"[ERROR] Failed to install Copilot CLI {version}: {e}")
+        return False
+    finally:
+        lock.close()
+
+
+def wait_for_install(timeout: float = COPILOT_INSTALL_WAIT) -> bool:
+    """Wait until no install_copilot holds the install lock; False if it still does after timeout."""
+    os.makedirs(COPILOT_PREFETCH_DIR, exist_ok=True)
+    deadline = time.monotonic() + timeout
+    waited = False
+    with open(os.path.join(COPILOT_PREFETCH_DIR, ".lock"), "w") as lock:
+        while True:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return True
+            except OSError:
+                if time.monotonic() >= deadline:
+                    return False
+                if not waited:
+                    print(f"[VERSION] Waiting up to {timeout:g}s for the running Copilot CLI install...")
+                    waited = True
+                time.sleep(2)
+
+
+def prefetch_copilot(version: str):
+    """Start install_copilot in a detached background process."""
+    os.makedirs(COPILOT_PREFETCH_DIR, exist_ok=True)
+    log_path = os.path.join(COPILOT_PREFETCH_DIR, "install.log")
+    with open(log_path, "a") as log:
+        subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), "--install-copilot", version],
+            stdout=log, stderr=subprocess.STDOUT, stdin=subprocess.DEVNULL,
+            start_new_session=True
         )
-        
-        if upgrade_result.returncode == 0:
-            print(f"[VERSION] Successfully upgraded to {COPILOT_VERSION}")
-            return True
-        else:
-            print(f"[ERROR] Failed to upgrade Copilot CLI: {upgrade_result.stderr}")
-            return False
-            
-    except FileNotFoundError:
+    print(f"[VERSION] Prefetching Copilot CLI {version} in the background (log: {log_path})")
+
+
+def ensure_copilot_version(prefetch: bool = True) -> bool:
+    """
+    Make sure a Copilot CLI of at least COPILOT_VERSION is used, without blocking on npm.
+    
+    A previously prefetched CLI is activated first. If the active CLI is
+    still too old, the upgrade is prefetched in the background (unless
+    prefetch is False) and this run continues with the current CLI; the
+    next run picks the new one up. Only when no CLI is installed at all does
+    the install block the run; if a background prefetch is already
+    installing, the run waits for it (up to COPILOT_INSTALL_WAIT seconds).
+    """
+    activate_prefetched_copilot()
+    if not COPILOT_VERSION:
+        return True  # No version requirement
+    
+    required_version = parse_version(COPILOT_VERSION)
+    if required_version == (0, 0, 0):
+        print(f"[WARN] Invalid COPILOT_VERSION format: {COPILOT_VERSION}")
+        return True  # Continue anyway
+    
+    binary = shutil.which("copilot")
+    if binary is None:
         print("[ERROR] Copilot CLI not found, attempting install...")
-        try:
-            install_result = subprocess.run(
-                ["npm", "install", "-g", f"@github/copilot@{COPILOT_VERSION}"],
-                capture_output=True, text=True, timeout=300
-            )
-            if install_result.returncode == 0:
-                print(f"[VERSION] Successfully installed Copilot CLI {COPILOT_VERSION}")
-                return True
-            else:
-                print(f"[ERROR] Failed to install Copilot CLI: {install_result.stderr}")
+        if not install_copilot(COPILOT_VERSION):
+            # The lock may be held by a background prefetch; use what it installs
+            if not wait_for_install():
+                print("[ERROR] Timed out waiting for the Copilot CLI install")
                 return False
-        except Exception as e:
-            print(f"[ERROR] Failed to install Copilot CLI: {e}")
-            return False
+        activate_prefetched_copilot()
+        return shutil.which("copilot") is not None
+    
+    try:
+        current_version = parse_version(copilot_version(binary))
     except Exception as e:
         print(f"[ERROR] Failed to check Copilot version: {e}")
         return True  # Continue anyway
+    
+    print(f"[VERSION] Current: {'.'.join(map(str, current_version))}, Required: {COPILOT_VERSION}")
+    if current_version >= required_version:
+        print(f"[VERSION] Copilot CLI is up to date")
+        return True
+    
+    if not prefetch:
+        print(f"[VERSION] Copilot CLI {'.'.join(map(str, current_version))} is older than required")
+        return True
+    
+    # Upgrade for the next run; don't hold up monitoring on npm
+    try:
+        prefetch_copilot(COPILOT_VERSION)
+    except Exception as e:
+        print(f"[WARN] Failed to start Copilot CLI prefetch: {e}")
+    print(f"[VERSION] Continuing with Copilot CLI {'.'.join(map(str, current_version))} for this run")
+    return True
 
 
 def send_notification(event: str, subject: str, description: str, importance: str = "normal", message: str = ""):
-    """Send notification to Unraid notification system.
+    """Queue a notification: repeats are coalesced, sends rate limited and batched (see notify_queue.py)."""
+    try:
+        from notify_queue import NotificationQueue
+        result = NotificationQueue(send_alert).submit(event, subject, description, importance, message)
+    except Exception as e:
+        print(f"[WARN] Notification queue error ({e}); sending directly")
+        return send_alert(event, subject, description, importance, message)
+    if result != "sent":
+        print(f"[ALERT] {result.capitalize()}: {importance.upper()} - {subject}")
+    return result != "failed"
+
+
+def flush_notifications():
+    """Send notifications the rate limit held back, if there is budget for them now."""
+    try:
+        from notify_queue import NotificationQueue
+        NotificationQueue(send_alert).flush()
+    except Exception as e:
+        print(f"[WARN] Failed to flush notification queue: {e}")
+
+
+def send_alert(event: str, subject: str, description: str, importance: str = "normal", message: str = "",
+               link: str = "") -> bool:
+    """Send notification to Unraid notification system right away.
     
     Uses the /usr/local/bin/send_alert wrapper script which handles nsenter internally.
     This wrapper exists because direct nsenter calls are blocked by Copilot CLI.
     The script is named 'send_alert' instead of 'notify' to avoid Copilot CLI blocking.
     """
+    # Prefer the host-side notify agent when its socket is mounted
+    from notify_agent import try_send
+    sent = try_send({"event": event, "subject": subject, "description": description,
+                     "importance": importance, "message": message, "link": link})
+    if sent is not None:
+        if sent:
+            print(f"[ALERT] Sent: {importance.upper()} - {subject}")
+        return sent
+    
     # Use the wrapper script installed in the container
     cmd = ["/usr/local/bin/send_alert", "-e", event, "-s", subject, "-d", description, "-i", importance]
     if message:
         cmd.extend(["-m", message])
+    if link:
+        cmd.extend(["-l", link])
     
     try:
         result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
@@ -208,6 +430,18 @@ def send_notification(event: str, subject: str, description: str, importance: st
         print(f"[WARN] Notify error: {e}")
         return False
 
+
+def notify_status(status: str, diagnosis: str) -> bool:
+    """Send the standard alert for a FAILURE/AUTH_REQUIRED status."""
+    importance = "alert" if status == "FAILURE" else "warning"
+    return send_notification(
+        event="copilot-system-monitor",
+        subject=f"Takeout Script: {status}",
+        description=diagnosis[:200] if diagnosis else f"Status: {status}",
+        importance=importance,
+        message=f"The automated-takeout script reported: {status}\n\n{diagnosis}"
+    )
+
 def load_prompt() -> str:
     """Load the AI instructions from prompt file."""
     try:
@@ -217,20 +451,163 @@ def load_prompt() -> str:
         return f"Analyze the logs and fix any issues with the Playwright script. Error loading prompt: {e}"
 
 
-def save_analysis(prompt: str, output: str, timestamp: str):
-    """Save the analysis prompt and output to the analysis directory."""
-    os.makedirs(ANALYSIS_DIR, exist_ok=True)
-        
-    # Save output
-    output_file = os.path.join(ANALYSIS_DIR, f"output_{timestamp}.txt")
-    with open(output_file, "w") as f:
-        f.write(output)
-    print(f"Analysis saved to: {output_file}")
+def collect_system_context():
+    """Collect system state in parallel for the digest and fingerprint; None on failure."""
+    if not CONTEXT_DIGEST and not FINGERPRINT_SKIP:
+        return None
+    try:
+        from context_digest import collect_context
+        started = datetime.now()
+        context = collect_context()
+        elapsed = (datetime.now() - started).total_seconds()
+        print(f"[CONTEXT] Collected system context in {elapsed:.1f}s")
+        return context
+    except Exception as e:
+        print(f"[WARN] Failed to collect system context: {e}")
+        return None
+
+
+def build_context_digest(context) -> str:
+    """Render the prompt digest from collected context; empty if disabled or unavailable."""
+    if not CONTEXT_DIGEST or context is None:
+        return ""
+    from context_digest import format_digest
+    digest = format_digest(context)
+    print(f"[CONTEXT] Digest: {len(digest)} chars")
+    return digest
+
+
+def load_fingerprint_state() -> dict:
+    try:
+        with open(FINGERPRINT_FILE) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_fingerprint_state(state: dict):
+    tmp_path = f"{FINGERPRINT_FILE}.tmp"
+    try:
+        with open(tmp_path, "w") as f:
+            json.dump(state, f, indent=2)
+        os.replace(tmp_path, FINGERPRINT_FILE)
+    except OSError as e:
+        print(f"[WARN] Failed to save fingerprint: {e}")
+
+
+def check_unchanged(fingerprint: str) -> bool:
+    """
+    Return True if this run can be skipped.
+
+    That is the case when the fingerprint matches the last full run, that run
+    finished cleanly with a SUCCESS status (UNKNOWN means the result couldn't
+    be parsed, so it isn't trusted either), and it is not
+    older than FINGERPRINT_MAX_AGE_HOURS. A skipped run is recorded as
+    UNCHANGED in the fingerprint file.
+    """
+    state = load_fingerprint_state()
+    if not FINGERPRINT_SKIP or not fingerprint or state.get("fingerprint") != fingerprint:
+        return False
+    if state.get("returncode") != 0 or state.get("status") != "SUCCESS":
+        return False
+    try:
+        age_hours = (datetime.now() - datetime.fromisoformat(state["last_full_run"])).total_seconds() / 3600
+    except (KeyError, ValueError):
+        return False
+    if age_hours >= FINGERPRINT_MAX_AGE_HOURS:
+        print(f"[FINGERPRINT] Unchanged, but last full run was {age_hours:.1f}h ago; running anyway")
+        return False
+
+    state["last_check"] = datetime.now().isoformat(timespec="seconds")
+    state["last_check_status"] = "UNCHANGED"
+    state["unchanged_runs"] = state.get("unchanged_runs", 0) + 1
+    save_fingerprint_state(state)
+    print(f"[FINGERPRINT] System unchanged since {state['last_full_run']} "
+          f"(status {state.get('status')}); skipping agent run")
+    return True
+
+
+def record_full_run(fingerprint: str, status: str, returncode: int):
+    now = datetime.now().isoformat(timespec="seconds")
+    save_fingerprint_state({
+        "fingerprint": fingerprint,
+        "status": status,
+        "returncode": returncode,
+        "last_full_run": now,
+        "last_check": now,
+        "last_check_status": status,
+        "unchanged_runs": 0,
+    })
+
+
+def store_run(timestamp: str, status: str, diagnosis: str = "", duration: float = None,
+              returncode: int = None, parser: "StatusParser" = None, target: str = ""):
+    """Add the run to the analysis store index; problems there never fail the run."""
+    try:
+        import analysis_store
+        analysis_store.record_run(
+            timestamp, status, diagnosis, duration, returncode,
+            output_file=parser.output_file if parser else "",
+            status_offset=parser.status_offset if parser else None,
+            target=target
+        )
+    except Exception as e:
+        print(f"[WARN] Failed to index run: {e}")
+
+
+def prune_analysis():
+    """Apply the analysis store's retention and compression to ANALYSIS_DIR."""
+    try:
+        import analysis_store
+        result = analysis_store.prune()
+        if result["deleted"] or result["compressed"]:
+            print(f"[STORE] Pruned analysis dir: {result['deleted']} deleted, {result['compressed']} compressed, "
+                  f"{result['freed_bytes'] // 1024} KB freed")
+    except Exception as e:
+        print(f"[WARN] Failed to prune analysis dir: {e}")
+
+
+_config_lock = threading.Lock()
+
+
+def copilot_folders(cwd: str = PROJECT_DIR) -> list:
+    """Directories the agent is pre-trusted to work in."""
+    # Must include /state since it's a separate mount from /app
+    # Also include /host for host system mounts (proc, emhttp)
+    return [
+        str(Path(cwd).resolve()),
+        "/state",
+        "/app",
+        "/host",
+        "/host/proc",
+        "/host/emhttp",
+    ]
+
+
+def trust_folders(folders: list):
+    """Add folders to the Copilot CLI's trusted_folders config (merging with what's there)."""
+    config_dir = Path.home() / ".copilot"
+    config_file = config_dir / "config.json"
     
-    return output_file
+    with _config_lock:
+        config_dir.mkdir(exist_ok=True)
+        try:
+            with open(config_file) as f:
+                config = json.load(f)
+        except (OSError, ValueError):
+            config = {}
+        trusted = config.get("trusted_folders", [])
+        missing = [folder for folder in folders if folder not in trusted]
+        if not missing:
+            return
+        config["trusted_folders"] = trusted + missing
+        with open(config_file, "w") as f:
+            json.dump(config, f)
 
 
-def run_copilot(prompt: str, timestamp: str) -> tuple[int, str]:
+def run_copilot(prompt: str, timestamp: str, parser: "StatusParser" = None, model: str = COPILOT_MODEL,
+                cwd: str = PROJECT_DIR, timeout: float = COPILOT_TIMEOUT, name: str = "",
+                stdin=None) -> tuple[int, "StatusParser"]:
     """
     Run GitHub Copilot CLI (the new agentic CLI) with the full prompt.
     
@@ -238,111 +615,522 @@ def run_copilot(prompt: str, timestamp: str) -> tuple[int, str]:
     - Edit files directly
     - Run docker commands
     - Apply fixes automatically
+    
+    Output is streamed line by line to the console, to the analysis file
+    (output_<timestamp>[_<name>].txt) and through the status parser, so the
+    transcript is never held in memory. The agent is killed after timeout
+    seconds. When name is set (scheduler mode) console lines are prefixed
+    with it. Returns (returncode, parser).
     """
+    parser = parser or StatusParser()
+    suffix = f"_{name}" if name else ""
+    prefix = f"[{name}] " if name else ""
     # Save prompt to temp file
-    prompt_path = "/tmp/copilot_prompt.txt"
+    prompt_path = f"/tmp/copilot_prompt{suffix}.txt"
     with open(prompt_path, "w") as f:
         f.write(prompt)
     
-    print(f"[{datetime.now()}] Calling GitHub Copilot CLI (agentic mode)...")
+    print(f"[{datetime.now()}] {prefix}Calling GitHub Copilot CLI (agentic mode)...")
     print("=" * 60)
     
-    # Trust the working directory for this session
-    config_dir = Path.home() / ".copilot"
-    config_dir.mkdir(exist_ok=True)
-    config_file = config_dir / "config.json"
-    
-    # Pre-trust the directories we'll be working in
-    # Must include /state since it's a separate mount from /app
-    # Also include /host for host system mounts (proc, emhttp)
-    trusted_folders = [
-        str(Path(PROJECT_DIR).resolve()),
-        "/state",
-        "/app",
-        "/host",
-        "/host/proc",
-        "/host/emhttp",
-    ]
-    config = {"trusted_folders": trusted_folders}
-    with open(config_file, "w") as f:
-        json.dump(config, f)
+    trust_folders(copilot_folders(cwd))
     
     # Read the prompt and use it with -p flag (programmatic mode)
     # --allow-all-tools: Let the agent do anything needed
     # --deny-tool 'shell(rm -rf)': Safety - don't allow recursive delete
-    try:
-        # Use Popen to stream output in real-time while also capturing it
-        process = subprocess.Popen(
-            [
-                "copilot",
-                "-p", prompt,
-                "--model", COPILOT_MODEL,
-                "--allow-all-tools",
-                "--allow-all-paths",
-                "--deny-tool", "shell(rm -rf)",
-            ],
-            stdout=subprocess.PIPE,
-            stderr=subprocess.STDOUT,  # Merge stderr into stdout
-            stdin=sys.stdin,  # Pass through stdin for interactive prompts
-            text=True,
-            bufsize=1,  # Line buffered
-            cwd=PROJECT_DIR
-        )
+    os.makedirs(ANALYSIS_DIR, exist_ok=True)
+    output_file = os.path.join(ANALYSIS_DIR, f"output_{timestamp}{suffix}.txt")
+    parser.output_file = output_file
+    
+    with open(output_file, "w", buffering=1) as transcript:
+        def emit(line: str):
+            print(f"{prefix}{line}", end='', flush=True)  # Print to console in real-time
+            transcript.write(line)
+            parser.feed(line)
+        
+        process = None
+        watchdog = None
+        timed_out = threading.Event()
+        try:
+            # Use Popen to stream output in real-time
+            process = subprocess.Popen(
+                [
+                    "copilot",
+                    "-p", prompt,
+                    "--model", model,
+                    "--allow-all-tools",
+                    "--allow-all-paths",
+                    "--deny-tool", "shell(rm -rf)",
+                ],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,  # Merge stderr into stdout
+                stdin=sys.stdin if stdin is None else stdin,  # Pass through stdin for interactive prompts
+                text=True,
+                bufsize=1,  # Line buffered
+                cwd=cwd
+            )
+            
+            # Kill the agent if it outlives its timeout, even mid-stream
+            def expire():
+                timed_out.set()
+                process.kill()
+            watchdog = threading.Timer(timeout, expire)
+            watchdog.daemon = True
+            watchdog.start()
+            
+            # Stream output line by line
+            for line in process.stdout:
+                emit(line)
+            
+            # The output is complete here; a CLI that still won't exit is an exit
+            # hang, not the run timeout
+            try:
+                process.wait(timeout=30)
+                exit_hung = False
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.wait()
+                exit_hung = True
+            if timed_out.is_set():
+                raise subprocess.TimeoutExpired(process.args, timeout)
+            returncode = process.returncode
+            if exit_hung:
+                returncode = 1
+                msg = "Copilot CLI finished its output but did not exit within 30s; killed"
+                print(f"[ERROR] {prefix}{msg}")
+                transcript.write(f"{msg}\n")
+            
+        except subprocess.TimeoutExpired:
+            process.kill()
+            returncode = 1
+            msg = f"Copilot CLI timed out after {timeout / 60:g} minutes"
+            print(f"[ERROR] {prefix}{msg}")
+            transcript.write(f"{msg}\n")
+        except FileNotFoundError:
+            returncode = 1
+            msg = "Copilot CLI not found. Make sure @github/copilot is installed."
+            print(f"[ERROR] {prefix}{msg}")
+            transcript.write(f"{msg}\n")
+        except Exception as e:
+            returncode = 1
+            msg = f"Error running Copilot CLI: {e}"
+            print(f"[ERROR] {prefix}{msg}")
+            transcript.write(f"{msg}\n")
+        finally:
+            if watchdog is not None:
+                watchdog.cancel()
+    
+    print(f"{prefix}Analysis saved to: {output_file}")
+    return returncode, parser
+
+
+class StatusParser:
+    """
+    Incremental parser for the STATUS/DIAGNOSIS block in Copilot's output.
+    
+    Feed it one line at a time as the agent streams output. status,
+    diagnosis, failed_element and fix_applied are current as of the last
+    line fed. on_status, if given, is called as on_status(status) whenever a
+    STATUS: line is seen; on_diagnosis_end() is called when a DIAGNOSIS block
+    is closed by the next FAILED_ELEMENT/FIX_APPLIED/STATUS line.
+    """
+    
+    def __init__(self, on_status=None, on_diagnosis_end=None):
+        self.status = "UNKNOWN"
+        self.failed_element = ""
+        self.fix_applied = ""
+        self.output_file = ""
+        # Byte offset of the last STATUS: line in the transcript
+        self.status_offset = None
+        self.bytes_seen = 0
+        self.on_status = on_status
+        self.on_diagnosis_end = on_diagnosis_end
+        self._diagnosis = []
+        self._in_diagnosis = False
+    
+    @property
+    def diagnosis(self) -> str:
+        return " ".join(self._diagnosis)
+    
+    def _end_diagnosis(self):
+        if self._in_diagnosis:
+            self._in_diagnosis = False
+            if self.on_diagnosis_end:
+                self.on_diagnosis_end()
+    
+    def feed(self, line: str):
+        offset = self.bytes_seen
+        self.bytes_seen += len(line.encode("utf-8"))
+        line = line.rstrip('\r\n')
+        if line.startswith("STATUS:"):
+            self.status_offset = offset
+            self._end_diagnosis()
+            self.status = line.split(":", 1)[1].strip()
+            if self.on_status:
+                self.on_status(self.status)
+        elif line.startswith("DIAGNOSIS:"):
+            self._diagnosis = [line.split(":", 1)[1].strip()]
+            self._in_diagnosis = True
+        elif line.startswith("FAILED_ELEMENT:"):
+            self._end_diagnosis()
+            self.failed_element = line.split(":", 1)[1].strip()
+        elif line.startswith("FIX_APPLIED:"):
+            self._end_diagnosis()
+            self.fix_applied = line.split(":", 1)[1].strip()
+        elif self._in_diagnosis and line.strip():
+            self._diagnosis.append(line.strip())
+
+
+class EarlyAlerter:
+    """
+    Sends the FAILURE/AUTH_REQUIRED alert as soon as the agent reports it.
+    
+    Hooked into StatusParser: when an alert status is seen, a background
+    thread waits for the DIAGNOSIS block to finish (at most settle seconds)
+    and then sends the alert, so output streaming is never blocked. After
+    the run, finish() sends a follow-up with the final status and fix.
+    """
+    
+    def __init__(self, settle: float = EARLY_ALERT_SETTLE):
+        self.settle = settle
+        self.sent_status = None
+        self._diagnosis_done = threading.Event()
+        self._thread = None
+        self.parser = StatusParser(on_status=self._on_status, on_diagnosis_end=self._on_diagnosis_end)
+    
+    def _on_status(self, status: str):
+        if status in ALERT_STATUSES and self._thread is None:
+            self._diagnosis_done.clear()
+            self._thread = threading.Thread(target=self._send_early, args=(status,), daemon=True)
+            self._thread.start()
+    
+    def _on_diagnosis_end(self):
+        self._diagnosis_done.set()
+    
+    def _send_early(self, status: str):
+        self._diagnosis_done.wait(self.settle)
+        print(f"\n[ALERT] Agent reported {status}; alerting before the run completes")
+        if notify_status(status, self.parser.diagnosis):
+            self.sent_status = status
+    
+    def finish(self, returncode: int):
+        """Wait for a pending early alert, then send the final alert or follow-up."""
+        if self._thread is not None:
+            self._thread.join(timeout=60)
+        status = self.parser.status
+        if self.sent_status is None:
+            # No early alert went out (or it failed); alert now like before
+            if status in ALERT_STATUSES:
+                notify_status(status, self.parser.diagnosis)
+            return
         
-        # Stream output line by line while capturing
-        output_lines = []
-        for line in process.stdout:
-            print(line, end='', flush=True)  # Print to console in real-time
-            output_lines.append(line)
+        fix = self.parser.fix_applied or "none reported"
+        importance = ("alert" if status == "FAILURE" else "warning") if status in ALERT_STATUSES else "normal"
+        send_notification(
+            event="copilot-system-monitor",
+            subject=f"Takeout Script: {status} (run complete)",
+            description=f"Earlier: {self.sent_status}. Final: {status}. Fix applied: {fix}"[:200],
+            importance=importance,
+            message=(f"The monitor run finished with exit code {returncode}.\n\n"
+                     f"Final status: {status}\nFix applied: {fix}\n\n{self.parser.diagnosis}")
+        )
+
+
+def process_age() -> float:
+    """Seconds since this process was exec'd (interpreter startup included), or 0 if unknown."""
+    try:
+        with open("/proc/self/stat") as f:
+            # Field 22 (starttime) counts clock ticks since boot; skip past the "(comm)" field
+            start_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        return time.clock_gettime(time.CLOCK_BOOTTIME) - start_ticks / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return 0.0
+
+
+class PhaseTimer:
+    """
+    Monotonic wall-clock timings for the phases of one run.
+    
+    mark(name) ends the running phase and starts the next, which fits the
+    straight-line flow of main(); save() ends the last phase and writes
+    timing_<timestamp>.json next to the analysis output.
+    """
+    
+    def __init__(self):
+        now = time.monotonic()
+        interpreter = max(0.0, process_age() - (now - _IMPORT_STARTED))
+        self.started = _IMPORT_STARTED - interpreter
+        self.phases = [
+            {"name": "interpreter", "start": 0.0, "duration": interpreter},
+            {"name": "python_import", "start": interpreter, "duration": _IMPORT_DONE - _IMPORT_STARTED},
+        ]
+        self._current = None
+        self.mark("setup", now)
+    
+    def mark(self, name: str, now: float = None):
+        now = time.monotonic() if now is None else now
+        self.stop(now)
+        self._current = (name, now)
+    
+    def stop(self, now: float = None):
+        if self._current is not None:
+            name, started = self._current
+            now = time.monotonic() if now is None else now
+            self.phases.append({"name": name, "start": started - self.started, "duration": now - started})
+            self._current = None
+    
+    def report(self) -> dict:
+        self.stop()
+        return {
+            "total": round(time.monotonic() - self.started, 4),
+            "phases": [{k: round(v, 4) if isinstance(v, float) else v for k, v in phase.items()}
+                       for phase in self.phases],
+        }
+    
+    def save(self, timestamp: str, extra: dict = None) -> str:
+        data = dict(timestamp=timestamp, **self.report(), **(extra or {}))
+        path = os.path.join(ANALYSIS_DIR, f"timing_{timestamp}.json")
+        try:
+            os.makedirs(ANALYSIS_DIR, exist_ok=True)
+            with open(path, "w") as f:
+                json.dump(data, f, indent=2)
+        except OSError as e:
+            print(f"[WARN] Failed to save timing: {e}")
+        return path
+
+
+class IOProfile:
+    """
+    Accounts time spent in subprocesses and file opens while active.
+    
+    Used by --profile only: subprocess.run and open are wrapped for the
+    duration (threads included, so parallel collectors are counted too).
+    Time in open() covers the open call itself, not reads through the file.
+    """
+    
+    def __init__(self):
+        self.subprocesses = []
+        self.opens = {}
+        self._lock = threading.Lock()
+        self._saved = None
+    
+    def __enter__(self):
+        import builtins
+        self._saved = (subprocess.run, builtins.open)
+        real_run, real_open = self._saved
         
-        process.wait(timeout=600)  # Wait for completion with timeout
-        output = ''.join(output_lines)
+        def timed_run(cmd, *args, **kwargs):
+            started = time.monotonic()
+            try:
+                return real_run(cmd, *args, **kwargs)
+            finally:
+                with self._lock:
+                    self.subprocesses.append((" ".join(map(str, cmd)) if isinstance(cmd, list) else str(cmd),
+                                              time.monotonic() - started))
         
-        return process.returncode, output
+        def timed_open(file, *args, **kwargs):
+            started = time.monotonic()
+            try:
+                return real_open(file, *args, **kwargs)
+            finally:
+                with self._lock:
+                    count, total = self.opens.get(str(file), (0, 0.0))
+                    self.opens[str(file)] = (count + 1, total + time.monotonic() - started)
         
-    except subprocess.TimeoutExpired:
-        process.kill()
-        msg = "Copilot CLI timed out after 10 minutes"
-        print(f"[ERROR] {msg}")
-        return 1, msg
-    except FileNotFoundError:
-        msg = "Copilot CLI not found. Make sure @github/copilot is installed."
-        print(f"[ERROR] {msg}")
-        return 1, msg
-    except Exception as e:
-        msg = f"Error running Copilot CLI: {e}"
-        print(f"[ERROR] {msg}")
-        return 1, msg
+        subprocess.run, builtins.open = timed_run, timed_open
+        return self
+    
+    def __exit__(self, *exc):
+        import builtins
+        subprocess.run, builtins.open = self._saved
+    
+    def report(self) -> dict:
+        return {
+            "subprocess_total": round(sum(t for _, t in self.subprocesses), 4),
+            "subprocesses": [{"cmd": cmd[:120], "duration": round(t, 4)} for cmd, t in self.subprocesses],
+            "file_opens": sum(count for count, _ in self.opens.values()),
+            "file_open_total": round(sum(t for _, t in self.opens.values()), 4),
+            "files": {path: count for path, (count, _) in sorted(self.opens.items())},
+        }
+
+
+def print_profile(report: dict):
+    """Print a startup profile produced by --profile."""
+    print(f"\nStartup profile ({report['total']:.3f}s total)")
+    print("-" * 60)
+    for phase in report["phases"]:
+        share = 100.0 * phase["duration"] / report["total"] if report["total"] else 0.0
+        print(f"  {phase['name']:<20} {phase['duration'] * 1000:9.1f} ms  {share:5.1f}%")
+    io = report["io"]
+    print(f"\nSubprocesses: {len(io['subprocesses'])} ({io['subprocess_total'] * 1000:.1f} ms, overlapping when parallel)")
+    for entry in sorted(io["subprocesses"], key=lambda e: -e["duration"]):
+        print(f"  {entry['duration'] * 1000:9.1f} ms  {entry['cmd']}")
+    print(f"File opens: {io['file_opens']} ({io['file_open_total'] * 1000:.1f} ms in open)")
+    print("\nSlowest imports:")
+    for module, micros in report["imports"]:
+        print(f"  {micros / 1000:9.1f} ms  {module}")
+
+
+def profile_imports(modules: list, limit: int = 8) -> list:
+    """Return the slowest [(module, cumulative us)] when importing modules in a fresh interpreter."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "; ".join(f"import {m}" for m in modules)],
+        capture_output=True, text=True, timeout=60, cwd=os.path.dirname(os.path.abspath(__file__))
+    )
+    imports = []
+    for line in result.stderr.splitlines():
+        # "import time: self [us] | cumulative | imported package"
+        parts = line.split("|")
+        if len(parts) == 3 and parts[1].strip().isdigit():
+            imports.append((parts[2].rstrip(), int(parts[1])))
+    return sorted(imports, key=lambda item: -item[1])[:limit]
 
 
 def parse_status(output: str) -> tuple[str, str]:
     """Parse the STATUS and DIAGNOSIS from Copilot's output."""
-    status = "UNKNOWN"
-    diagnosis = ""
+    parser = StatusParser()
+    for line in output.split('\n'):
+        parser.feed(line)
+    return parser.status, parser.diagnosis
+
+
+def load_targets(path: str) -> list:
+    """
+    Load monitor targets from a JSON file.
     
-    lines = output.split('\n')
-    in_diagnosis = False
+    The file holds a list of objects with a unique "name" and a "prompt" file
+    (relative paths resolve against the targets file); "model", "timeout"
+    (seconds) and "cwd" are optional and default to COPILOT_MODEL,
+    COPILOT_TIMEOUT and PROJECT_DIR.
+    """
+    with open(path) as f:
+        entries = json.load(f)
+    base_dir = os.path.dirname(os.path.abspath(path))
+    targets = []
+    for entry in entries:
+        name = entry["name"]
+        if any(target["name"] == name for target in targets):
+            raise ValueError(f"duplicate target name: {name}")
+        targets.append({
+            "name": name,
+            "prompt": os.path.join(base_dir, entry["prompt"]),
+            "model": entry.get("model", COPILOT_MODEL),
+            "timeout": float(entry.get("timeout", COPILOT_TIMEOUT)),
+            "cwd": entry.get("cwd", PROJECT_DIR),
+        })
+    return targets
+
+
+def run_target(target: dict, timestamp: str, digest: str = "") -> dict:
+    """Run one monitor target and return its result summary."""
+    name = target["name"]
+    started = datetime.now()
+    try:
+        with open(target["prompt"]) as f:
+            prompt = f.read()
+    except Exception as e:
+        print(f"[ERROR] [{name}] Cannot read prompt {target['prompt']}: {e}")
+        return {"name": name, "status": "FAILURE", "diagnosis": f"Cannot read prompt: {e}",
+                "returncode": 1, "output_file": "", "elapsed": 0.0, "parser": None}
+    if digest:
+        prompt += f"\n\n{digest}"
     
-    for line in lines:
-        if line.startswith("STATUS:"):
-            status = line.split(":", 1)[1].strip()
-            in_diagnosis = False
-        elif line.startswith("DIAGNOSIS:"):
-            diagnosis = line.split(":", 1)[1].strip()
-            in_diagnosis = True
-        elif line.startswith("FAILED_ELEMENT:") or line.startswith("FIX_APPLIED:"):
-            in_diagnosis = False
-        elif in_diagnosis and line.strip():
-            diagnosis += " " + line.strip()
+    # No stdin when several agents share the console
+    returncode, parser = run_copilot(prompt, timestamp, model=target["model"], cwd=target["cwd"],
+                                     timeout=target["timeout"], name=name, stdin=subprocess.DEVNULL)
+    status = parser.status
+    if returncode != 0 and status == "UNKNOWN":
+        status = "FAILURE"
+    return {
+        "name": name,
+        "status": status,
+        "diagnosis": parser.diagnosis,
+        "returncode": returncode,
+        "output_file": parser.output_file,
+        "elapsed": (datetime.now() - started).total_seconds(),
+        "parser": parser,
+    }
+
+
+def run_targets(targets: list, timestamp: str, digest: str = "", concurrency: int = MONITOR_CONCURRENCY) -> list:
+    """Run targets concurrently, at most concurrency at a time; results keep the targets' order."""
+    from concurrent.futures import ThreadPoolExecutor
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+        futures = [pool.submit(run_target, target, timestamp, digest) for target in targets]
+        return [future.result() for future in futures]
+
+
+def notify_summary(results: list) -> str:
+    """
+    Send one notification summarizing all target results; returns the worst status.
+
+    Like a single-target run, nothing is sent when every target succeeded.
+    """
+    worst = max((r["status"] for r in results), key=lambda s: STATUS_SEVERITY.get(s, 1), default="UNKNOWN")
+    importance = {"FAILURE": "alert", "AUTH_REQUIRED": "warning"}.get(worst, "normal")
+    failing = [r for r in results if r["status"] != "SUCCESS"]
+    if not failing:
+        return worst
     
-    return status, diagnosis
+    lines = [f"{r['name']}: {r['status']} ({r['elapsed'] / 60:.1f} min)" for r in results]
+    details = [f"{r['name']}: {r['status']} (exit {r['returncode']})\n"
+               f"Output: {r['output_file']}\n{r['diagnosis']}" for r in results]
+    send_notification(
+        event="copilot-system-monitor",
+        subject=f"System Monitor: {len(results) - len(failing)}/{len(results)} targets OK",
+        description="; ".join(lines)[:200],
+        importance=importance,
+        message="\n\n".join(details)
+    )
+    return worst
 
 
 def main():
-    os.makedirs(LOG_DIR, exist_ok=True)
-    os.makedirs(ANALYSIS_DIR, exist_ok=True)
+    timer = PhaseTimer()
+    arg_parser = argparse.ArgumentParser(description="AI-powered system monitor")
+    arg_parser.add_argument("--targets", default=MONITOR_TARGETS,
+                            help="JSON file of monitor targets to run concurrently instead of the single prompt")
+    arg_parser.add_argument("--concurrency", type=int, default=MONITOR_CONCURRENCY,
+                            help=f"Max targets running at once (default: {MONITOR_CONCURRENCY})")
+    arg_parser.add_argument("--profile", action="store_true",
+                            help="Time the startup path (imports, subprocesses, file I/O) and exit before the agent runs")
+    arg_parser.add_argument("--install-copilot", metavar="VERSION", help=argparse.SUPPRESS)
+    args = arg_parser.parse_args()
+    
+    if args.install_copilot:
+        # Background prefetch started by ensure_copilot_version
+        return 0 if install_copilot(args.install_copilot) else 1
     
     timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    if not args.profile:
+        try:
+            return monitor(args, timestamp, timer)
+        finally:
+            timer.save(timestamp)
+    
+    with IOProfile() as io_profile:
+        returncode = monitor(args, timestamp, timer)
+    report = dict(timer.report(), io=io_profile.report())
+    # Measured in a fresh interpreter, so it is not part of the phases above
+    report["imports"] = profile_imports(["system_monitor", "context_digest"])
+    print_profile(report)
+    path = timer.save(timestamp, {"profile": True, "io": report["io"], "imports": report["imports"]})
+    print(f"\nTiming saved to: {path}")
+    return returncode
+
+
+def monitor(args, timestamp: str, timer: PhaseTimer) -> int:
+    """The monitor run itself; timer.mark() brackets each startup phase."""
+    targets = None
+    if args.targets:
+        try:
+            targets = load_targets(args.targets)
+        except Exception as e:
+            print(f"[ERROR] Failed to load monitor targets from {args.targets}: {e}")
+            return 1
+    
+    os.makedirs(LOG_DIR, exist_ok=True)
+    os.makedirs(ANALYSIS_DIR, exist_ok=True)
     
     print("=" * 60)
     print(f"[{datetime.now()}] Automated Takeout Monitor")
@@ -350,12 +1138,30 @@ def main():
     print(f"Model: {COPILOT_MODEL}")
     print("=" * 60)
     
+    # Collect system state up front; skip the agent entirely if nothing changed
+    timer.mark("context")
+    context = collect_system_context()
+    fingerprint = ""
+    if context is not None:
+        timer.mark("fingerprint")
+        from context_digest import fingerprint as context_fingerprint
+        fingerprint = context_fingerprint(context)
+        if not args.profile and check_unchanged(fingerprint):
+            store_run(timestamp, "UNCHANGED", returncode=0)
+            prune_analysis()
+            flush_notifications()
+            print(f"\n[{datetime.now()}] Monitor complete. Status: UNCHANGED")
+            return 0
+    
     # Ensure Copilot CLI version if specified
-    if not ensure_copilot_version():
+    timer.mark("version_check")
+    # --profile measures startup; it shouldn't start an npm install as a side effect
+    if not ensure_copilot_version(prefetch=not args.profile):
         print("[ERROR] Failed to ensure Copilot CLI version")
         return 1
     
     # Load GitHub token for Copilot CLI
+    timer.mark("tokens")
     if not load_github_token():
         print("[ERROR] Cannot proceed without GitHub authentication")
         return 1
@@ -364,31 +1170,66 @@ def main():
     load_ha_token()
     load_immich_api_key()
     
+    timer.mark("digest")
+    digest = build_context_digest(context)
+    
+    if args.profile:
+        # Stop where the agent would start; the rest is the agent's own time
+        timer.mark("prompt")
+        load_prompt()
+        timer.mark("trust_config")
+        trust_folders(copilot_folders(PROJECT_DIR))
+        timer.stop()
+        return 0
+    
+    if targets:
+        # Run every target against the same context, then send one summary
+        print(f"Running {len(targets)} targets (concurrency {args.concurrency}): "
+              f"{', '.join(t['name'] for t in targets)}")
+        timer.mark("agent")
+        results = run_targets(targets, timestamp, digest, args.concurrency)
+        timer.mark("report")
+        status = notify_summary(results)
+        returncode = 1 if any(r["returncode"] for r in results) else 0
+        if fingerprint:
+            record_full_run(fingerprint, status, returncode)
+        for r in results:
+            store_run(timestamp, r["status"], r["diagnosis"], r["elapsed"], r["returncode"], r["parser"], r["name"])
+        prune_analysis()
+        flush_notifications()
+        print(f"\n[{datetime.now()}] Monitor complete. Status: {status}")
+        for r in results:
+            print(f"  {r['name']}: {r['status']} (exit {r['returncode']}, {r['elapsed']:.0f}s)")
+        return returncode
+    
     # Load instructions
+    timer.mark("prompt")
     instructions = load_prompt()
     
     # Build full prompt
     full_prompt = f"{instructions}"
+    if digest:
+        full_prompt += f"\n\n{digest}"
     
     # Log prompt size
     print(f"Prompt size: {len(full_prompt)} chars")
     
-    # Hand off to Copilot
-    returncode, output = run_copilot(full_prompt, timestamp)
+    # Hand off to Copilot; failures are alerted as soon as the agent reports them
+    alerter = EarlyAlerter()
+    timer.mark("agent")
+    started = time.monotonic()
+    returncode, parser = run_copilot(full_prompt, timestamp, alerter.parser)
+    duration = time.monotonic() - started
     
-    # Parse the result and send notification if there's an issue
-    status, diagnosis = parse_status(output)
+    timer.mark("report")
+    status = parser.status
+    if fingerprint:
+        record_full_run(fingerprint, status, returncode)
+    store_run(timestamp, status, parser.diagnosis, duration, returncode, parser)
     
-    if status in ["FAILURE", "AUTH_REQUIRED"]:
-        importance = "alert" if status == "FAILURE" else "warning"
-        send_notification(
-            event="copilot-system-monitor",
-            subject=f"Takeout Script: {status}",
-            description=diagnosis[:200] if diagnosis else f"Status: {status}",
-            importance=importance,
-            message=f"The automated-takeout script reported: {status}\n\n{diagnosis}"
-        )
-    elif status == "SUCCESS":
+    # Send the final alert, or a follow-up to the early one
+    alerter.finish(returncode)
+    if status == "SUCCESS":
         # Optional: notify on success too (comment out if too noisy)
         # send_notification(
         #     event="vscode-monitor",
@@ -398,6 +1239,8 @@ def main():
         # )
         pass
     
+    prune_analysis()
+    flush_notifications()
     print(f"\n[{datetime.now()}] Monitor complete. Status: {status}")
     return returncode
 
@@ -20,10 +20,14 @@ SRC_DIR="/mnt/pool/appdata/sd-import"
 
 RULE_SRC="$SRC_DIR/99-sd-card-import.rules"
 IMPORT_SRC="$SRC_DIR/sd-card-import.sh"
+INGEST_SRC="$SRC_DIR/sd_ingest.py"
+MEDIA_INDEX_SRC="$SRC_DIR/media_index.py"
 UPLOAD_SRC="$SRC_DIR/immich-go-upload.sh"
 
 [ -f "$RULE_SRC" ] || die "Missing udev rule: $RULE_SRC"
 [ -f "$IMPORT_SRC" ] || die "Missing import script: $IMPORT_SRC"
+[ -f "$INGEST_SRC" ] || die "Missing ingest engine: $INGEST_SRC"
+[ -f "$MEDIA_INDEX_SRC" ] || die "Missing media index: $MEDIA_INDEX_SRC"
 [ -f "$UPLOAD_SRC" ] || die "Missing upload script: $UPLOAD_SRC"
 
 log "Using source dir: $SRC_DIR"
@@ -59,7 +63,7 @@ ln -sf "$UPLOAD_SRC" /usr/local/bin/immich-go-upload
 
 # 3) Ensure executables
 log "Ensuring scripts are executable"
-chmod +x "$IMPORT_SRC" "$UPLOAD_SRC"
+chmod +x "$IMPORT_SRC" "$INGEST_SRC" "$UPLOAD_SRC"
 chmod +x /root/phome/boot.d/60-sd-import-install.sh || true
 chmod +x /usr/local/bin/install-sd-import /usr/local/bin/sd-card-import.sh /usr/local/bin/sd-card-import /usr/local/bin/immich-go-upload || true
 
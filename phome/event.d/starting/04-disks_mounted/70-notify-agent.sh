@@ -0,0 +1,29 @@
+#!/bin/bash
+# Start the host-side notify agent used by the copilot-system-monitor container
+# The container reaches it through the bind-mounted /var/run/notify-agent directory
+
+. app-envs 2>/dev/null
+UNRAID_SCRIPTS_DIR="${UNRAID_SCRIPTS_DIR:-/mnt/pool/appdata/unraid-scripts}"
+AGENT="$UNRAID_SCRIPTS_DIR/ai-system-monitor/notify_agent.py"
+AGENT_LOG="/var/log/notify-agent.log"
+SOCKET="/var/run/notify-agent/notify.sock"
+
+if [ ! -f "$AGENT" ]; then
+    echo "ERROR: notify agent not found: $AGENT" >&2
+    exit 1
+fi
+
+if pgrep -f "notify_agent.py.* serve" > /dev/null; then
+    echo "notify agent already running (PID: $(pgrep -f 'notify_agent.py.* serve'))"
+    exit 0
+fi
+
+echo "Starting notify agent on $SOCKET..."
+nohup python3 "$AGENT" --socket "$SOCKET" serve >> "$AGENT_LOG" 2>&1 &
+sleep 1
+
+if [ -S "$SOCKET" ]; then
+    echo "notify agent started successfully"
+else
+    echo "WARNING: notify agent may have failed to start. Check $AGENT_LOG"
+fi
@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+Classify running containers by their mounts and stop the array-backed ones.
+
+All running containers and their mounts come from one Docker API call over
+/var/run/docker.sock (falling back to one bulk `docker inspect`), and are
+classified in-process:
+
+- keep: every mount is outside /mnt, or on a cache-only share
+  (/mnt/<anything>/appdata, /mnt/<anything>/vmdrive)
+- stop: any other /mnt path, e.g. /mnt/user/media or /mnt/disk1/data
+
+Bind sources that aren't array paths themselves are resolved with realpath,
+so a symlink such as /mnt/pool/appdata/app/media -> /mnt/user/media still
+counts as an array mount.
+
+The array-backed set is stopped in parallel by a bounded worker pool. Each
+stop gets CONTAINER_STOP_TIMEOUT seconds, but never past the global
+CONTAINER_STOP_DEADLINE; whatever is still running at the deadline is killed
+so the array can go down.
+
+Usage:
+    python3 container_mounts.py status [--json]
+    python3 container_mounts.py stop [--dry-run] [--workers N] [--deadline SECONDS]
+
+Environment:
+    CACHE_SHARES             Colon-separated cache-only share names (default "appdata:vmdrive")
+    CONTAINER_STOP_WORKERS   Parallel stops (default 8)
+    CONTAINER_STOP_TIMEOUT   Per-container grace period in seconds (default 30)
+    CONTAINER_STOP_DEADLINE  Overall time budget in seconds (default 120)
+"""
+import argparse
+import http.client
+import json
+import os
+import re
+import socket
+import subprocess
+import sys
+import syslog
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+DOCKER_SOCKET = os.getenv("DOCKER_SOCKET", "/var/run/docker.sock")
+CACHE_SHARES = [s for s in os.getenv("CACHE_SHARES", "appdata:vmdrive").split(":") if s]
+CONTAINER_STOP_WORKERS = int(os.getenv("CONTAINER_STOP_WORKERS", "8"))
+CONTAINER_STOP_TIMEOUT = int(os.getenv("CONTAINER_STOP_TIMEOUT", "30"))
+CONTAINER_STOP_DEADLINE = float(os.getenv("CONTAINER_STOP_DEADLINE", "120"))
+
+_CACHE_PATH = re.compile(r"^/mnt/[^/]+/(" + "|".join(map(re.escape, CACHE_SHARES)) + r")(/|$)")
+
+
+def log(message: str):
+    print(message, flush=True)
+    syslog.syslog(message)
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, path: str, timeout: float = 10):
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
+def _containers_from_socket(path: str = DOCKER_SOCKET) -> list:
+    conn = _UnixHTTPConnection(path)
+    try:
+        conn.request("GET", "/containers/json")
+        response = conn.getresponse()
+        body = response.read()
+    finally:
+        conn.close()
+    if response.status != 200:
+        raise OSError(f"Docker API returned {response.status}")
+    return [{
+        "id": c["Id"],
+        "name": (c.get("Names") or [c["Id"][:12]])[0].lstrip("/"),
+        "mounts": [m.get("Source", "") for m in c.get("Mounts") or []],
+    } for c in json.loads(body)]
+
+
+def _containers_from_cli() -> list:
+    ids = subprocess.run(["docker", "ps", "-q", "--no-trunc"], capture_output=True, text=True,
+                         timeout=30, check=True).stdout.split()
+    if not ids:
+        return []
+    inspected = json.loads(subprocess.run(["docker", "inspect", *ids], capture_output=True, text=True,
+                                          timeout=60, check=True).stdout)
+    return [{
+        "id": c["Id"],
+        "name": c.get("Name", c["Id"][:12]).lstrip("/"),
+        "mounts": [m.get("Source", "") for m in c.get("Mounts") or []],
+    } for c in inspected]
+
+
+def running_containers() -> list:
+    """Return [{id, name, mounts}] for all running containers."""
+    try:
+        return _containers_from_socket()
+    except (OSError, ValueError, http.client.HTTPException) as e:
+        print(f"[WARN] Docker socket query failed ({e}); using docker inspect")
+        return _containers_from_cli()
+
+
+def is_array_path(path: str) -> bool:
+    return path.startswith("/mnt/") and not _CACHE_PATH.match(path)
+
+
+def array_mounts(mounts: list) -> list:
+    """Return the mounts that live on the array, as 'source' or 'source -> resolved'."""
+    found = []
+    for source in mounts:
+        if not source:
+            continue
+        if is_array_path(source):
+            found.append(source)
+            continue
+        # Not an array path as written, but it may be a symlink into one
+        resolved = os.path.realpath(source)
+        if resolved != source and is_array_path(resolved):
+            found.append(f"{source} -> {resolved}")
+    return found
+
+
+def classify(containers: list) -> tuple:
+    """Split containers into (keep, stop); stop entries get an 'array_mounts' list."""
+    keep, stop = [], []
+    for container in sorted(containers, key=lambda c: c["name"]):
+        mounts = array_mounts(container["mounts"])
+        if mounts:
+            stop.append(dict(container, array_mounts=mounts))
+        else:
+            keep.append(container)
+    return keep, stop
+
+
+def stop_containers(containers: list, workers: int = CONTAINER_STOP_WORKERS,
+                    timeout: int = CONTAINER_STOP_TIMEOUT, deadline: float = CONTAINER_STOP_DEADLINE) -> dict:
+    """
+    Stop containers in parallel within an overall deadline.
+
+    Returns {name: "stopped" | "killed" | "failed: ..."}. Containers whose
+    stop didn't finish (or start) before the deadline are killed.
+    """
+    end = time.monotonic() + deadline
+    results = {}
+
+    def stop(container):
+        remaining = end - time.monotonic()
+        if remaining <= 1:
+            return container, None
+        grace = max(1, min(timeout, int(remaining) - 1))
+        log(f"Stopping container {container['name']} (has array mounts)")
+        try:
+            result = subprocess.run(["docker", "stop", "-t", str(grace), container["id"]],
+                                    capture_output=True, text=True, timeout=remaining)
+        except subprocess.TimeoutExpired:
+            return container, None
+        if result.returncode != 0:
+            return container, f"failed: {result.stderr.strip() or result.returncode}"
+        return container, "stopped"
+
+    leftovers = []
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        for container, outcome in pool.map(stop, containers):
+            if outcome is None:
+                leftovers.append(container)
+            else:
+                results[container["name"]] = outcome
+
+    if leftovers:
+        log(f"Stop deadline ({deadline:.0f}s) reached; killing {', '.join(c['name'] for c in leftovers)}")
+        try:
+            result = subprocess.run(["docker", "kill", *(c["id"] for c in leftovers)],
+                                    capture_output=True, text=True, timeout=60)
+            outcome = "killed" if result.returncode == 0 else f"failed: kill {result.stderr.strip() or result.returncode}"
+        except subprocess.TimeoutExpired:
+            outcome = "failed: kill timed out"
+        except OSError as e:
+            outcome = f"failed: kill {e}"
+        for container in leftovers:
+            results[container["name"]] = outcome
+    return results
+
+
+def print_status(keep: list, stop: list):
+    print(f"Total running: {len(keep) + len(stop)}")
+    print("")
+    print("Would KEEP running (cache pool only):")
+    for container in keep:
+        print(f"  ✓ {container['name']}")
+    print("")
+    print("Would STOP (has array mounts):")
+    for container in stop:
+        print(f"  ⏹ {container['name']}")
+        for mount in container["array_mounts"]:
+            print(f"      → {mount}")
+    print("")
+    print(f"Summary: {len(keep)} would keep running, {len(stop)} would stop")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Classify containers by array mounts and stop array-backed ones")
+    sub = parser.add_subparsers(dest="command", required=True)
+    status = sub.add_parser("status", help="Show which containers would keep running or stop")
+    status.add_argument("--json", action="store_true", help="Print the classification as JSON")
+    stop = sub.add_parser("stop", help="Stop containers with array mounts")
+    stop.add_argument("--dry-run", "-n", action="store_true", help="Only list what would be stopped")
+    stop.add_argument("--workers", type=int, default=CONTAINER_STOP_WORKERS, help="Parallel stops")
+    stop.add_argument("--timeout", type=int, default=CONTAINER_STOP_TIMEOUT, help="Per-container grace period")
+    stop.add_argument("--deadline", type=float, default=CONTAINER_STOP_DEADLINE, help="Overall time budget")
+    args = parser.parse_args()
+
+    if args.command == "stop":
+        syslog.syslog("Checking for containers with array mounts...")
+    try:
+        keep, stop_list = classify(running_containers())
+    except (OSError, ValueError, subprocess.SubprocessError) as e:
+        log(f"[ERROR] Cannot list containers: {e}")
+        return 1
+
+    if args.command == "status":
+        if args.json:
+            print(json.dumps({"keep": [c["name"] for c in keep],
+                              "stop": {c["name"]: c["array_mounts"] for c in stop_list}}, indent=2))
+        else:
+            print_status(keep, stop_list)
+        return 0
+
+    if not stop_list:
+        print("No containers need to be stopped (all use cache pool only)")
+        syslog.syslog("No containers with array mounts found")
+        return 0
+    for container in stop_list:
+        syslog.syslog(f"Container {container['name']} has array mount: {container['array_mounts'][0]}")
+    if args.dry_run:
+        print_status(keep, stop_list)
+        return 0
+
+    print(f"Stopping {len(stop_list)} containers with array mounts ({args.workers} at a time):")
+    started = time.monotonic()
+    results = stop_containers(stop_list, args.workers, args.timeout, args.deadline)
+    for name, outcome in results.items():
+        print(f"  - {name}: {outcome}")
+    log(f"Stopped {sum(o == 'stopped' for o in results.values())}/{len(results)} array containers "
+        f"in {time.monotonic() - started:.0f}s")
+    return 0 if all(o in ("stopped", "killed") for o in results.values()) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
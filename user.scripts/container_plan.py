@@ -0,0 +1,356 @@
+#!/usr/bin/env python3
+"""
+Dependency-ordered, wave-parallel container stop/start for array restarts.
+
+Builds a dependency graph of all containers from one bulk `docker inspect`:
+
+- compose depends_on (the com.docker.compose.depends_on label)
+- network_mode: container:<name> (a VPN container and everything routed through it)
+- volumes_from and legacy --link
+- shared named volumes: containers mounting a volume read-only depend on
+  the ones mounting it read-write
+
+Containers are grouped into waves by dependency depth: stop waves take
+dependents first, start waves take dependencies first, and every
+container in a wave is stopped/started at once, so a restart takes about
+as long as the deepest dependency chain rather than the container count.
+
+Usage:
+    python3 container_plan.py plan [stop|start] [NAMES ...]   # Print the wave plan only
+    python3 container_plan.py stop [--save] [--array-only] [--dry-run] [NAMES ...]
+    python3 container_plan.py start [--dry-run] [NAMES ...]
+
+stop defaults to every running container (--array-only: those with array
+mounts, per cache-services-independent/container_mounts.py, plus anything
+depending on them); --save records the stopped set for the next start.
+start defaults to that saved set, or else Unraid's autostart list.
+
+Environment:
+    CONTAINER_PLAN_STATE    Where stop --save records the stopped containers
+    CONTAINER_STOP_TIMEOUT  Grace period per container in seconds (default 30)
+    CONTAINER_PLAN_WORKERS  Max parallel docker calls per wave (default 16)
+    CONTAINER_HEALTH_WAIT   Seconds to wait for a healthcheck before starting dependents (default 60)
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# /var/tmp is in RAM on Unraid: survives an array restart, not a reboot
+CONTAINER_PLAN_STATE = os.getenv("CONTAINER_PLAN_STATE", "/var/tmp/array_containers.json")
+UNRAID_AUTOSTART = "/var/lib/docker/unraid-autostart"
+CONTAINER_STOP_TIMEOUT = int(os.getenv("CONTAINER_STOP_TIMEOUT", "30"))
+CONTAINER_PLAN_WORKERS = int(os.getenv("CONTAINER_PLAN_WORKERS", "16"))
+CONTAINER_HEALTH_WAIT = float(os.getenv("CONTAINER_HEALTH_WAIT", "60"))
+
+
+def log(message: str):
+    print(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] {message}", flush=True)
+
+
+def _docker(*args, timeout: float = 60) -> subprocess.CompletedProcess:
+    return subprocess.run(["docker", *args], capture_output=True, text=True, timeout=timeout)
+
+
+def inspect_all() -> list:
+    """Return the docker inspect output for every container, in two docker calls."""
+    ids = _docker("ps", "-aq", "--no-trunc").stdout.split()
+    if not ids:
+        return []
+    result = _docker("inspect", *ids)
+    if result.returncode != 0 and not result.stdout.strip():
+        raise RuntimeError(result.stderr.strip() or "docker inspect failed")
+    return json.loads(result.stdout)
+
+
+def build_graph(inspected: list) -> tuple:
+    """
+    Return (containers, deps): containers maps name -> inspect data and
+    deps maps name -> set of container names it depends on.
+    """
+    containers = {c["Name"].lstrip("/"): c for c in inspected}
+    by_id = {c["Id"]: name for name, c in containers.items()}
+    services = {}
+    for name, c in containers.items():
+        labels = c.get("Config", {}).get("Labels") or {}
+        if "com.docker.compose.service" in labels:
+            key = (labels.get("com.docker.compose.project"), labels["com.docker.compose.service"])
+            services.setdefault(key, []).append(name)
+
+    def resolve(ref: str):
+        ref = ref.lstrip("/")
+        if ref in containers:
+            return ref
+        # Full or abbreviated container ID
+        return next((name for cid, name in by_id.items() if cid.startswith(ref)), None) if len(ref) >= 12 else None
+
+    deps = {name: set() for name in containers}
+    volume_writers, volume_readers = {}, {}
+    for name, c in containers.items():
+        labels = c.get("Config", {}).get("Labels") or {}
+        host = c.get("HostConfig") or {}
+
+        # "db:service_healthy:false,cache:service_started:false"
+        for entry in filter(None, labels.get("com.docker.compose.depends_on", "").split(",")):
+            service = entry.split(":")[0]
+            deps[name].update(services.get((labels.get("com.docker.compose.project"), service), []))
+
+        network_mode = host.get("NetworkMode") or ""
+        if network_mode.startswith("container:"):
+            target = resolve(network_mode[len("container:"):])
+            if target:
+                deps[name].add(target)
+
+        for ref in host.get("VolumesFrom") or []:
+            target = resolve(ref.split(":")[0])
+            if target:
+                deps[name].add(target)
+        for link in host.get("Links") or []:
+            target = resolve(link.split(":")[0])
+            if target:
+                deps[name].add(target)
+
+        for mount in c.get("Mounts") or []:
+            if mount.get("Type") == "volume" and mount.get("Name"):
+                (volume_writers if mount.get("RW", True) else volume_readers).setdefault(mount["Name"], set()).add(name)
+
+    for volume, readers in volume_readers.items():
+        for reader in readers:
+            deps[reader].update(volume_writers.get(volume, set()) - {reader})
+    for name in deps:
+        deps[name].discard(name)
+    return containers, deps
+
+
+def closure(names: set, edges: dict) -> set:
+    """Return names plus everything reachable from them through edges."""
+    result = set(names)
+    stack = list(names)
+    while stack:
+        for other in edges.get(stack.pop(), ()):
+            if other not in result:
+                result.add(other)
+                stack.append(other)
+    return result
+
+
+def waves(names: set, deps: dict) -> list:
+    """
+    Group names into waves where each name comes after everything in
+    deps[name] (entries outside `names` are ignored). Pass dependencies
+    for start order, dependents for stop order. Names caught in a cycle
+    go into one final wave.
+    """
+    remaining = {name: deps.get(name, set()) & names for name in names}
+    plan = []
+    while remaining:
+        ready = sorted(name for name, pending in remaining.items() if not pending)
+        if not ready:
+            log(f"[WARN] Dependency cycle between: {', '.join(sorted(remaining))}")
+            plan.append(sorted(remaining))
+            break
+        plan.append(ready)
+        for name in ready:
+            del remaining[name]
+        for pending in remaining.values():
+            pending.difference_update(ready)
+    return plan
+
+
+def dependents_of(deps: dict) -> dict:
+    reverse = {name: set() for name in deps}
+    for name, targets in deps.items():
+        for target in targets:
+            reverse.setdefault(target, set()).add(name)
+    return reverse
+
+
+def is_running(container: dict) -> bool:
+    return bool(container.get("State", {}).get("Running"))
+
+
+def print_plan(plan: list, action: str, deps: dict):
+    print(f"{action.capitalize()} plan: {sum(len(w) for w in plan)} containers in {len(plan)} waves")
+    for i, wave in enumerate(plan, 1):
+        print(f"  Wave {i}:")
+        for name in wave:
+            after = sorted(deps.get(name, ()))
+            print(f"    {name}" + (f"  (depends on {', '.join(after)})" if after else ""))
+
+
+def _run_wave(wave: list, fn, workers: int) -> dict:
+    def run(name):
+        # A hung or missing docker CLI fails this container, not the rest of the plan
+        try:
+            return fn(name)
+        except subprocess.TimeoutExpired as e:
+            return subprocess.CompletedProcess(e.cmd, 1, "", f"timed out after {e.timeout:.0f}s")
+        except OSError as e:
+            return subprocess.CompletedProcess(name, 1, "", str(e))
+
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(wave)))) as pool:
+        return dict(zip(wave, pool.map(run, wave)))
+
+
+def stop_waves(plan: list, timeout: int = CONTAINER_STOP_TIMEOUT, workers: int = CONTAINER_PLAN_WORKERS) -> list:
+    """Stop the waves in order; returns the names that failed to stop."""
+    failed = []
+
+    def stop(name):
+        return _docker("stop", "-t", str(timeout), name, timeout=timeout + 30)
+
+    for i, wave in enumerate(plan, 1):
+        started = time.monotonic()
+        log(f"Stop wave {i}/{len(plan)}: {', '.join(wave)}")
+        for name, result in _run_wave(wave, stop, workers).items():
+            if result.returncode != 0:
+                log(f"[ERROR] {name}: {result.stderr.strip()}")
+                failed.append(name)
+        log(f"Stop wave {i} done in {time.monotonic() - started:.1f}s")
+    return failed
+
+
+def wait_healthy(names: list, deadline: float):
+    """Wait until containers with a healthcheck report healthy, or the deadline passes."""
+    pending = list(names)
+    while pending and time.monotonic() < deadline:
+        try:
+            result = _docker("inspect", "--format", "{{.Name}} {{if .State.Health}}{{.State.Health.Status}}{{end}}",
+                             *pending)
+        except (subprocess.TimeoutExpired, OSError) as e:
+            log(f"[WARN] Health check failed ({e})")
+            break
+        pending = [line.split()[0].lstrip("/") for line in result.stdout.splitlines()
+                   if len(line.split()) > 1 and line.split()[1] != "healthy"]
+        if pending:
+            time.sleep(2)
+    if pending:
+        log(f"[WARN] Not healthy yet, starting dependents anyway: {', '.join(pending)}")
+
+
+def start_waves(plan: list, deps: dict, containers: dict, workers: int = CONTAINER_PLAN_WORKERS,
+                health_wait: float = CONTAINER_HEALTH_WAIT) -> list:
+    """Start the waves in order; returns the names that failed to start."""
+    failed = []
+    dependents = dependents_of(deps)
+
+    def start(name):
+        return _docker("start", name)
+
+    for i, wave in enumerate(plan, 1):
+        started = time.monotonic()
+        log(f"Start wave {i}/{len(plan)}: {', '.join(wave)}")
+        for name, result in _run_wave(wave, start, workers).items():
+            if result.returncode != 0:
+                log(f"[ERROR] {name}: {result.stderr.strip()}")
+                failed.append(name)
+        # Dependents of a container with a healthcheck wait for it to pass, like compose's service_healthy
+        gating = [name for name in wave if name not in failed and dependents.get(name)
+                  and (containers[name].get("Config", {}).get("Healthcheck") or {}).get("Test", ["NONE"])[0] != "NONE"]
+        if gating and i < len(plan):
+            wait_healthy(gating, time.monotonic() + health_wait)
+        log(f"Start wave {i} done in {time.monotonic() - started:.1f}s")
+    return failed
+
+
+def load_start_set(path: str = CONTAINER_PLAN_STATE) -> list:
+    """Containers recorded by the last stop --save, else Unraid's autostart list."""
+    try:
+        with open(path) as f:
+            return json.load(f)["containers"]
+    except (OSError, ValueError, KeyError):
+        pass
+    try:
+        with open(UNRAID_AUTOSTART) as f:
+            # "name [wait seconds]" per line
+            return [line.split()[0] for line in f if line.strip()]
+    except OSError:
+        return []
+
+
+def array_only(containers: dict) -> set:
+    """Running containers with array mounts, classified by cache-services-independent."""
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.realpath(__file__)), "cache-services-independent"))
+    from container_mounts import array_mounts
+    return {name for name, c in containers.items()
+            if is_running(c) and array_mounts([m.get("Source", "") for m in c.get("Mounts") or []])}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Dependency-ordered parallel container stop/start")
+    sub = parser.add_subparsers(dest="command", required=True)
+    plan_cmd = sub.add_parser("plan", help="Print the wave plan without touching containers")
+    plan_cmd.add_argument("action", nargs="?", choices=["stop", "start"], default="stop")
+    plan_cmd.add_argument("names", nargs="*", help="Containers (default: as for stop/start)")
+    plan_cmd.add_argument("--array-only", action="store_true", help="For stop: only containers with array mounts")
+    stop_cmd = sub.add_parser("stop", help="Stop containers, dependents first")
+    stop_cmd.add_argument("names", nargs="*", help="Containers to stop (default: all running)")
+    stop_cmd.add_argument("--array-only", action="store_true", help="Only containers with array mounts")
+    stop_cmd.add_argument("--save", action="store_true", help=f"Record the stopped set in {CONTAINER_PLAN_STATE}")
+    stop_cmd.add_argument("--timeout", type=int, default=CONTAINER_STOP_TIMEOUT, help="Grace period per container")
+    stop_cmd.add_argument("--dry-run", "-n", action="store_true", help="Print the plan only")
+    start_cmd = sub.add_parser("start", help="Start containers, dependencies first")
+    start_cmd.add_argument("names", nargs="*", help="Containers to start (default: saved set or autostart list)")
+    start_cmd.add_argument("--dry-run", "-n", action="store_true", help="Print the plan only")
+    args = parser.parse_args()
+
+    try:
+        containers, deps = build_graph(inspect_all())
+    except (OSError, ValueError, RuntimeError, subprocess.SubprocessError) as e:
+        log(f"[ERROR] Cannot inspect containers: {e}")
+        return 1
+    action = args.action if args.command == "plan" else args.command
+    dry_run = args.command == "plan" or args.dry_run
+
+    unknown = [name for name in args.names if name not in containers]
+    if unknown:
+        log(f"[WARN] Unknown containers ignored: {', '.join(unknown)}")
+    requested = {name for name in args.names if name in containers}
+
+    if action == "stop":
+        if args.names:
+            selected = requested
+        elif args.array_only:
+            selected = array_only(containers)
+        else:
+            selected = {name for name, c in containers.items() if is_running(c)}
+        # Anything running that depends on a stopped container has to go first
+        selected = {name for name in closure(selected, dependents_of(deps)) if is_running(containers[name])}
+    else:
+        wanted = requested or {name for name in load_start_set() if name in containers}
+        # Stopped dependencies come up first
+        selected = {name for name in closure(wanted, deps) if not is_running(containers[name])}
+
+    # A container stops once nothing still running depends on it, and starts once its dependencies have
+    plan = waves(selected, dependents_of(deps) if action == "stop" else deps)
+    if not plan:
+        log(f"Nothing to {action}")
+        return 0
+    print_plan(plan, action, {n: deps[n] & selected for n in selected})
+    if dry_run:
+        return 0
+
+    started = time.monotonic()
+    if action == "stop":
+        if args.save:
+            os.makedirs(os.path.dirname(CONTAINER_PLAN_STATE) or ".", exist_ok=True)
+            with open(CONTAINER_PLAN_STATE, "w") as f:
+                json.dump({"stopped_at": time.time(), "containers": sorted(selected)}, f, indent=2)
+        failed = stop_waves(plan, args.timeout)
+    else:
+        failed = start_waves(plan, deps, containers)
+        if not args.names and not failed:
+            try:
+                os.remove(CONTAINER_PLAN_STATE)
+            except OSError:
+                pass
+    log(f"{'Stopped' if action == 'stop' else 'Started'} {len(selected) - len(failed)}/{len(selected)} containers "
+        f"in {len(plan)} waves ({time.monotonic() - started:.1f}s)")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Delete .DS_Store files from the array and pools.
+
+Refreshes the shared scan index (../scan_index) for each /mnt/diskN and
+pool directly (not the /mnt/user FUSE share), one walker per disk, then
+unlinks the .DS_Store files the index lists. The index only re-reads
+directories whose mtime changed since its last refresh, so a sweep over
+disks that haven't changed reads no directory contents.
+
+Usage:
+    python3 ds_store_sweep.py [--dry-run] [--skip SHARE/PATH ...] [--no-cache]
+    python3 ds_store_sweep.py --roots /mnt/disk1 /mnt/cache --dry-run
+
+Environment:
+    DS_STORE_SKIP  Colon-separated share-relative paths to skip (e.g. "appdata:system")
+    SCAN_INDEX_DB  Scan index database (see scan_index.py)
+"""
+import argparse
+import os
+import sqlite3
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.realpath(__file__)), "..", "scan_index"))
+from scan_index import SCAN_INDEX_DB, ScanIndex, find_roots  # noqa: E402
+
+TARGET_NAMES = [".DS_Store"]
+MNT = "/mnt"
+DS_STORE_SKIP = [p for p in os.getenv("DS_STORE_SKIP", "").split(":") if p]
+
+
+def normalize_skip(paths: list) -> set:
+    """Turn /mnt/user/<share>/..., /mnt/diskN/<share>/... or <share>/... into share-relative paths."""
+    skip = set()
+    for path in paths:
+        path = path.rstrip("/")
+        if path.startswith(MNT + "/"):
+            # Drop /mnt/<user|diskN|pool>/
+            path = path[len(MNT) + 1:].partition("/")[2]
+        if path:
+            skip.add(path.strip("/"))
+    return skip
+
+
+def sweep(roots: list, skip: set, index: ScanIndex, dry_run: bool = False, full: bool = False) -> list:
+    """Refresh the index for all roots in parallel and delete what it lists; returns per-root stats."""
+    results = index.refresh(roots, skip, full=full)
+    for stats in results:
+        stats.update(found=0, deleted=0, bytes=0)
+        if stats.get("failed"):
+            continue
+        for path, size, _ in index.find(TARGET_NAMES, under=stats["root"], skip=skip):
+            stats["found"] += 1
+            stats["bytes"] += size
+            if dry_run:
+                print(f"Would delete: {path}")
+                continue
+            try:
+                os.unlink(path)
+                stats["deleted"] += 1
+            except FileNotFoundError:
+                # Already gone; the next refresh drops it from the index
+                stats["found"] -= 1
+                stats["bytes"] -= size
+            except OSError as e:
+                print(f"Failed to delete {path}: {e}")
+                stats["errors"] += 1
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Delete .DS_Store files from array disks and pools")
+    parser.add_argument("--roots", nargs="+", help="Disks/pools to sweep (default: all under /mnt)")
+    parser.add_argument("--skip", action="append", default=[],
+                        help="Share-relative path to skip, e.g. appdata or Media/Backups (repeatable)")
+    parser.add_argument("--dry-run", "-n", action="store_true", help="Report matches without deleting")
+    parser.add_argument("--no-cache", action="store_true", help="Read every directory, ignoring the index's mtimes")
+    parser.add_argument("--index", default=SCAN_INDEX_DB, help=f"Scan index database (default: {SCAN_INDEX_DB})")
+    args = parser.parse_args()
+
+    roots = args.roots or find_roots()
+    if not roots:
+        print("No disks or pools found under /mnt")
+        return 1
+    skip = normalize_skip(DS_STORE_SKIP + args.skip)
+
+    print(f"{'Searching for' if args.dry_run else 'Searching for (and deleting)'} .DS_Store files on: {', '.join(roots)}")
+    if skip:
+        print(f"Skipping: {', '.join(sorted(skip))}")
+    try:
+        results = sweep(roots, skip, ScanIndex(args.index), args.dry_run, args.no_cache)
+    except (OSError, sqlite3.Error) as e:
+        print(f"[ERROR] Scan index refresh failed: {e}")
+        return 1
+
+    total_found = total_deleted = total_bytes = errors = 0
+    for stats in results:
+        print(f"  {stats['root']}: {stats['found']} found, {stats['deleted']} deleted, "
+              f"{stats['dirs_read']} dirs read, {stats['dirs_cached']} unchanged ({stats['elapsed']:.1f}s)")
+        total_found += stats["found"]
+        total_deleted += stats["deleted"]
+        total_bytes += stats["bytes"]
+        errors += stats["errors"]
+    verb = "would be deleted" if args.dry_run else "deleted"
+    count = total_found if args.dry_run else total_deleted
+    print(f"Done: {count} .DS_Store files {verb} ({total_bytes / 1024:.0f} KB), {errors} errors")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -51,6 +51,8 @@ if [[ "$STATE" != "STARTED" ]]; then
     sleep 30
     STATE=$(mdcmd status 2>/dev/null | grep "^mdState=" | cut -d= -f2)
     echo "[$(date)] Array state after start attempt: $STATE" >> "$LOG"
+    # Containers the main process stopped (no-op if it already started them)
+    python3 /boot/config/plugins/user.scripts/scripts/container_plan.py start >> "$LOG" 2>&1
 else
     echo "[$(date)] Array already started, no action needed" >> "$LOG"
 fi
@@ -68,6 +70,13 @@ nohup setsid bash -c '
 LOG="/boot/logs/failsafe-main.log"
 echo "[$(date)] Main restart process started" >> "$LOG"
 
+# Stop containers in dependency-ordered parallel waves, recording them for the start
+CONTAINER_PLAN=/boot/config/plugins/user.scripts/scripts/container_plan.py
+PLAN_ARGS=""
+grep -qE "PATCHED: Keep Docker running|Prevents array-stop" /etc/rc.d/rc.docker 2>/dev/null && PLAN_ARGS="--array-only"
+echo "[$(date)] Stopping containers..." >> "$LOG"
+python3 "$CONTAINER_PLAN" stop --save $PLAN_ARGS >> "$LOG" 2>&1
+
 # Stop array
 echo "[$(date)] Stopping array..." >> "$LOG"
 mdcmd stop >> "$LOG" 2>&1
@@ -95,6 +104,11 @@ for attempt in {1..5}; do
         STATE=$(mdcmd status 2>/dev/null | grep "^mdState=" | cut -d= -f2)
         if [[ "$STATE" == "STARTED" ]]; then
             echo "[$(date)] ✓ Array started successfully!" >> "$LOG"
+            for j in {1..30}; do
+                docker info >/dev/null 2>&1 && break
+                sleep 2
+            done
+            python3 "$CONTAINER_PLAN" start >> "$LOG" 2>&1
             echo "[$(date)] Removing failsafe at jobs..." >> "$LOG"
             atq | awk "{print \$1}" | xargs -r atrm 2>/dev/null
             exit 0
@@ -2,14 +2,46 @@
 """
 Resume all paused jobs in Immich.
 Can be run standalone or imported as a module.
+
+Other scripts that talk to Immich can share the keep-alive client:
+    from immich_jobs import get_client
+    client = get_client(server_url, api_key)
+    client.get_jobs_status()
 """
+import hashlib
+import http.client
 import json
 import os
+import signal
+import socket
+import subprocess
 import sys
-import urllib.request
+import threading
+import time
 import urllib.error
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 
+# Max concurrent job commands sent by pause_all_jobs / resume_all_jobs
+DEFAULT_WORKERS = int(os.getenv("IMMICH_JOB_WORKERS", "8"))
+
+# Docker Engine API socket used by --wait; falls back to polling `docker ps` without it
+DOCKER_SOCKET = os.getenv("DOCKER_SOCKET", "/var/run/docker.sock")
+IMPORT_CONTAINER = "immich-import"
+
+# Queues the throttle pauses first (heaviest first) and resumes last
+HEAVY_QUEUES = [
+    'thumbnailGeneration',
+    'smartSearch',
+    'videoConversion',
+    'faceDetection',
+    'facialRecognition',
+    'duplicateDetection',
+    'ocr',
+    'metadataExtraction',
+]
+
 
 def get_api_key(api_key_file: str = None) -> str:
     """Get the Immich API key from file or environment."""
@@ -39,117 +71,582 @@ def get_api_key(api_key_file: str = None) -> str:
     raise ValueError("No API key found. Set IMMICH_API_KEY or provide key file.")
 
 
+_RETRYABLE_ERRORS = (
+    http.client.RemoteDisconnected,
+    http.client.CannotSendRequest,
+    http.client.ImproperConnectionState,
+    ConnectionResetError,
+    ConnectionAbortedError,
+    BrokenPipeError,
+)
+
+
+class ImmichClient:
+    """
+    Keep-alive client for the Immich API.
+
+    Holds a small pool of persistent http.client connections to one server so
+    repeated calls reuse sockets instead of paying a TCP handshake each time.
+    A connection the server has dropped is replaced transparently. The pool is
+    thread-safe, so the concurrent pause/resume fan-out can share one client.
+    """
+
+    def __init__(self, server_url: str, api_key: str, timeout: float = 30,
+                 max_connections: int = DEFAULT_WORKERS):
+        self.server_url = server_url.rstrip('/')
+        self.api_key = api_key
+        self.timeout = timeout
+        self.max_connections = max(1, max_connections)
+
+        parsed = urllib.parse.urlsplit(self.server_url)
+        if parsed.scheme not in ('http', 'https') or not parsed.hostname:
+            raise ValueError(f"Invalid Immich server URL: {server_url}")
+        self._connection_class = (
+            http.client.HTTPSConnection if parsed.scheme == 'https' else http.client.HTTPConnection
+        )
+        self._host = parsed.hostname
+        self._port = parsed.port
+        self._base_path = parsed.path.rstrip('/')
+
+        self._idle = []
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        """Close all idle pooled connections."""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+
+    def _acquire(self) -> tuple:
+        """Return (connection, reused) from the pool, opening a new one if empty."""
+        with self._lock:
+            if self._idle:
+                return self._idle.pop(), True
+        return self._connection_class(self._host, self._port, timeout=self.timeout), False
+
+    def _release(self, conn):
+        with self._lock:
+            if len(self._idle) < self.max_connections:
+                self._idle.append(conn)
+                return
+        conn.close()
+
+    def send(self, method: str, path: str, payload: dict = None, headers: dict = None) -> tuple:
+        """
+        Send a request and return (status, response headers, raw body).
+
+        Raises urllib.error.HTTPError for 4xx/5xx responses.
+        """
+        request_headers = {
+            'x-api-key': self.api_key,
+            'Accept': 'application/json',
+            'Connection': 'keep-alive'
+        }
+        if headers:
+            request_headers.update(headers)
+        data = None
+        if payload is not None:
+            data = json.dumps(payload).encode('utf-8')
+            request_headers['Content-Type'] = 'application/json'
+
+        url = f"{self._base_path}{path}"
+        while True:
+            conn, reused = self._acquire()
+            try:
+                conn.request(method, url, body=data, headers=request_headers)
+                response = conn.getresponse()
+                body = response.read()
+            except _RETRYABLE_ERRORS:
+                conn.close()
+                # A pooled socket the server already closed; retry on another
+                if reused:
+                    continue
+                raise
+            except Exception:
+                conn.close()
+                raise
+            break
+
+        if response.will_close:
+            conn.close()
+        else:
+            self._release(conn)
+
+        if response.status >= 400:
+            raise urllib.error.HTTPError(
+                f"{self.server_url}{path}", response.status, response.reason, response.headers, None
+            )
+        return response.status, response.headers, body
+
+    def request(self, method: str, path: str, payload: dict = None) -> dict:
+        """Send a request and return the decoded JSON response."""
+        _, _, body = self.send(method, path, payload)
+        return json.loads(body.decode('utf-8')) if body else {}
+
+    def get_jobs_status(self) -> dict:
+        """Get current status of all jobs."""
+        return self.request('GET', '/api/jobs')
+
+    def send_job_command(self, job_name: str, command: str) -> dict:
+        """Send a command to a specific job."""
+        return self.request('PUT', f'/api/jobs/{job_name}', {"command": command, "force": False})
+
+    def send_job_commands(self, job_names: list, command: str, workers: int = DEFAULT_WORKERS) -> dict:
+        """
+        Send the same command to several jobs concurrently.
+
+        Returns a dict mapping job name to None on success or the raised exception.
+        """
+        outcomes = {}
+        if not job_names:
+            return outcomes
+
+        workers = max(1, min(workers, len(job_names)))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {
+                pool.submit(self.send_job_command, job_name, command): job_name
+                for job_name in job_names
+            }
+            for future in as_completed(futures):
+                job_name = futures[future]
+                try:
+                    future.result()
+                    outcomes[job_name] = None
+                except Exception as e:
+                    outcomes[job_name] = e
+        return outcomes
+
+    def resume_all_jobs(self, workers: int = DEFAULT_WORKERS) -> dict:
+        """Resume all paused jobs in Immich."""
+        start = time.monotonic()
+        results = {
+            'resumed': [],
+            'already_running': [],
+            'errors': [],
+            'elapsed': 0.0
+        }
+        
+        try:
+            jobs = self.get_jobs_status()
+        except Exception as e:
+            print(f"[ERROR] Failed to get jobs status: {e}")
+            results['errors'].append(f"Failed to get jobs: {e}")
+            results['elapsed'] = time.monotonic() - start
+            return results
+        
+        to_resume = []
+        for job_name, job_info in jobs.items():
+            # Skip if no queue info
+            if not isinstance(job_info, dict):
+                continue
+            
+            queue_status = job_info.get('queueStatus', {})
+            is_paused = queue_status.get('isPaused', False)
+            is_active = queue_status.get('isActive', False)
+            
+            if is_paused:
+                to_resume.append(job_name)
+            elif is_active:
+                results['already_running'].append(job_name)
+        
+        outcomes = self.send_job_commands(to_resume, "resume", workers)
+        for job_name in to_resume:
+            error = outcomes.get(job_name)
+            if error is None:
+                print(f"[INFO] Resumed job: {job_name}")
+                results['resumed'].append(job_name)
+            else:
+                print(f"[ERROR] Failed to resume {job_name}: {error}")
+                results['errors'].append(f"{job_name}: {error}")
+        
+        results['elapsed'] = time.monotonic() - start
+        return results
+
+    def pause_all_jobs(self, workers: int = DEFAULT_WORKERS) -> dict:
+        """Pause all active jobs in Immich."""
+        start = time.monotonic()
+        results = {
+            'paused': [],
+            'already_paused': [],
+            'errors': [],
+            'elapsed': 0.0
+        }
+        
+        try:
+            jobs = self.get_jobs_status()
+        except Exception as e:
+            print(f"[ERROR] Failed to get jobs status: {e}")
+            results['errors'].append(f"Failed to get jobs: {e}")
+            results['elapsed'] = time.monotonic() - start
+            return results
+        
+        to_pause = []
+        for job_name, job_info in jobs.items():
+            # Skip if no queue info
+            if not isinstance(job_info, dict):
+                continue
+            
+            queue_status = job_info.get('queueStatus', {})
+            is_paused = queue_status.get('isPaused', False)
+            is_active = queue_status.get('isActive', False)
+            
+            if is_active and not is_paused:
+                to_pause.append(job_name)
+            elif is_paused:
+                results['already_paused'].append(job_name)
+        
+        outcomes = self.send_job_commands(to_pause, "pause", workers)
+        for job_name in to_pause:
+            error = outcomes.get(job_name)
+            if error is None:
+                print(f"[INFO] Paused job: {job_name}")
+                results['paused'].append(job_name)
+            else:
+                print(f"[ERROR] Failed to pause {job_name}: {error}")
+                results['errors'].append(f"{job_name}: {error}")
+        
+        results['elapsed'] = time.monotonic() - start
+        return results
+
+
+class JobStatusCache:
+    """
+    Cached /api/jobs snapshot for one server.
+
+    get() returns the last snapshot while it is younger than ttl seconds.
+    Refreshes send If-None-Match when the server provided an ETag, and skip
+    json.loads when the payload is byte-identical to the previous one, so
+    unchanged polls are cheap. diff() reports only the queues whose job
+    counts or pause state changed since the previous diff() call.
+    """
+
+    def __init__(self, client: ImmichClient, ttl: float = 5.0):
+        self.client = client
+        self.ttl = ttl
+        self._snapshot = None
+        self._etag = None
+        self._digest = None
+        self._fetched_at = 0.0
+        self._diff_base = {}
+        self._lock = threading.Lock()
+
+    def get(self, force: bool = False) -> dict:
+        """Return the current jobs status, refreshing it if stale."""
+        with self._lock:
+            now = time.monotonic()
+            if not force and self._snapshot is not None and now - self._fetched_at < self.ttl:
+                return self._snapshot
+
+            headers = {'If-None-Match': self._etag} if self._etag and self._snapshot is not None else None
+            status, response_headers, body = self.client.send('GET', '/api/jobs', headers=headers)
+            self._fetched_at = time.monotonic()
+            if status == 304:
+                return self._snapshot
+
+            self._etag = response_headers.get('ETag')
+            digest = hashlib.sha1(body).digest()
+            if digest != self._digest or self._snapshot is None:
+                self._snapshot = json.loads(body.decode('utf-8')) if body else {}
+                self._digest = digest
+            return self._snapshot
+
+    def invalidate(self):
+        """Force the next get() to hit the server (e.g. after sending a command)."""
+        with self._lock:
+            self._fetched_at = 0.0
+
+    def diff(self, force: bool = False) -> dict:
+        """
+        Return {job_name: job_info} for queues that changed since the last diff().
+
+        A queue that disappeared from the server is reported with None.
+        The first call reports every queue.
+        """
+        jobs = self.get(force)
+        changed = {}
+        current = {}
+        for job_name, job_info in jobs.items():
+            if not isinstance(job_info, dict):
+                continue
+            state = (
+                tuple(sorted(job_info.get('jobCounts', {}).items())),
+                job_info.get('queueStatus', {}).get('isPaused', False),
+            )
+            current[job_name] = state
+            if self._diff_base.get(job_name) != state:
+                changed[job_name] = job_info
+        for job_name in self._diff_base.keys() - current.keys():
+            changed[job_name] = None
+        self._diff_base = current
+        return changed
+
+
+_clients = {}
+_status_caches = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(server_url: str, api_key: str) -> ImmichClient:
+    """Return the shared keep-alive client for a server, creating it on first use."""
+    key = (server_url.rstrip('/'), api_key)
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = _clients[key] = ImmichClient(server_url, api_key)
+        return client
+
+
+def get_status_cache(server_url: str, api_key: str, ttl: float = 5.0) -> JobStatusCache:
+    """Return the shared status cache for a server, creating it on first use."""
+    client = get_client(server_url, api_key)
+    with _clients_lock:
+        cache = _status_caches.get(client.server_url)
+        if cache is None or cache.client is not client:
+            cache = _status_caches[client.server_url] = JobStatusCache(client, ttl)
+        return cache
+
+
 def get_jobs_status(server_url: str, api_key: str) -> dict:
     """Get current status of all jobs."""
-    url = f"{server_url}/api/jobs"
-    
-    req = urllib.request.Request(
-        url,
-        headers={
-            'x-api-key': api_key,
-            'Accept': 'application/json'
-        },
-        method='GET'
-    )
-    
-    with urllib.request.urlopen(req, timeout=30) as response:
-        return json.loads(response.read().decode('utf-8'))
+    return get_client(server_url, api_key).get_jobs_status()
 
 
 def send_job_command(server_url: str, api_key: str, job_name: str, command: str) -> dict:
     """Send a command to a specific job."""
-    url = f"{server_url}/api/jobs/{job_name}"
-    data = json.dumps({"command": command, "force": False}).encode('utf-8')
-    
-    req = urllib.request.Request(
-        url,
-        data=data,
-        headers={
-            'x-api-key': api_key,
-            'Content-Type': 'application/json',
-            'Accept': 'application/json'
-        },
-        method='PUT'
-    )
-    
-    with urllib.request.urlopen(req, timeout=30) as response:
-        return json.loads(response.read().decode('utf-8'))
+    return get_client(server_url, api_key).send_job_command(job_name, command)
 
 
-def resume_all_jobs(server_url: str, api_key: str) -> dict:
+def send_job_commands(server_url: str, api_key: str, job_names: list, command: str,
+                      workers: int = DEFAULT_WORKERS) -> dict:
+    """Send the same command to several jobs concurrently."""
+    return get_client(server_url, api_key).send_job_commands(job_names, command, workers)
+
+
+def resume_all_jobs(server_url: str, api_key: str, workers: int = DEFAULT_WORKERS) -> dict:
     """Resume all paused jobs in Immich."""
-    results = {
-        'resumed': [],
-        'already_running': [],
-        'errors': []
-    }
-    
-    try:
-        jobs = get_jobs_status(server_url, api_key)
-    except Exception as e:
-        print(f"[ERROR] Failed to get jobs status: {e}")
-        results['errors'].append(f"Failed to get jobs: {e}")
-        return results
-    
-    for job_name, job_info in jobs.items():
-        # Skip if no queue info
-        if not isinstance(job_info, dict):
-            continue
-        
-        queue_status = job_info.get('queueStatus', {})
-        is_paused = queue_status.get('isPaused', False)
-        is_active = queue_status.get('isActive', False)
-        
-        if is_paused:
-            try:
-                send_job_command(server_url, api_key, job_name, "resume")
-                print(f"[INFO] Resumed job: {job_name}")
-                results['resumed'].append(job_name)
-            except Exception as e:
-                print(f"[ERROR] Failed to resume {job_name}: {e}")
-                results['errors'].append(f"{job_name}: {e}")
-        elif is_active:
-            results['already_running'].append(job_name)
-    
-    return results
+    return get_client(server_url, api_key).resume_all_jobs(workers)
 
 
-def pause_all_jobs(server_url: str, api_key: str) -> dict:
+def pause_all_jobs(server_url: str, api_key: str, workers: int = DEFAULT_WORKERS) -> dict:
     """Pause all active jobs in Immich."""
-    results = {
-        'paused': [],
-        'already_paused': [],
-        'errors': []
-    }
-    
+    return get_client(server_url, api_key).pause_all_jobs(workers)
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    """HTTPConnection over a Unix domain socket (for the Docker Engine API)."""
+
+    def __init__(self, socket_path: str, timeout: float = None):
+        super().__init__('localhost', timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(self.socket_path)
+        except OSError:
+            sock.close()
+            raise
+        self.sock = sock
+
+
+def docker_api(method: str, path: str, socket_path: str = DOCKER_SOCKET, timeout: float = 10):
+    """Call the Docker Engine API over its Unix socket and return the decoded JSON body."""
+    conn = _UnixHTTPConnection(socket_path, timeout=timeout)
     try:
-        jobs = get_jobs_status(server_url, api_key)
-    except Exception as e:
-        print(f"[ERROR] Failed to get jobs status: {e}")
-        results['errors'].append(f"Failed to get jobs: {e}")
-        return results
-    
-    for job_name, job_info in jobs.items():
-        # Skip if no queue info
-        if not isinstance(job_info, dict):
-            continue
+        conn.request(method, path, headers={'Accept': 'application/json'})
+        response = conn.getresponse()
+        body = response.read()
+    finally:
+        conn.close()
+    if response.status >= 400:
+        raise RuntimeError(f"Docker API {method} {path} failed: {response.status} {body.decode('utf-8', 'replace').strip()}")
+    return json.loads(body.decode('utf-8')) if body else None
+
+
+def _running_containers(name: str, socket_path: str) -> list:
+    """List running containers whose name matches, like `docker ps --filter name=`."""
+    filters = urllib.parse.quote(json.dumps({"name": [name], "status": ["running"]}))
+    return docker_api('GET', f'/containers/json?filters={filters}', socket_path) or []
+
+
+def _wait_via_socket(name: str, socket_path: str):
+    """Block on the Docker wait endpoint until no matching container is running."""
+    while True:
+        containers = _running_containers(name, socket_path)
+        if not containers:
+            return
+        container = containers[0]
+        names = ', '.join(n.lstrip('/') for n in container.get('Names', [])) or container['Id'][:12]
+        print(f"[INFO] Container status: {container.get('Status', 'running')}, waiting for {names} to exit...")
+        # Returns as soon as the container stops; no timeout on the blocking call
+        docker_api('POST', f"/containers/{container['Id']}/wait?condition=not-running",
+                   socket_path, timeout=None)
+
+
+def _wait_via_polling(name: str, poll_interval: float):
+    """Poll `docker ps` until no matching container is running."""
+    while True:
+        result = subprocess.run(
+            ['docker', 'ps', '--filter', f'name={name}', '--format', '{{.Status}}'],
+            capture_output=True, text=True
+        )
+        status = result.stdout.strip()
         
-        queue_status = job_info.get('queueStatus', {})
-        is_paused = queue_status.get('isPaused', False)
-        is_active = queue_status.get('isActive', False)
+        if not status or 'Up' not in status:
+            return
         
-        if is_active and not is_paused:
+        print(f"[INFO] Container status: {status}, waiting...")
+        time.sleep(poll_interval)
+
+
+def wait_for_container_exit(name: str = IMPORT_CONTAINER, poll_interval: float = 30,
+                            socket_path: str = DOCKER_SOCKET):
+    """
+    Wait until no container matching name is running.
+
+    Uses the Docker socket to block on the container's exit so callers resume
+    immediately; falls back to polling `docker ps` every poll_interval seconds
+    when the socket is unavailable.
+    """
+    try:
+        _wait_via_socket(name, socket_path)
+    except (OSError, RuntimeError, http.client.HTTPException, ValueError) as e:
+        print(f"[WARN] Docker socket unavailable ({e}), polling every {poll_interval:g}s")
+        _wait_via_polling(name, poll_interval)
+    print(f"[INFO] {name} container is not running")
+
+
+def read_host_load(proc_root: str = "/proc") -> dict:
+    """
+    Read host load figures used by the throttle.
+
+    Returns load1 (1-minute load average), mem_available_pct and the raw
+    cumulative cpu counters from /proc/stat (used to compute IO wait).
+    """
+    with open(f"{proc_root}/loadavg") as f:
+        load1 = float(f.read().split()[0])
+
+    mem = {}
+    with open(f"{proc_root}/meminfo") as f:
+        for line in f:
+            key, _, value = line.partition(':')
+            if key in ('MemTotal', 'MemAvailable'):
+                mem[key] = int(value.split()[0])
+                if len(mem) == 2:
+                    break
+    mem_total = mem.get('MemTotal') or 1
+    mem_available_pct = 100.0 * mem.get('MemAvailable', mem_total) / mem_total
+
+    with open(f"{proc_root}/stat") as f:
+        cpu = [int(x) for x in f.readline().split()[1:]]
+
+    return {'load1': load1, 'mem_available_pct': mem_available_pct, 'cpu': cpu}
+
+
+def iowait_pct(previous: list, current: list) -> float:
+    """IO wait percentage between two /proc/stat cpu samples."""
+    if not previous or not current:
+        return 0.0
+    deltas = [c - p for c, p in zip(current, previous)]
+    total = sum(deltas)
+    # Fields: user nice system idle iowait ...
+    return 100.0 * deltas[4] / total if total > 0 and len(deltas) > 4 else 0.0
+
+
+def _queue_depth(job_info: dict) -> int:
+    counts = job_info.get('jobCounts', {})
+    return counts.get('active', 0) + counts.get('waiting', 0) + counts.get('delayed', 0)
+
+
+def _yield_order(job_names) -> list:
+    """Order queues so the heaviest yield first; unknown queues go last."""
+    rank = {name: i for i, name in enumerate(HEAVY_QUEUES)}
+    return sorted(job_names, key=lambda name: (rank.get(name, len(HEAVY_QUEUES)), name))
+
+
+def throttle_jobs(client: ImmichClient, max_load: float, max_iowait: float = 20.0,
+                  min_mem_available: float = 10.0, interval: float = 30,
+                  resume_ratio: float = 0.8, proc_root: str = "/proc"):
+    """
+    Pause and resume individual queues to keep the host under load ceilings.
+
+    Each tick pauses the heaviest busy queue while any ceiling is exceeded and
+    resumes one queue (lightest first) once every figure is back under
+    resume_ratio of its ceiling. Only queues paused by the throttle are ever
+    resumed, and they are all resumed again when the throttle exits.
+    """
+    throttled = []
+    # ttl=0: refresh every tick, but unchanged payloads come back as cheap 304s
+    status_cache = JobStatusCache(client, ttl=0)
+    previous_cpu = read_host_load(proc_root)['cpu']
+
+    try:
+        while True:
+            time.sleep(interval)
+            load = read_host_load(proc_root)
+            iowait = iowait_pct(previous_cpu, load['cpu'])
+            previous_cpu = load['cpu']
+
             try:
-                send_job_command(server_url, api_key, job_name, "pause")
-                print(f"[INFO] Paused job: {job_name}")
-                results['paused'].append(job_name)
+                jobs = status_cache.get()
             except Exception as e:
-                print(f"[ERROR] Failed to pause {job_name}: {e}")
-                results['errors'].append(f"{job_name}: {e}")
-        elif is_paused:
-            results['already_paused'].append(job_name)
-    
-    return results
+                print(f"[ERROR] Failed to get jobs status: {e}")
+                continue
+
+            overloaded = (
+                load['load1'] > max_load
+                or iowait > max_iowait
+                or load['mem_available_pct'] < min_mem_available
+            )
+            relieved = (
+                load['load1'] <= max_load * resume_ratio
+                and iowait <= max_iowait * resume_ratio
+                and load['mem_available_pct'] >= min_mem_available / resume_ratio
+            )
+            print(f"[INFO] load1={load['load1']:.2f} iowait={iowait:.1f}% "
+                  f"mem_available={load['mem_available_pct']:.1f}% throttled={len(throttled)}")
+
+            if overloaded:
+                candidates = [
+                    name for name, info in jobs.items()
+                    if isinstance(info, dict)
+                    and not info.get('queueStatus', {}).get('isPaused', False)
+                    and _queue_depth(info) > 0
+                ]
+                for job_name in _yield_order(candidates)[:1]:
+                    try:
+                        client.send_job_command(job_name, "pause")
+                        throttled.append(job_name)
+                        print(f"[INFO] Throttle paused job: {job_name}")
+                    except Exception as e:
+                        print(f"[ERROR] Failed to pause {job_name}: {e}")
+            elif relieved and throttled:
+                job_name = throttled[-1]
+                try:
+                    client.send_job_command(job_name, "resume")
+                    throttled.pop()
+                    print(f"[INFO] Throttle resumed job: {job_name}")
+                except Exception as e:
+                    print(f"[ERROR] Failed to resume {job_name}: {e}")
+    except KeyboardInterrupt:
+        print("[INFO] Throttle interrupted")
+    finally:
+        if throttled:
+            print(f"[INFO] Resuming {len(throttled)} throttled job(s)")
+            outcomes = client.send_job_commands(throttled, "resume")
+            for job_name, error in outcomes.items():
+                if error is not None:
+                    print(f"[ERROR] Failed to resume {job_name}: {error}")
+
+    return throttled
 
 
 def main():
@@ -157,7 +654,7 @@ def main():
     
     parser = argparse.ArgumentParser(description='Manage Immich jobs')
     parser.add_argument('action', nargs='?', default='status',
-                        choices=['resume', 'pause', 'status'],
+                        choices=['resume', 'pause', 'status', 'throttle'],
                         help='Action to perform (default: status)')
     parser.add_argument('--server', '-s', 
                         default=os.getenv('IMMICH_SERVER', 'http://192.168.1.216:2283'),
@@ -166,6 +663,18 @@ def main():
                         help='Path to API key file')
     parser.add_argument('--wait', '-w', action='store_true',
                         help='Wait for immich-import container to finish first')
+    parser.add_argument('--poll-interval', type=float, default=30,
+                        help='Seconds between docker ps checks when the Docker socket is unavailable (default: 30)')
+    parser.add_argument('--workers', '-j', type=int, default=DEFAULT_WORKERS,
+                        help=f'Concurrent job commands for pause/resume (default: {DEFAULT_WORKERS})')
+    parser.add_argument('--max-load', type=float, default=float(os.cpu_count() or 4),
+                        help='throttle: 1-minute load average ceiling (default: CPU count)')
+    parser.add_argument('--max-iowait', type=float, default=20.0,
+                        help='throttle: IO wait percentage ceiling (default: 20)')
+    parser.add_argument('--min-mem-available', type=float, default=10.0,
+                        help='throttle: minimum MemAvailable percentage (default: 10)')
+    parser.add_argument('--interval', type=float, default=30,
+                        help='throttle: seconds between checks (default: 30)')
     args = parser.parse_args()
     
     server_url = args.server.rstrip('/')
@@ -179,23 +688,8 @@ def main():
         sys.exit(1)
     
     if args.wait:
-        print("[INFO] Waiting for immich-import container to complete...")
-        import subprocess
-        import time
-        
-        while True:
-            result = subprocess.run(
-                ['docker', 'ps', '--filter', 'name=immich-import', '--format', '{{.Status}}'],
-                capture_output=True, text=True
-            )
-            status = result.stdout.strip()
-            
-            if not status or 'Up' not in status:
-                print("[INFO] immich-import container is not running")
-                break
-            
-            print(f"[INFO] Container status: {status}, waiting...")
-            time.sleep(30)
+        print(f"[INFO] Waiting for {IMPORT_CONTAINER} container to complete...")
+        wait_for_container_exit(IMPORT_CONTAINER, args.poll_interval)
     
     if args.action == 'status':
         try:
@@ -206,24 +700,36 @@ def main():
             sys.exit(1)
     
     elif args.action == 'resume':
-        results = resume_all_jobs(server_url, api_key)
+        results = resume_all_jobs(server_url, api_key, args.workers)
         if results['resumed']:
             print(f"[INFO] Resumed {len(results['resumed'])} job(s): {', '.join(results['resumed'])}")
         if results['already_running']:
             print(f"[INFO] Already running: {', '.join(results['already_running'])}")
+        print(f"[INFO] Completed in {results['elapsed']:.2f}s")
         if results['errors']:
             print(f"[ERROR] Errors: {len(results['errors'])}")
             sys.exit(1)
     
     elif args.action == 'pause':
-        results = pause_all_jobs(server_url, api_key)
+        results = pause_all_jobs(server_url, api_key, args.workers)
         if results['paused']:
             print(f"[INFO] Paused {len(results['paused'])} job(s): {', '.join(results['paused'])}")
         if results['already_paused']:
             print(f"[INFO] Already paused: {', '.join(results['already_paused'])}")
+        print(f"[INFO] Completed in {results['elapsed']:.2f}s")
         if results['errors']:
             print(f"[ERROR] Errors: {len(results['errors'])}")
             sys.exit(1)
+    
+    elif args.action == 'throttle':
+        print(f"[INFO] Throttling jobs: max_load={args.max_load:g} max_iowait={args.max_iowait:g}% "
+              f"min_mem_available={args.min_mem_available:g}%")
+        client = get_client(server_url, api_key)
+        # Treat SIGTERM like Ctrl-C so throttled queues are resumed on the way out
+        def _interrupt(signum, frame):
+            raise KeyboardInterrupt
+        signal.signal(signal.SIGTERM, _interrupt)
+        throttle_jobs(client, args.max_load, args.max_iowait, args.min_mem_available, args.interval)
 
 
 if __name__ == "__main__":
@@ -10,6 +10,11 @@
 
 LOG="/boot/logs/array-restart-$(date +%Y%m%d-%H%M%S).log"
 mkdir -p /boot/logs
+CONTAINER_PLAN=/boot/config/plugins/user.scripts/scripts/container_plan.py
+
+# When rc.docker is patched to outlive the array, only array-backed containers go down
+PLAN_ARGS=""
+grep -qE "PATCHED: Keep Docker running|Prevents array-stop" /etc/rc.d/rc.docker 2>/dev/null && PLAN_ARGS="--array-only"
 
 # Ensure this script continues even if terminal closes
 trap '' HUP
@@ -18,6 +23,20 @@ log() {
     echo "[$(date '+%Y-%m-%d %H:%M:%S')] $1" | tee -a "$LOG"
 }
 
+start_containers() {
+    log ""
+    log "Step 5: Starting containers..."
+    for i in {1..30}; do
+        if docker info >/dev/null 2>&1; then
+            python3 "$CONTAINER_PLAN" start >> "$LOG" 2>&1 && log "✓ Containers started" \
+                || log "⚠ Some containers failed to start (see log)"
+            return
+        fi
+        sleep 2
+    done
+    log "⚠ Docker not running; containers not started"
+}
+
 restart_array() {
     log "=== SAFE ARRAY RESTART SCRIPT ==="
     log "Log file: $LOG"
@@ -28,6 +47,14 @@ restart_array() {
     mdcmd status | grep -E "^(mdState|mdNumDisabled)" >> "$LOG" 2>&1
     log ""
     
+    # Step 0: Stop containers in dependency-ordered parallel waves
+    log "Step 0: Stopping containers..."
+    if python3 "$CONTAINER_PLAN" stop --save $PLAN_ARGS >> "$LOG" 2>&1; then
+        log "✓ Containers stopped"
+    else
+        log "⚠ Some containers did not stop cleanly (see log); continuing"
+    fi
+    
     # Step 1: Stop the array
     log "Step 1: Stopping array..."
     if mdcmd stop; then
@@ -76,6 +103,7 @@ restart_array() {
                     log ""
                     log "Disk status:"
                     mdcmd status | grep -E "^(diskState|rdevStatus|rdevName)\.[0-9]+" | head -20 >> "$LOG" 2>&1
+                    start_containers
                     return 0
                 fi
                 sleep 1
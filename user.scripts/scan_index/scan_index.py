@@ -0,0 +1,509 @@
+#!/usr/bin/env python3
+"""
+Incremental file index for the maintenance scripts.
+
+Keeps a SQLite database of every directory's mtime and every file's size
+and mtime under a set of roots. A refresh only reads directories whose
+mtime changed since the last one (a file was added, removed or renamed
+in them); unchanged directories are a single lstat, so a sweep over a
+disk that hasn't changed touches no directory contents at all. Callers
+then query the index ("files named X", "largest files under Y") instead
+of walking the tree again.
+
+A directory's mtime doesn't change when a file in it is only rewritten,
+so sizes of growing files (logs) are only current after a refresh with
+restat=True, which lstat's the known files of unchanged directories too.
+
+Usage:
+    python3 scan_index.py refresh [--restat] [--full] [--skip REL] [ROOT ...]
+    python3 scan_index.py find [--under PATH] [-0] PATTERN ...
+    python3 scan_index.py largest [--under PATH] [--name PATTERN] [-n 20] [-H]
+    python3 scan_index.py du PATH
+    python3 scan_index.py roots
+
+From Python:
+    from scan_index import ScanIndex
+    index = ScanIndex()
+    index.refresh(["/mnt/disk1", "/mnt/disk2"])
+    for path, size, mtime_ns in index.find([".DS_Store"], under="/mnt/user/Media"):
+        ...
+
+Environment:
+    SCAN_INDEX_DB     Database path
+    SCAN_INDEX_ROOTS  Colon-separated default roots for refresh (default: array disks and pools)
+"""
+import argparse
+import fcntl
+import glob
+import os
+import queue
+import sqlite3
+import stat
+import sys
+import threading
+import time
+from datetime import datetime
+
+SCAN_INDEX_DB = os.getenv("SCAN_INDEX_DB",
+                          os.path.join(os.getenv("APP_ROOT", "/mnt/pool/appdata"), "scan_index", "scan_index.db"))
+SCAN_INDEX_ROOTS = [p for p in os.getenv("SCAN_INDEX_ROOTS", "").split(":") if p]
+MNT = "/mnt"
+# /mnt entries that are not a single disk or pool (FUSE shares, unassigned devices)
+NOT_ROOTS = {"user", "user0", "disks", "remotes", "rootshare", "addons"}
+# Changes applied per transaction while refreshing
+COMMIT_EVERY = 5000
+# Keep SQL variable lists under SQLite's default limit
+CHUNK = 500
+# Joins a directory's subdirectory names in dirs.subdirs ('/' can't occur in a name)
+SEP = "/"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS dirs (
+    id INTEGER PRIMARY KEY,
+    root TEXT NOT NULL,
+    path TEXT NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    subdirs TEXT,
+    UNIQUE (root, path)
+);
+CREATE TABLE IF NOT EXISTS files (
+    dir_id INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    PRIMARY KEY (dir_id, name)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS files_name ON files (name);
+CREATE INDEX IF NOT EXISTS files_size ON files (size);
+CREATE TABLE IF NOT EXISTS roots (
+    root TEXT PRIMARY KEY,
+    refreshed_at REAL NOT NULL
+);
+"""
+
+
+def find_roots(mnt: str = MNT) -> list:
+    """Return the mounted array disks and pools under /mnt."""
+    roots = []
+    for path in sorted(glob.glob(os.path.join(mnt, "*"))):
+        name = os.path.basename(path)
+        if name in NOT_ROOTS or not os.path.isdir(path):
+            continue
+        if name.startswith("disk") or os.path.ismount(path):
+            roots.append(path)
+    return roots
+
+
+def is_skipped(rel: str, skip: set) -> bool:
+    while rel:
+        if rel in skip:
+            return True
+        rel = os.path.dirname(rel)
+    return False
+
+
+def human_size(size: float) -> str:
+    for unit in ("B", "K", "M", "G", "T"):
+        if size < 1024 or unit == "T":
+            return f"{size:.0f}{unit}" if unit == "B" else f"{size:.1f}{unit}"
+        size /= 1024
+
+
+def _normalize_root(root: str) -> str:
+    return os.path.abspath(root).rstrip("/") or "/"
+
+
+def _chunks(items: list):
+    for i in range(0, len(items), CHUNK):
+        yield items[i:i + CHUNK]
+
+
+class ScanIndex:
+    """
+    SQLite index of directory mtimes and file sizes/mtimes under a set of roots.
+
+    Directory paths are stored relative to their root ('' is the root
+    itself). Queries return whatever the last refresh saw, so callers
+    refresh the roots they care about first; that is cheap when little
+    has changed.
+    """
+
+    def __init__(self, db_path: str = SCAN_INDEX_DB):
+        self.db_path = db_path
+
+    def _connect(self) -> sqlite3.Connection:
+        os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+        db = sqlite3.connect(self.db_path, timeout=60)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        db.executescript(SCHEMA)
+        if "subdirs" not in {row[1] for row in db.execute("PRAGMA table_info(dirs)")}:
+            # Indexes from before subdirectory names were stored; those dirs are re-read once
+            db.execute("ALTER TABLE dirs ADD COLUMN subdirs TEXT")
+        return db
+
+    # ------------------------------------------------------------------
+    # Refresh
+    # ------------------------------------------------------------------
+
+    def refresh(self, roots: list, skip=(), restat: bool = False, full: bool = False) -> list:
+        """
+        Bring the index up to date for each root, one walker thread per root.
+
+        skip holds root-relative paths not walked this time; whatever the
+        index holds for them is kept as it is (pass the same skip to the
+        queries to leave them out). full re-reads every directory regardless
+        of its mtime. Returns per-root stats: root, dirs_read, dirs_cached,
+        files_restated, removed, errors, elapsed.
+        """
+        roots = list(dict.fromkeys(_normalize_root(r) for r in roots))
+        skip = {s.strip("/") for s in skip if s.strip("/")}
+        changes = queue.Queue(maxsize=COMMIT_EVERY * 2)
+        results = {}
+
+        def walk(root):
+            stats = {"root": root, "dirs_read": 0, "dirs_cached": 0, "files_restated": 0,
+                     "removed": 0, "errors": 0, "elapsed": 0.0}
+            started = time.monotonic()
+            try:
+                self._walk(root, skip, restat, full, changes, stats)
+            except Exception as e:
+                print(f"[ERROR] Refresh of {root} failed: {e}")
+                stats["errors"] += 1
+                stats["failed"] = True
+            stats["elapsed"] = time.monotonic() - started
+            results[root] = stats
+            changes.put(("end", root, not stats.get("failed")))
+
+        os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+        lock_fd = os.open(self.db_path + ".lock", os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            # One refresh at a time; readers aren't blocked (WAL)
+            fcntl.flock(lock_fd, fcntl.LOCK_EX)
+            db = self._connect()
+            try:
+                threads = [threading.Thread(target=walk, args=(root,), daemon=True) for root in roots]
+                for thread in threads:
+                    thread.start()
+                self._apply(db, changes, len(threads))
+                for thread in threads:
+                    thread.join()
+            finally:
+                db.close()
+        finally:
+            os.close(lock_fd)
+        return [results[root] for root in roots]
+
+    def _walk(self, root: str, skip: set, restat: bool, full: bool, changes: queue.Queue, stats: dict):
+        """Walk one root, putting the differences from the index on the changes queue."""
+        try:
+            if not stat.S_ISDIR(os.stat(root).st_mode):
+                raise NotADirectoryError(root)
+        except OSError as e:
+            # Leave the index alone for a disk that isn't mounted right now
+            print(f"[ERROR] Cannot refresh {root}: {e}")
+            stats["errors"] += 1
+            stats["failed"] = True
+            return
+
+        db = sqlite3.connect(self.db_path, timeout=60)
+        try:
+            known = {path: (dir_id, mtime, subdirs) for dir_id, path, mtime, subdirs in
+                     db.execute("SELECT id, path, mtime_ns, subdirs FROM dirs WHERE root = ?", (root,))}
+
+            def stored_subdirs(rel):
+                names = known[rel][2]
+                return [os.path.join(rel, name) for name in names.split(SEP)] if names else []
+
+            seen = set()
+            stack = [""]
+            while stack:
+                rel = stack.pop()
+                if rel and is_skipped(rel, skip):
+                    # Not walked this time; keep what the index has below it
+                    seen.update(path for path in known if path == rel or path.startswith(rel + "/"))
+                    continue
+                path = os.path.join(root, rel) if rel else root
+                try:
+                    st = os.lstat(path)
+                except OSError:
+                    continue
+                if not stat.S_ISDIR(st.st_mode):
+                    continue
+
+                entry = known.get(rel)
+                if entry and entry[1] == st.st_mtime_ns and entry[2] is not None and not full:
+                    # No entries were added, removed or renamed here since the last refresh.
+                    # Subdirectories come from the stored listing, so one missing from the
+                    # index (unreadable or skipped last time) is read again
+                    seen.add(rel)
+                    stats["dirs_cached"] += 1
+                    stack.extend(stored_subdirs(rel))
+                    if restat:
+                        self._restat(db, entry[0], path, changes, stats)
+                    continue
+
+                files = []
+                subdirs = []
+                try:
+                    with os.scandir(path) as entries:
+                        for item in entries:
+                            try:
+                                item_stat = item.stat(follow_symlinks=False)
+                            except OSError:
+                                continue
+                            try:
+                                item.name.encode()
+                            except UnicodeEncodeError:
+                                # SQLite can't store the name; leave it (and any subtree) out
+                                print(f"[WARN] Skipping non-UTF-8 name: {item.path!r}")
+                                stats["errors"] += 1
+                                continue
+                            if stat.S_ISDIR(item_stat.st_mode):
+                                subdirs.append(os.path.join(rel, item.name))
+                            else:
+                                files.append((item.name, item_stat.st_size, item_stat.st_mtime_ns))
+                except OSError as e:
+                    print(f"[WARN] Cannot read {path}: {e}")
+                    stats["errors"] += 1
+                    if entry:
+                        # Keep the last listing; the changed mtime gets it re-read next time
+                        seen.add(rel)
+                        stack.extend(stored_subdirs(rel))
+                    continue
+                seen.add(rel)
+                stats["dirs_read"] += 1
+                # The mtime from before the read: anything that changed while reading is re-read next time
+                changes.put(("dir", root, rel, entry[0] if entry else None, st.st_mtime_ns,
+                             SEP.join(os.path.basename(d) for d in subdirs), files))
+                stack.extend(subdirs)
+
+            gone = [entry[0] for path, entry in known.items() if path not in seen]
+            stats["removed"] = len(gone)
+            if gone:
+                changes.put(("gone", gone))
+        finally:
+            db.close()
+
+    def _restat(self, db: sqlite3.Connection, dir_id: int, path: str, changes: queue.Queue, stats: dict):
+        updated = []
+        for name, size, mtime in db.execute("SELECT name, size, mtime_ns FROM files WHERE dir_id = ?", (dir_id,)):
+            try:
+                st = os.lstat(os.path.join(path, name))
+            except OSError:
+                continue
+            stats["files_restated"] += 1
+            if st.st_size != size or st.st_mtime_ns != mtime:
+                updated.append((st.st_size, st.st_mtime_ns, dir_id, name))
+        if updated:
+            changes.put(("files", updated))
+
+    def _apply(self, db: sqlite3.Connection, changes: queue.Queue, walkers: int):
+        """Apply walker changes from one writer connection until every walker has finished."""
+        pending = 0
+        while walkers:
+            change = changes.get()
+            kind = change[0]
+            if kind == "end":
+                walkers -= 1
+                if change[2]:
+                    db.execute("INSERT OR REPLACE INTO roots (root, refreshed_at) VALUES (?, ?)",
+                               (change[1], time.time()))
+            elif kind == "dir":
+                _, root, rel, dir_id, mtime, subdirs, files = change
+                if dir_id is None:
+                    cursor = db.execute("INSERT OR IGNORE INTO dirs (root, path, mtime_ns) VALUES (?, ?, ?)",
+                                        (root, rel, mtime))
+                    dir_id = cursor.lastrowid if cursor.rowcount else None
+                    if dir_id is None:
+                        dir_id = db.execute("SELECT id FROM dirs WHERE root = ? AND path = ?", (root, rel)).fetchone()[0]
+                db.execute("UPDATE dirs SET mtime_ns = ?, subdirs = ? WHERE id = ?", (mtime, subdirs, dir_id))
+                db.execute("DELETE FROM files WHERE dir_id = ?", (dir_id,))
+                db.executemany("INSERT INTO files (dir_id, name, size, mtime_ns) VALUES (?, ?, ?, ?)",
+                               [(dir_id, name, size, mtime_ns) for name, size, mtime_ns in files])
+                pending += 1 + len(files)
+            elif kind == "files":
+                db.executemany("UPDATE files SET size = ?, mtime_ns = ? WHERE dir_id = ? AND name = ?", change[1])
+                pending += len(change[1])
+            elif kind == "gone":
+                for chunk in _chunks(change[1]):
+                    marks = ",".join("?" * len(chunk))
+                    db.execute(f"DELETE FROM files WHERE dir_id IN ({marks})", chunk)
+                    db.execute(f"DELETE FROM dirs WHERE id IN ({marks})", chunk)
+                pending += len(change[1])
+            if pending >= COMMIT_EVERY:
+                db.commit()
+                pending = 0
+        db.commit()
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def roots(self) -> list:
+        """Return [(root, refreshed_at, dirs, files, bytes)] for every indexed root."""
+        db = self._connect()
+        try:
+            return db.execute("""
+                SELECT r.root, r.refreshed_at,
+                       (SELECT count(*) FROM dirs d WHERE d.root = r.root),
+                       (SELECT count(*) FROM files f JOIN dirs d ON d.id = f.dir_id WHERE d.root = r.root),
+                       (SELECT coalesce(sum(f.size), 0) FROM files f JOIN dirs d ON d.id = f.dir_id WHERE d.root = r.root)
+                FROM roots r ORDER BY r.root
+            """).fetchall()
+        finally:
+            db.close()
+
+    def _scope(self, db: sqlite3.Connection, under: str) -> tuple:
+        """
+        Return (sql, params) restricting dirs d to the subtree under `under`.
+
+        /mnt/user/<share>/... and /mnt/user0/<share>/... cover that path on
+        every indexed root directly under /mnt, so share-wide queries work on
+        an index of the individual disks.
+        """
+        if not under:
+            return "1", []
+        under = _normalize_root(under)
+        indexed = [row[0] for row in db.execute("SELECT root FROM roots")]
+        targets = []
+        share_prefix = next((p for p in (f"{MNT}/user/", f"{MNT}/user0/") if (under + "/").startswith(p)), None)
+        for root in indexed:
+            if share_prefix and os.path.dirname(root) == MNT:
+                targets.append((root, under[len(share_prefix):]))
+            elif under == root or under.startswith(root.rstrip("/") + "/"):
+                targets.append((root, under[len(root):].strip("/")))
+            elif root.startswith(under.rstrip("/") + "/"):
+                targets.append((root, ""))
+        if not targets:
+            raise ValueError(f"{under} is not in the index; refresh a root that contains it first")
+
+        clauses = []
+        params = []
+        for root, rel in targets:
+            if rel:
+                clauses.append("(d.root = ? AND (d.path = ? OR substr(d.path, 1, ?) = ?))")
+                params += [root, rel, len(rel) + 1, rel + "/"]
+            else:
+                clauses.append("d.root = ?")
+                params.append(root)
+        return "(" + " OR ".join(clauses) + ")", params
+
+    def _query(self, patterns, under, order: str = "", limit: int = None, skip=()):
+        db = self._connect()
+        try:
+            where, params = self._scope(db, under)
+            if patterns:
+                where += " AND (" + " OR ".join("f.name GLOB ?" for _ in patterns) + ")"
+                params += list(patterns)
+            sql = (f"SELECT d.root, d.path, f.name, f.size, f.mtime_ns FROM files f "
+                   f"JOIN dirs d ON d.id = f.dir_id WHERE {where} {order}")
+            if limit:
+                sql += " LIMIT ?"
+                params.append(limit)
+            skip = {s.strip("/") for s in skip if s.strip("/")}
+            for root, rel, name, size, mtime in db.execute(sql, params):
+                if skip and is_skipped(rel, skip):
+                    continue
+                yield os.path.join(root, rel, name), size, mtime
+        finally:
+            db.close()
+
+    def find(self, patterns=(), under: str = None, skip=()):
+        """
+        Yield (path, size, mtime_ns) for indexed files whose name matches any
+        glob pattern, leaving out root-relative paths in skip.
+        """
+        return self._query(patterns, under, skip=skip)
+
+    def largest(self, under: str = None, limit: int = 20, patterns=()) -> list:
+        """Return the `limit` largest indexed files as [(path, size, mtime_ns)]."""
+        return list(self._query(patterns, under, "ORDER BY f.size DESC", limit))
+
+    def total_size(self, under: str) -> tuple:
+        """Return (files, bytes) indexed under a path."""
+        db = self._connect()
+        try:
+            where, params = self._scope(db, under)
+            count, size = db.execute(f"SELECT count(*), coalesce(sum(f.size), 0) FROM files f "
+                                     f"JOIN dirs d ON d.id = f.dir_id WHERE {where}", params).fetchone()
+            return count, size
+        finally:
+            db.close()
+
+
+def print_refresh(results: list):
+    for stats in results:
+        line = (f"  {stats['root']}: {stats['dirs_read']} dirs read, {stats['dirs_cached']} unchanged, "
+                f"{stats['removed']} removed")
+        if stats["files_restated"]:
+            line += f", {stats['files_restated']} files re-stat'ed"
+        if stats["errors"]:
+            line += f", {stats['errors']} errors"
+        print(f"{line} ({stats['elapsed']:.1f}s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Incremental file index for maintenance scans")
+    parser.add_argument("--db", default=SCAN_INDEX_DB, help=f"Index database (default: {SCAN_INDEX_DB})")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    refresh = sub.add_parser("refresh", help="Update the index for one or more roots")
+    refresh.add_argument("roots", nargs="*", help="Directories to index (default: SCAN_INDEX_ROOTS or all disks/pools)")
+    refresh.add_argument("--skip", action="append", default=[], help="Root-relative path to leave out (repeatable)")
+    refresh.add_argument("--restat", action="store_true", help="Also re-stat files in unchanged directories")
+    refresh.add_argument("--full", action="store_true", help="Read every directory, ignoring stored mtimes")
+    refresh.add_argument("--quiet", "-q", action="store_true", help="Only print errors")
+
+    find = sub.add_parser("find", help="List indexed files whose name matches a glob")
+    find.add_argument("patterns", nargs="+", help="Name glob, e.g. '*.gz' (repeatable)")
+    find.add_argument("--under", help="Only files below this path (/mnt/user/<share> spans all disks)")
+    find.add_argument("-0", dest="null", action="store_true", help="Separate paths with NUL (for xargs -0)")
+
+    largest = sub.add_parser("largest", help="List the largest indexed files")
+    largest.add_argument("--under", help="Only files below this path")
+    largest.add_argument("--name", action="append", default=[], help="Name glob to match (repeatable)")
+    largest.add_argument("-n", "--limit", type=int, default=20, help="Number of files (default: 20)")
+    largest.add_argument("-H", "--human", action="store_true", help="Human-readable sizes")
+
+    du = sub.add_parser("du", help="Total indexed size below a path")
+    du.add_argument("path")
+    du.add_argument("-H", "--human", action="store_true", help="Human-readable size")
+
+    sub.add_parser("roots", help="Show indexed roots")
+    args = parser.parse_args()
+
+    index = ScanIndex(args.db)
+    try:
+        if args.command == "refresh":
+            roots = args.roots or SCAN_INDEX_ROOTS or find_roots()
+            if not roots:
+                print("[ERROR] No roots to index")
+                return 1
+            results = index.refresh(roots, args.skip, args.restat, args.full)
+            if not args.quiet:
+                print_refresh(results)
+            return 1 if any(stats.get("failed") for stats in results) else 0
+
+        if args.command == "find":
+            end = "\0" if args.null else "\n"
+            for path, _, _ in index.find(args.patterns, args.under):
+                sys.stdout.write(path + end)
+        elif args.command == "largest":
+            for path, size, _ in index.largest(args.under, args.limit, args.name):
+                print(f"{human_size(size) if args.human else size}\t{path}")
+        elif args.command == "du":
+            _, size = index.total_size(args.path)
+            print(f"{human_size(size) if args.human else size}\t{args.path}")
+        elif args.command == "roots":
+            for root, refreshed_at, dirs, files, size in index.roots():
+                refreshed = datetime.fromtimestamp(refreshed_at).strftime("%Y-%m-%d %H:%M")
+                print(f"{root}: {dirs} dirs, {files} files, {human_size(size)} (refreshed {refreshed})")
+    except ValueError as e:
+        print(f"[ERROR] {e}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
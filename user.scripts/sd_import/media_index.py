@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Content-hash index of imported media, shared by every SD card import.
+
+The card's .immich_imported.txt only knows paths on that card, so a
+reformatted card or a second card holding the same photos would be copied
+and uploaded again. This index remembers the content of everything
+imported, keyed by size plus a partial hash (first and last 64 KiB), and
+confirmed with a full SHA-1 before anything is skipped. A file whose size
+was never imported costs nothing to check; one whose size matches costs a
+128 KiB read, and only a partial-hash match reads the whole file.
+
+SHA-1 is what Immich stores per asset, so the same hashes can be checked
+against the server with its bulk upload check before copying.
+
+Usage:
+    from media_index import MediaIndex
+    index = MediaIndex()
+    duplicate, partial, sha1 = index.lookup(path, size)
+    index.add(size, partial, sha1, source)
+
+Or from command line:
+    python3 media_index.py scan /mnt/user/jumpdrive/imports   # Index earlier imports
+    python3 media_index.py stats
+    python3 media_index.py check FILE ...
+
+Environment:
+    MEDIA_INDEX_DB       Index database
+    IMMICH_SERVER        Immich URL for the optional server-side check
+    IMMICH_API_KEY       API key (or IMMICH_API_KEY_FILE, default /root/.auth/.immich_api_key)
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+import urllib.request
+
+MEDIA_INDEX_DB = os.getenv("MEDIA_INDEX_DB",
+                           os.path.join(os.getenv("APP_ROOT", "/mnt/pool/appdata"), "sd_import", "media_index.db"))
+IMMICH_SERVER = os.getenv("IMMICH_SERVER", "http://192.168.1.216:2283")
+IMMICH_API_KEY_FILE = os.getenv("IMMICH_API_KEY_FILE", "/root/.auth/.immich_api_key")
+PARTIAL_BYTES = 64 * 1024
+HASH_BUFFER = 8 * 1024 * 1024
+# Assets per bulk upload check request
+IMMICH_BATCH = 200
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS media (
+    sha1 TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    partial TEXT NOT NULL,
+    source TEXT,
+    added_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS media_size_partial ON media (size, partial);
+"""
+
+
+def partial_hash(path: str, size: int) -> str:
+    """SHA-1 of the first and last PARTIAL_BYTES of a file."""
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        digest.update(f.read(PARTIAL_BYTES))
+        if size > PARTIAL_BYTES:
+            f.seek(max(PARTIAL_BYTES, size - PARTIAL_BYTES))
+            digest.update(f.read(PARTIAL_BYTES))
+    return digest.hexdigest()
+
+
+def full_hash(path: str) -> str:
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(HASH_BUFFER)
+            if not chunk:
+                break
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class MediaIndex:
+    """
+    SQLite index of imported media by (size, partial hash) -> SHA-1.
+
+    Safe to share between threads; the set of known sizes is kept in
+    memory so most lookups never touch the database or the file.
+    """
+
+    def __init__(self, db_path: str = MEDIA_INDEX_DB):
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self.db = sqlite3.connect(db_path, timeout=60, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.executescript(SCHEMA)
+        self.lock = threading.Lock()
+        self.sizes = {size for (size,) in self.db.execute("SELECT DISTINCT size FROM media")}
+
+    def close(self):
+        with self.lock:
+            self.db.commit()
+            self.db.close()
+
+    def lookup(self, path: str, size: int) -> tuple:
+        """
+        Check a file against the index.
+
+        Returns (duplicate, partial, sha1); partial and sha1 are None when
+        they didn't need to be computed, so callers can reuse what was read.
+        """
+        if size not in self.sizes:
+            return False, None, None
+        partial = partial_hash(path, size)
+        with self.lock:
+            known = {sha1 for (sha1,) in self.db.execute(
+                "SELECT sha1 FROM media WHERE size = ? AND partial = ?", (size, partial))}
+        if not known:
+            return False, partial, None
+        sha1 = full_hash(path)
+        return sha1 in known, partial, sha1
+
+    def add(self, size: int, partial: str, sha1: str, source: str = ""):
+        with self.lock:
+            self.db.execute("INSERT OR IGNORE INTO media (sha1, size, partial, source, added_at) VALUES (?, ?, ?, ?, ?)",
+                            (sha1, size, partial, source, time.time()))
+            self.sizes.add(size)
+
+    def commit(self):
+        with self.lock:
+            self.db.commit()
+
+    def stats(self) -> dict:
+        with self.lock:
+            count, total = self.db.execute("SELECT count(*), coalesce(sum(size), 0) FROM media").fetchone()
+        return {"files": count, "bytes": total}
+
+
+def immich_api_key() -> str:
+    key = os.getenv("IMMICH_API_KEY", "")
+    if not key:
+        try:
+            with open(IMMICH_API_KEY_FILE) as f:
+                key = f.read().strip()
+        except OSError:
+            pass
+    return key
+
+
+def immich_duplicates(checksums: dict, server: str = IMMICH_SERVER, api_key: str = None) -> set:
+    """
+    Ask Immich which of {id: sha1 hex} it already has (POST /api/assets/bulk-upload-check).
+
+    Returns the ids Immich would reject as duplicates. Raises OSError (or
+    ValueError for a bad response) if the server can't be asked, so the
+    caller can log it and copy and upload as usual.
+    """
+    api_key = api_key if api_key is not None else immich_api_key()
+    if not checksums:
+        return set()
+    if not api_key:
+        raise ValueError("no Immich API key")
+    duplicates = set()
+    items = list(checksums.items())
+    for i in range(0, len(items), IMMICH_BATCH):
+        body = json.dumps({"assets": [{"id": key, "checksum": sha1} for key, sha1 in items[i:i + IMMICH_BATCH]]})
+        request = urllib.request.Request(f"{server.rstrip('/')}/api/assets/bulk-upload-check", data=body.encode(),
+                                         headers={"x-api-key": api_key, "Content-Type": "application/json"})
+        with urllib.request.urlopen(request, timeout=30) as response:
+            results = json.load(response).get("results", [])
+        duplicates.update(r["id"] for r in results if r.get("action") == "reject" and r.get("reason") == "duplicate")
+    return duplicates
+
+
+def scan(paths: list, index: MediaIndex) -> tuple:
+    """
+    Add every file under paths to the index.
+
+    Returns (new entries, [(path, error)] for files that couldn't be read).
+    """
+    errors = []
+    before = index.stats()["files"]
+    for root in paths:
+        for dirpath, _, filenames in os.walk(root):
+            for name in filenames:
+                path = os.path.join(dirpath, name)
+                try:
+                    size = os.stat(path).st_size
+                    index.add(size, partial_hash(path, size), full_hash(path), path)
+                except OSError as e:
+                    errors.append((path, e))
+        index.commit()
+    return index.stats()["files"] - before, errors
+
+
+if __name__ == "__main__":
+    command, args = (sys.argv[1], sys.argv[2:]) if len(sys.argv) > 1 else ("", [])
+    if command == "scan" and args:
+        index = MediaIndex()
+        added, errors = scan(args, index)
+        for path, error in errors:
+            print(f"[WARN] {path}: {error}")
+        print(f"Indexed {added} new files")
+        index.close()
+    elif command == "stats":
+        stats = MediaIndex().stats()
+        print(f"{stats['files']} files, {stats['bytes'] / 1073741824:.1f} GB indexed")
+    elif command == "check" and args:
+        index = MediaIndex()
+        for path in args:
+            duplicate, _, _ = index.lookup(path, os.stat(path).st_size)
+            print(f"{'duplicate' if duplicate else 'new'}\t{path}")
+    else:
+        print(__doc__.split("Or from command line:")[1].split("Environment:")[0].strip())
+        sys.exit(1)
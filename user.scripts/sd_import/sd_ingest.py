@@ -0,0 +1,730 @@
+#!/usr/bin/env python3
+"""
+SD card ingest engine for the Immich import.
+
+Mounts every partition of the card, copies new files from all partitions
+concurrently into a timestamped import directory and uploads them with
+immich-go-upload while the copy is still running.
+
+- Already-imported files are listed in .immich_imported.txt on the card
+  (one relative path per line, the format the rsync version wrote). The
+  list is loaded into a set, so each skip check is a hash lookup instead
+  of rsync matching every path against every exclude pattern.
+- Files are copied with copy_file_range (large-buffer read/write where the
+  kernel can't) into a temporary name and renamed when complete, keeping
+  the card's mtimes.
+- Progress is checkpointed: copied paths are appended to the tracking file
+  as they finish, and an unfinished partition remembers its destination in
+  IMPORTS_PATH/.sd_ingest/, so an interrupted import resumes into the same
+  directory and skips files that already arrived intact.
+- Content seen in any earlier import (a reformatted card, a second card
+  with the same shots) is skipped before copying, using the media index
+  (media_index.py: size, then a partial hash, confirmed by SHA-1). With
+  --immich-check, files the index doesn't know are also checked against
+  Immich's bulk upload check, so assets already on the server are neither
+  copied nor uploaded.
+- Uploads are pipelined: completed files are hard-linked into batch
+  directories that one uploader thread hands to immich-go-upload through a
+  small bounded queue, so the upload of a large card runs alongside its
+  copy instead of after it. --no-pipeline uploads the whole import at the
+  end instead, which is also the fallback if a batch fails.
+
+Usage:
+    python3 sd_ingest.py sdd                    # Called by sd-card-import (udev)
+    python3 sd_ingest.py --mounted /mnt/card    # Import an already-mounted directory
+    python3 sd_ingest.py sdd --no-upload
+    python3 sd_ingest.py sdd --immich-check
+    python3 sd_ingest.py sdd --no-pipeline
+
+Environment:
+    IMPORTS_PATH        Import destination (default /mnt/user/jumpdrive/imports)
+    SD_INGEST_WORKERS   Concurrent file copies per partition (default 2)
+    SD_DEDUP            Skip content imported before (default 1)
+    SD_DEDUP_IMMICH     Check Immich for existing assets before copying (default 0)
+    MEDIA_INDEX_DB      Media index database (see media_index.py)
+    SD_PIPELINE         Upload in batches during the copy (default 1)
+    SD_UPLOAD_BATCH_FILES, SD_UPLOAD_BATCH_MB
+                        Batch size limits (default 500 files, 4096 MB)
+    SD_UPLOAD_QUEUE     Batches waiting for upload before copying pauses (default 2)
+"""
+import argparse
+import hashlib
+import json
+import os
+import queue
+import re
+import shutil
+import signal
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from media_index import IMMICH_BATCH, MediaIndex, full_hash, immich_api_key, immich_duplicates, partial_hash
+
+MOUNT_BASE = "/mnt/sd-import"
+IMPORT_BASE = os.getenv("IMPORTS_PATH", "/mnt/user/jumpdrive/imports")
+LOG_FILE = "/var/log/sd-card-import.log"
+LOCK_FILE = "/tmp/sd-card-import.lock"
+# Seconds after which a lock is considered stale
+LOCK_TIMEOUT = 300
+TRACKING_FILE = ".immich_imported.txt"
+STATE_DIR = os.path.join(IMPORT_BASE, ".sd_ingest")
+SD_INGEST_WORKERS = int(os.getenv("SD_INGEST_WORKERS", "2"))
+# Skip files whose content was imported before, from any card
+SD_DEDUP = os.getenv("SD_DEDUP", "1") == "1"
+# Also ask Immich which files it already has before copying
+SD_DEDUP_IMMICH = os.getenv("SD_DEDUP_IMMICH", "0") == "1"
+# Upload in batches while copying instead of after the whole card
+SD_PIPELINE = os.getenv("SD_PIPELINE", "1") == "1"
+SD_UPLOAD_BATCH_FILES = int(os.getenv("SD_UPLOAD_BATCH_FILES", "500"))
+SD_UPLOAD_BATCH_MB = int(os.getenv("SD_UPLOAD_BATCH_MB", "4096"))
+# Sealed batches waiting for the uploader before copying pauses
+SD_UPLOAD_QUEUE = int(os.getenv("SD_UPLOAD_QUEUE", "2"))
+BATCH_DIR = ".batches"
+COPY_BUFFER = 8 * 1024 * 1024
+# Tracking file appends are flushed to the card this often
+CHECKPOINT_FILES = 50
+CHECKPOINT_SECONDS = 5
+UNMOUNTABLE = {"", "squashfs", "erofs"}
+
+_log_lock = threading.Lock()
+# Set on SIGTERM/Ctrl-C so copy workers stop picking up files
+_stop = threading.Event()
+# Set once a media index error has been logged
+_index_failed = threading.Event()
+
+
+def log(message: str):
+    line = f"{datetime.now().strftime('%Y-%m-%d %H:%M:%S')} - {message}"
+    with _log_lock:
+        print(line, flush=True)
+        try:
+            with open(LOG_FILE, "a") as f:
+                f.write(line + "\n")
+        except OSError:
+            pass
+
+
+def index_error(e: Exception):
+    """Log the first media index error; dedup is best effort and never stops an import."""
+    if not _index_failed.is_set():
+        _index_failed.set()
+        log(f"Warning: Media index error ({e}); affected files are imported without dedup")
+
+
+def acquire_lock() -> bool:
+    """Soft lock: skip duplicate runs, but never block forever on a stale lock."""
+    try:
+        age = time.time() - os.stat(LOCK_FILE).st_mtime
+    except OSError:
+        age = None
+    if age is not None:
+        if age < LOCK_TIMEOUT:
+            log(f"Another import is running (lock age: {age:.0f}s), exiting")
+            return False
+        log(f"Stale lock found (age: {age:.0f}s), removing and continuing")
+    with open(LOCK_FILE, "w") as f:
+        f.write(f"{os.getpid()}\n")
+    return True
+
+
+def release_lock():
+    try:
+        os.remove(LOCK_FILE)
+    except OSError:
+        pass
+
+
+def _blkid(partition: str, tag: str) -> str:
+    result = subprocess.run(["blkid", "-o", "value", "-s", tag, partition], capture_output=True, text=True)
+    return result.stdout.strip()
+
+
+def list_partitions(device: str) -> list:
+    result = subprocess.run(["lsblk", "-ln", "-o", "NAME", f"/dev/{device}"], capture_output=True, text=True)
+    names = [n for n in result.stdout.split() if n != device]
+    if not names:
+        log("No partitions found, trying whole device")
+        names = [device]
+    return [f"/dev/{n}" for n in names]
+
+
+def mount_partition(partition: str, mount_point: str):
+    """Mount read-write, else read-only. Returns True/False for writable, None if it didn't mount."""
+    os.makedirs(mount_point, exist_ok=True)
+    for options, writable in (([], True), (["-o", "ro"], False)):
+        result = subprocess.run(["mount", *options, partition, mount_point], capture_output=True, text=True)
+        if result.returncode == 0:
+            log(f"Mounted {partition} {'read-write' if writable else 'read-only'} to {mount_point}")
+            return writable
+        if result.stderr.strip():
+            log(result.stderr.strip())
+    try:
+        os.rmdir(mount_point)
+    except OSError:
+        pass
+    return None
+
+
+def unmount(partition: str, mount_point: str):
+    subprocess.run(["umount", mount_point], capture_output=True)
+    try:
+        os.rmdir(mount_point)
+    except OSError:
+        pass
+    log(f"Unmounted {partition}")
+
+
+def load_tracking(path: str) -> set:
+    """Read the tracking file into a set of relative paths."""
+    try:
+        with open(path, encoding="utf-8", errors="surrogateescape") as f:
+            return {line.rstrip("\n") for line in f if line.strip()}
+    except OSError:
+        return set()
+
+
+def copy_file(src: str, dest: str, hasher=None):
+    """
+    Copy src to dest through a temporary name, keeping the mtime.
+
+    With a hasher (e.g. hashlib.sha1()), the data goes through user space
+    once and is hashed on the way instead of being read a second time.
+    """
+    os.makedirs(os.path.dirname(dest), exist_ok=True)
+    tmp_path = os.path.join(os.path.dirname(dest), f".{os.path.basename(dest)}.part")
+    with open(src, "rb") as fsrc, open(tmp_path, "wb") as fdest:
+        size = os.fstat(fsrc.fileno()).st_size
+        copied = 0
+        if hasher is not None:
+            while True:
+                chunk = fsrc.read(COPY_BUFFER)
+                if not chunk:
+                    break
+                hasher.update(chunk)
+                fdest.write(chunk)
+            copied = size = fdest.tell()
+        try:
+            while copied < size:
+                n = os.copy_file_range(fsrc.fileno(), fdest.fileno(), size - copied)
+                if n == 0:
+                    break
+                copied += n
+        except (AttributeError, OSError):
+            # No copy_file_range here, or not between these filesystems
+            pass
+        if copied < size:
+            fsrc.seek(copied)
+            fdest.seek(copied)
+            shutil.copyfileobj(fsrc, fdest, COPY_BUFFER)
+    st = os.stat(src)
+    os.utime(tmp_path, ns=(st.st_atime_ns, st.st_mtime_ns))
+    os.replace(tmp_path, dest)
+
+
+class Checkpoint:
+    """Appends imported paths to the card's tracking file in small, flushed batches."""
+
+    def __init__(self, path: str, writable: bool):
+        self.path = path
+        self.writable = writable
+        self.pending = []
+        self.flushed_at = time.monotonic()
+        self.lock = threading.Lock()
+        self.failed = False
+
+    def add(self, rel: str):
+        with self.lock:
+            self.pending.append(rel)
+            if len(self.pending) >= CHECKPOINT_FILES or time.monotonic() - self.flushed_at >= CHECKPOINT_SECONDS:
+                self._flush()
+
+    def flush(self):
+        with self.lock:
+            self._flush()
+
+    def _flush(self):
+        self.flushed_at = time.monotonic()
+        if not self.pending or not self.writable or self.failed:
+            self.pending = []
+            return
+        try:
+            with open(self.path, "a", encoding="utf-8", errors="surrogateescape") as f:
+                f.write("".join(rel + "\n" for rel in self.pending))
+                f.flush()
+                os.fsync(f.fileno())
+        except OSError as e:
+            log(f"Warning: Could not update tracking file ({e})")
+            self.failed = True
+        self.pending = []
+
+
+def _state_path(card_id: str) -> str:
+    return os.path.join(STATE_DIR, re.sub(r"[^A-Za-z0-9._-]", "_", card_id) + ".json")
+
+
+def claim_destination(card_id: str, default: str) -> tuple:
+    """
+    Return (dest, resumed): the destination of an interrupted import of
+    this partition, or `default`, recorded until finish_destination().
+    """
+    path = _state_path(card_id)
+    try:
+        with open(path) as f:
+            dest = json.load(f)["dest"]
+        if os.path.isdir(dest):
+            log(f"Resuming interrupted import into {dest}")
+            return dest, True
+    except (OSError, ValueError, KeyError):
+        pass
+    os.makedirs(STATE_DIR, exist_ok=True)
+    with open(path, "w") as f:
+        json.dump({"dest": default, "started": datetime.now().isoformat(timespec="seconds")}, f)
+    return default, False
+
+
+def finish_destination(card_id: str):
+    try:
+        os.remove(_state_path(card_id))
+    except OSError:
+        pass
+
+
+def _run_upload(path: str) -> bool:
+    log(f"Starting immich-go upload from {path}")
+    with open(LOG_FILE, "a") as out:
+        result = subprocess.run(["immich-go-upload", path], stdout=out, stderr=subprocess.STDOUT)
+    if result.returncode == 0:
+        log("immich-go upload completed successfully")
+        return True
+    log(f"ERROR: immich-go upload failed with exit code {result.returncode}")
+    return False
+
+
+def upload(import_dirs: list) -> int:
+    if not shutil.which("immich-go-upload"):
+        log("WARNING: immich-go-upload not found in PATH")
+        return 1
+    status = 0
+    for import_dir in import_dirs:
+        # Leftovers of an interrupted pipelined upload; the files are in the import itself
+        shutil.rmtree(os.path.join(import_dir, BATCH_DIR), ignore_errors=True)
+        if not _run_upload(import_dir):
+            status = 1
+    return status
+
+
+class UploadPipeline:
+    """
+    Uploads copied files in batches while the copy continues.
+
+    Each file that lands in the import is hard-linked into a batch directory
+    (import_dir/.batches/NNNN/<partition>/<path>). A batch is sealed after
+    SD_UPLOAD_BATCH_FILES files or SD_UPLOAD_BATCH_MB, and sealed batches
+    go through a queue of at most SD_UPLOAD_QUEUE entries to one uploader
+    thread running immich-go-upload on each. When the uploader falls behind,
+    add() blocks, so copying never runs more than the queue ahead.
+
+    The batch directory is removed once uploaded (the import itself keeps the
+    files; the container's metadata is moved to import_dir/metadata), and
+    all of import_dir/.batches when the pipeline is closed. If a link or an
+    upload fails, `complete` is False and the caller uploads the whole
+    import as before; Immich skips what already arrived.
+    """
+
+    def __init__(self, import_dir: str, batch_files: int = SD_UPLOAD_BATCH_FILES,
+                 batch_bytes: int = SD_UPLOAD_BATCH_MB * 1048576, depth: int = SD_UPLOAD_QUEUE):
+        self.import_dir = import_dir
+        self.batch_files = batch_files
+        self.batch_bytes = batch_bytes
+        self.queue = queue.Queue(maxsize=max(1, depth))
+        self.lock = threading.Lock()
+        self.number = 0
+        self.current = None
+        self.files = 0
+        self.bytes = 0
+        self.complete = True
+        self.uploaded = 0
+        self.thread = threading.Thread(target=self._uploader, name="uploader", daemon=True)
+        self.thread.start()
+
+    def add(self, dest: str, rel: str, size: int):
+        """Queue dest/rel (a file now complete in the import) for upload."""
+        with self.lock:
+            if not self.complete:
+                return
+            if self.current is None:
+                self.number += 1
+                self.current = os.path.join(self.import_dir, BATCH_DIR, f"{self.number:04d}")
+                self.files = self.bytes = 0
+            link = os.path.join(self.current, os.path.basename(dest), rel)
+            try:
+                os.makedirs(os.path.dirname(link), exist_ok=True)
+                os.link(os.path.join(dest, rel), link)
+            except FileExistsError:
+                return
+            except OSError as e:
+                log(f"Warning: Cannot stage {rel} for pipelined upload ({e}); uploading the import when done")
+                self.complete = False
+                return
+            self.files += 1
+            self.bytes += size
+            if self.files >= self.batch_files or self.bytes >= self.batch_bytes:
+                self._seal()
+
+    def _seal(self):
+        if self.current is not None:
+            log(f"Queueing upload batch {self.number} ({self.files} files, {self.bytes / 1048576:.0f} MB)")
+            # Blocks while the queue is full: copying waits for the uploader
+            self.queue.put((self.current, self.files))
+            self.current = None
+
+    def _uploader(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                return
+            batch, files = item
+            if _stop.is_set() or not self.complete:
+                continue
+            # Keep draining the queue whatever happens, or copying and close() block forever
+            try:
+                if not _run_upload(batch):
+                    self.complete = False
+                    continue
+                self.uploaded += files
+                metadata = os.path.join(batch, "metadata")
+                if os.path.isdir(metadata):
+                    os.makedirs(os.path.join(self.import_dir, "metadata"), exist_ok=True)
+                    os.replace(metadata, os.path.join(self.import_dir, "metadata", os.path.basename(batch)))
+                shutil.rmtree(batch, ignore_errors=True)
+            except Exception as e:
+                log(f"ERROR: Upload of batch {os.path.basename(batch)} failed: {e}")
+                self.complete = False
+
+    def close(self) -> bool:
+        """Upload the last partial batch and wait; returns whether every file was uploaded."""
+        with self.lock:
+            self._seal()
+        self.queue.put(None)
+        self.thread.join()
+        self.discard()
+        return self.complete
+
+    def discard(self):
+        """Remove the staged links; after a failure the whole import is uploaded instead."""
+        shutil.rmtree(os.path.join(self.import_dir, BATCH_DIR), ignore_errors=True)
+
+
+def ingest(source: str, dest: str, writable: bool, workers: int = SD_INGEST_WORKERS,
+           index: MediaIndex = None, immich_check: bool = False, pipeline: UploadPipeline = None) -> dict:
+    """
+    Copy files under source that aren't in its tracking file to dest.
+
+    With an index, files whose content was imported before (from any card)
+    are skipped before copying, and everything copied is added to it. With
+    immich_check, files the index doesn't know are also checked against
+    Immich by SHA-1 first. With a pipeline, every file in dest (copied or
+    resumed) is handed to it as soon as it's complete.
+
+    Returns stats: copied, resumed (already at dest from an interrupted
+    run), skipped (tracked), duplicates, bytes, errors.
+    """
+    stats = {"copied": 0, "resumed": 0, "skipped": 0, "duplicates": 0, "duplicate_bytes": 0, "bytes": 0, "errors": 0}
+    tracking_path = os.path.join(source, TRACKING_FILE)
+    imported = load_tracking(tracking_path)
+    if imported:
+        log(f"Found existing import list with {len(imported)} files, will skip already imported files")
+    checkpoint = Checkpoint(tracking_path, writable)
+    stats_lock = threading.Lock()
+
+    def candidates():
+        for dirpath, dirnames, filenames in os.walk(source):
+            dirnames.sort()
+            for name in sorted(filenames):
+                if _stop.is_set():
+                    return
+                src = os.path.join(dirpath, name)
+                rel = os.path.relpath(src, source)
+                if rel == TRACKING_FILE:
+                    continue
+                if rel in imported:
+                    stats["skipped"] += 1
+                    continue
+                yield src, rel
+
+    def fail(rel, e):
+        log(f"ERROR: Failed to copy {rel}: {e}")
+        with stats_lock:
+            stats["errors"] += 1
+
+    def check(item):
+        """Return {src, rel, size, partial, sha1, state}; state is resumed, duplicate or new."""
+        src, rel = item
+        if _stop.is_set():
+            return None
+        try:
+            st = os.stat(src)
+            try:
+                existing = os.stat(os.path.join(dest, rel))
+                if existing.st_size == st.st_size and existing.st_mtime_ns == st.st_mtime_ns:
+                    return {"src": src, "rel": rel, "size": st.st_size, "state": "resumed"}
+            except OSError:
+                pass
+            duplicate, partial, sha1 = False, None, None
+            if index:
+                try:
+                    duplicate, partial, sha1 = index.lookup(src, st.st_size)
+                except sqlite3.Error as e:
+                    index_error(e)
+            if immich_check and not duplicate and sha1 is None:
+                sha1 = full_hash(src)
+        except OSError as e:
+            fail(rel, e)
+            return None
+        return {"src": src, "rel": rel, "size": st.st_size, "partial": partial, "sha1": sha1,
+                "state": "duplicate" if duplicate else "new"}
+
+    def copy(entry):
+        if entry is None or _stop.is_set():
+            return
+        src, rel = entry["src"], entry["rel"]
+        if entry["state"] == "new":
+            try:
+                # Hash while copying unless the checks already read the whole file
+                hasher = hashlib.sha1() if index and not entry["sha1"] else None
+                copy_file(src, os.path.join(dest, rel), hasher)
+            except OSError as e:
+                fail(rel, e)
+                return
+            if index:
+                try:
+                    index.add(entry["size"], entry["partial"] or partial_hash(src, entry["size"]),
+                              entry["sha1"] or hasher.hexdigest(), os.path.join(dest, rel))
+                except (OSError, sqlite3.Error) as e:
+                    index_error(e)
+        if pipeline and entry["state"] != "duplicate":
+            pipeline.add(dest, rel, entry["size"])
+        checkpoint.add(rel)
+        with stats_lock:
+            if entry["state"] == "duplicate":
+                stats["duplicates"] += 1
+                stats["duplicate_bytes"] += entry["size"]
+            elif entry["state"] == "resumed":
+                stats["resumed"] += 1
+            else:
+                stats["copied"] += 1
+                stats["bytes"] += entry["size"]
+
+    started = time.monotonic()
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            # Bounded in-flight work so a huge card isn't listed into memory up front
+            futures = []
+
+            def submit(fn, arg):
+                futures.append(pool.submit(fn, arg))
+                if len(futures) >= workers * 4:
+                    futures.pop(0).result()
+
+            if immich_check:
+                # Only the Immich check is batched (one request per batch); the copies
+                # go through the same sliding window while the next batch is checked
+                batch = []
+                for item in candidates():
+                    batch.append(item)
+                    if len(batch) >= IMMICH_BATCH:
+                        for entry in _immich_check(pool, batch, check, index):
+                            submit(copy, entry)
+                        batch = []
+                for entry in _immich_check(pool, batch, check, index):
+                    submit(copy, entry)
+            else:
+                for item in candidates():
+                    submit(lambda item: copy(check(item)), item)
+            for future in futures:
+                future.result()
+    finally:
+        checkpoint.flush()
+        if index:
+            try:
+                index.commit()
+            except sqlite3.Error as e:
+                index_error(e)
+    log(f"Copy completed: {stats['copied']} files ({stats['bytes'] / 1048576:.0f} MB) copied to {dest} "
+        f"in {time.monotonic() - started:.0f}s; {stats['resumed']} already there, "
+        f"{stats['skipped']} previously imported, {stats['duplicates']} duplicates of earlier imports "
+        f"({stats['duplicate_bytes'] / 1048576:.0f} MB), {stats['errors']} errors")
+    if not writable:
+        log("Partition is read-only, cannot update tracking file")
+    return stats
+
+
+def _immich_check(pool: ThreadPoolExecutor, batch: list, check, index: MediaIndex) -> list:
+    """Check a batch of candidates, then mark the ones Immich already has as duplicates."""
+    entries = [e for e in pool.map(check, batch) if e]
+    new = {e["rel"]: e["sha1"] for e in entries if e["state"] == "new"}
+    try:
+        on_server = immich_duplicates(new)
+    except (OSError, ValueError) as e:
+        log(f"Warning: Immich duplicate check failed ({e}), copying {len(new)} files unchecked")
+        return entries
+    for entry in entries:
+        if entry["rel"] in on_server:
+            entry["state"] = "duplicate"
+            if index:
+                # Remember it locally so the next card doesn't need the server
+                try:
+                    index.add(entry["size"], entry["partial"] or partial_hash(entry["src"], entry["size"]),
+                              entry["sha1"], f"immich:{entry['rel']}")
+                except (OSError, sqlite3.Error) as e:
+                    index_error(e)
+    return entries
+
+
+def import_partition(partition: str, import_dir: str, workers: int, index: MediaIndex = None,
+                     immich_check: bool = False, pipeline: UploadPipeline = None) -> tuple:
+    """Mount, ingest and unmount one partition; returns (dest, stats) or (None, None) if skipped."""
+    part_name = os.path.basename(partition)
+    fs_type = _blkid(partition, "TYPE")
+    log(f"Processing partition: {partition} (filesystem: {fs_type or 'unknown'})")
+    if fs_type in UNMOUNTABLE:
+        log(f"Skipping non-mountable partition {partition} (type: {fs_type or 'none'})")
+        return None, None
+
+    mount_point = os.path.join(MOUNT_BASE, part_name)
+    writable = mount_partition(partition, mount_point)
+    if writable is None:
+        log(f"Failed to mount {partition}, skipping")
+        return None, None
+    try:
+        label = _blkid(partition, "LABEL")
+        card_id = _blkid(partition, "UUID") or f"{label}_{part_name}"
+        dest, resumed = claim_destination(card_id, os.path.join(import_dir, f"{label}_{part_name}" if label else part_name))
+        log(f"Copying to: {dest}")
+        # A resumed import is uploaded whole at the end; staging its files too would upload them twice
+        stats = ingest(mount_point, dest, writable, workers, index, immich_check, None if resumed else pipeline)
+        stats["resumed_import"] = resumed
+        # Only an interrupted run resumes; files that failed are retried by the next
+        # import anyway, since they never reached the tracking file
+        if not _stop.is_set():
+            finish_destination(card_id)
+        return dest, stats
+    finally:
+        unmount(partition, mount_point)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import new files from an SD card and upload them to Immich")
+    parser.add_argument("device", nargs="?", help="Block device name, e.g. sdd")
+    parser.add_argument("--mounted", nargs="+", metavar="DIR", help="Import already-mounted directories instead")
+    parser.add_argument("--workers", type=int, default=SD_INGEST_WORKERS, help="Concurrent copies per partition")
+    parser.add_argument("--no-upload", action="store_true", help="Copy only; don't run immich-go-upload")
+    parser.add_argument("--no-dedup", dest="dedup", action="store_false", default=SD_DEDUP,
+                        help="Don't skip files already imported from other cards")
+    parser.add_argument("--immich-check", action="store_true", default=SD_DEDUP_IMMICH,
+                        help="Skip files Immich already has (bulk upload check)")
+    parser.add_argument("--no-pipeline", dest="pipeline", action="store_false", default=SD_PIPELINE,
+                        help="Upload once after the whole copy instead of in batches during it")
+    args = parser.parse_args()
+    if not args.device and not args.mounted:
+        parser.error("a device or --mounted is required")
+
+    if not acquire_lock():
+        return 0
+
+    # Treat SIGTERM like Ctrl-C so partitions are unmounted on the way out
+    def _interrupt(signum, frame):
+        raise KeyboardInterrupt
+    signal.signal(signal.SIGTERM, _interrupt)
+
+    index = pipeline = None
+    try:
+        log("==========================================")
+        if args.immich_check and not immich_api_key():
+            log("Warning: No Immich API key, skipping the Immich duplicate check")
+            args.immich_check = False
+        if args.dedup:
+            try:
+                index = MediaIndex()
+            except (OSError, sqlite3.Error) as e:
+                log(f"Warning: Media index unavailable ({e}), importing without dedup")
+        import_dir = os.path.join(IMPORT_BASE, datetime.now().strftime("%Y-%m-%d_%H%M%S"))
+        if args.pipeline and not args.no_upload and shutil.which("immich-go-upload"):
+            pipeline = UploadPipeline(import_dir)
+        if args.mounted:
+            log(f"Importing mounted directories: {', '.join(args.mounted)}")
+            jobs = [os.path.abspath(path) for path in args.mounted]
+
+            def run(path):
+                card_id = f"mounted{path}"
+                dest, resumed = claim_destination(card_id, os.path.join(import_dir, os.path.basename(path) or "root"))
+                log(f"Copying to: {dest}")
+                stats = ingest(path, dest, os.access(path, os.W_OK), args.workers, index, args.immich_check,
+                               None if resumed else pipeline)
+                stats["resumed_import"] = resumed
+                if not _stop.is_set():
+                    finish_destination(card_id)
+                return dest, stats
+        else:
+            log(f"SD card device detected: /dev/{args.device}")
+            jobs = list_partitions(args.device)
+
+            def run(partition):
+                return import_partition(partition, import_dir, args.workers, index, args.immich_check, pipeline)
+
+        log(f"Import directory: {import_dir}")
+        # One thread per partition; each copies with its own small pool
+        with ThreadPoolExecutor(max_workers=max(1, len(jobs))) as pool:
+            try:
+                results = [r for r in pool.map(run, jobs) if r[0]]
+            except KeyboardInterrupt:
+                # Let the workers finish their current file, checkpoint and unmount
+                _stop.set()
+                raise
+
+        copied = sum(stats["copied"] + stats["resumed"] for _, stats in results)
+        log(f"Import complete: {copied} total files copied")
+        # An interrupted import was never uploaded, even if nothing new arrived this time;
+        # it lives in that run's directory
+        import_dirs = sorted({os.path.dirname(dest) for dest, stats in results
+                              if stats["copied"] + stats["resumed"] or stats["resumed_import"]})
+        if pipeline:
+            complete = pipeline.close()
+            log(f"Pipelined upload: {pipeline.uploaded} files in {pipeline.number} batches"
+                f"{'' if complete else ', incomplete'}")
+            if complete:
+                # Only files copied by an interrupted run were never staged
+                import_dirs = sorted({os.path.dirname(dest) for dest, stats in results if stats["resumed_import"]})
+        if import_dirs and not args.no_upload:
+            upload(import_dirs)
+        elif not import_dirs and not copied:
+            log("No files copied, skipping immich-go upload")
+        log("Import process completed")
+        log("==========================================")
+    except KeyboardInterrupt:
+        log("Import interrupted; it will resume on the next run")
+        return 1
+    finally:
+        if pipeline:
+            # After an interrupt the uploader may still be mid-batch; the process is exiting either way
+            pipeline.discard()
+            try:
+                os.rmdir(import_dir)
+            except OSError:
+                pass
+        if index:
+            try:
+                index.close()
+            except sqlite3.Error as e:
+                index_error(e)
+        release_lock()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())